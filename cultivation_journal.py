@@ -1,70 +1,82 @@
+import time
+
+_IMPORT_TIME = time.time()  # Fallback for the launch time when the OS can't tell us
+
 import tkinter as tk
 from tkinter import messagebox, ttk, font, filedialog  # Add filedialog import
-import json
+import multiprocessing
 import os
-from datetime import datetime
+import sys
+import threading
 
-JOURNAL_FILE = "journal.json"  # Keep default filename as fallback
+from journal_ai_export import DEFAULT_TOKEN_BUDGET, AIExporter, estimate_tokens
+from journal_autosave import AutosaveWorker, SaveJob
+from journal_changes import ChangeTracker
+from journal_container import COMPRESSED_SUFFIX
+from journal_autocomplete import AutocompletePopup
+from journal_diagnostics import StallMonitor, diagnostics, instrumented
+from journal_document import (
+    MAX_SPIRIT_STONES, JournalDocument, JournalError, TABS_CONFIG, default_journal
+)
+from journal_entities import EntityIndex, build_library_trie, scan_fields
+from journal_formatting import FORMAT_TAGS, FORMATTING_KEY, apply_formatting, widget_formatting
+from journal_history import HistoryStore, history_dir_for
+from journal_ledger import ADJUSTMENT_REASON, LEDGER_KEY, Ledger, stones_value
+from journal_ledger_view import LedgerDialog
+from journal_library import LIBRARY_SUFFIX, SORT_ORDERS, JournalLibrary, LibraryDocument
+from journal_loader import BackgroundLoad, ChunkedFiller, SYNC_FILL_CHARS
+from journal_merge import merge_journals
+from journal_scheduler import HIGH, LOW, UIScheduler
+from journal_search import SearchIndex
+from journal_session_view import SessionLogView
+from journal_sessions import SESSIONS_KEY, SessionLog
+from journal_settings import SETTINGS_SAVE_DELAY_MS, Settings, settings_path
+from journal_watcher import FileWatcher
+from journal_workspace import Workspace
 
-# Basic structure of the journal
-default_journal = {
-    # Header fields
-    "Name": "",
-    "Stage": "",
-    
-    # Cultivation tab
-    "Path/Style": "",
-    "Affinity/Element(s)": "",
-    "Notable Breakthroughs": "",
-    "Active Techniques": "",
-    "Passive Techniques": "",
-    
-    # Background tab
-    "Origin/Background": "",
-    "Known By": "",
-    "Notable Actions": "",
-    
-    # Inventory tab
-    "Spirit Stones": "0",
-    "Items/Artifacts": "",
-    "Consumables": "",
-    
-    # Quests & Goals tab
-    "Goals": "",
-    "Hints & Rumors": "",
-    "Unfinished Quests": "",
-    
-    # Session Journal tab
-    "Session Notes": "",
-    
-    # AI Prompt (used when sharing with AI assistants)
-    "AI Prompt": """This is my Cultivation Journal for my character in a cultivation-themed roleplaying game.
+AUTOSAVE_DELAY_MS = 2000  # Quiet time after the last keystroke before autosaving
+AUTOSAVE_MAX_DELAY_MS = 30000  # Save at least this often while typing non-stop
+AUTOSAVE_POLL_MS = 100  # How often to check on the background writer
+LOAD_POLL_MS = 50  # How often to check on a file being parsed in the background
+JOURNAL_FILETYPES = [("JSON Files", "*.json"), ("Compressed Journals", "*" + COMPRESSED_SUFFIX), ("All Files", "*.*")]
 
-This journal tracks my character's cultivation journey, including their techniques, breakthroughs, inventory, and goals.
 
-When responding about this journal:
-- Refer to my character by name and respect their current cultivation stage
-- Use terminology and concepts from cultivation novels (qi, meridians, spiritual energy, etc.)
-- Help me brainstorm next steps based on my character's current goals and situation
-- Feel free to suggest potential plot developments or challenges based on the information provided
-- Maintain the tone and setting of a cultivation world
+def process_start_time():
+    """Wall-clock time this process was launched, or None if the OS can't tell us."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+            creation, exited, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            kernel32 = ctypes.windll.kernel32
+            if not kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(creation),
+                                            ctypes.byref(exited), ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            # FILETIME counts 100 ns intervals since 1601-01-01
+            ticks = (creation.dwHighDateTime << 32) | creation.dwLowDateTime
+            return ticks / 1e7 - 11644473600
+        
+        # Linux: start time in clock ticks since boot, field 22 of /proc/self/stat
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
 
-The journal is organized into sections for Cultivation details, Background information, Inventory, and Quests & Goals.""",
-    
-    # Metadata (not displayed directly)
-    "Last Updated": "",
-    "Window Width": 800,
-    "Window Height": 600
-}
 
 class CultivationJournalApp:
-    def __init__(self, master):
+    def __init__(self, master, measure_startup=False):
         self.master = master
         self.master.title("Cultivation Journal")
         self.style = ttk.Style(self.master)  # Store style object
 
-        # Set initial theme (can be overridden by saved settings later)
-        self.active_theme = "Mortal Realm"  # Start with the neutral theme
+        # Window size, theme and the prompt for new journals (loaded before any widget is built)
+        self._seed_settings = not os.path.exists(settings_path())  # First run: adopt an upgraded journal's window size
+        self.settings = Settings.load()
+        self._settings_after_id = None
+        self.active_theme = self.settings.get("Theme")
 
         # Define themes dictionary BEFORE first apply_theme call
         self.themes = {
@@ -74,18 +86,82 @@ class CultivationJournalApp:
             "Azure Sky": {"base_theme": "clam", "bg": "#E3F2FD", "fg": "#0D47A1", "text_bg": "#FFFFFF", "button_bg": "#90CAF9"},
             "Scholarly Scroll": {"base_theme": "clam", "bg": "#FFF8E1", "fg": "#4E342E", "text_bg": "#FFFDE7", "button_bg": "#FFCC80"}
         }
+        if self.active_theme not in self.themes:
+            self.active_theme = "Mortal Realm"  # Start with the neutral theme
 
-        self.journal = default_journal.copy()  # Initialize journal data first
+        self.document = self._new_document()  # Initialize journal data first
+        self.scheduler = UIScheduler(self.master)  # Per-keystroke refreshes run once per idle pass
         self.fields = {}  # Initialize fields dictionary BEFORE applying theme
+        self.field_vars = {}  # StringVars behind the Entry/Spinbox fields
+        self.tracker = ChangeTracker(on_change=self._on_field_changed)  # Per-field dirty flags
+        self._title_modified = False  # Whether the title currently shows the "*" marker
+        self._snapshot_keys = set()  # Fields read since the last snapshot was queued
         self.last_focused_text_widget = None  # Track the text widget that last had focus
+        self.session_view = None  # Dated session entries (built with the Session Journal tab)
+        self._session_log = None  # SessionLog over self.journal["Sessions"]
+        self._ledger = None  # Ledger over self.journal["Spirit Stone Ledger"]
+        self.ledger_dialog = None  # Spirit Stone Ledger window, while open
         self.status_bar = None  # Will hold reference to status bar
         self.current_file = None  # Track which file is currently open
+        self.library = None  # JournalLibrary opened from File > Open Library
+        self.workspace = Workspace()  # Journal files open in this window, recent ones kept parsed
+        self.incremental_saves = tk.BooleanVar(value=False)  # Append changes to a .wal log instead of rewriting
+        self.autosave_enabled = tk.BooleanVar(value=True)
+
+        # Background saving
+        self.autosave = AutosaveWorker(on_written=self._after_journal_written)
+        self._autosave_after_id = None
+        self._autosave_poll_id = None
+        self._first_unsaved_edit = None  # monotonic time of the oldest edit not yet submitted
+        self._last_save_result = None
+
+        # Export for AI assistants (sections re-rendered only when their field changes)
+        self.ai_exporter = AIExporter()
+        self.ai_export_budget = DEFAULT_TOKEN_BUDGET
+
+        # Autocomplete of names used in the journal (and optionally the rest of its folder)
+        self.entities = EntityIndex()
+        self.autocomplete_enabled = tk.BooleanVar(value=True)
+        self.autocomplete_library = tk.BooleanVar(value=False)
+        self.autocomplete = AutocompletePopup(self.master, self.entities.complete, enabled=self.autocomplete_enabled.get)
+        self._entity_scan = None  # {"document": ..., "fields": ..., "library": ...} filled by a worker thread
+
+        # Library search (one index per directory, updated by the autosave thread)
+        self._search_indexes = {}
+        self._search_lock = threading.Lock()
+
+        # Revision history (one store per journal, written by the autosave thread)
+        self._histories = {}
+        self._history_lock = threading.Lock()
+
+        # Background loading
+        self._load = None  # BackgroundLoad of the file being opened
+        self._filler = None  # ChunkedFiller feeding large fields into their widgets
+        self._previous_load_state = None  # (document, file) to restore if a load is cancelled
+        self._load_callback = None  # Runs instead of the "Loaded" message once a load is filled in
+        self._fill_callbacks = []  # Run once the current ChunkedFiller is done
+        self.master.bind("<Escape>", self.cancel_load)
+
+        # Changes made to the open file by someone else (e.g. a synced shared folder)
+        self.watcher = FileWatcher(self.master, self._on_file_changed_on_disk, is_busy=self._watcher_paused)
+        self._resolving_changes = False  # A conflict prompt is open
+
+        # Opt-in timing of handlers, I/O and main-loop stalls (Settings > Diagnostics)
+        self.diagnostics_enabled = tk.BooleanVar(value=False)
+        self.stall_monitor = StallMonitor(self.master)
+        self._fill_started = None
+
+        # Cold-start measurement (launch to first frame on screen)
+        self.startup_seconds = None
+        self._exit_after_startup = measure_startup
+        self.master.bind("<Map>", self._on_first_map, add="+")
 
         # Set window size from saved settings or defaults
-        width = self.journal.get("Window Width", 800)
-        height = self.journal.get("Window Height", 600)
-        self.master.geometry(f"{width}x{height}")
+        self.master.geometry(f"{self.settings.get('Window Width')}x{self.settings.get('Window Height')}")
         
+        # Closing the window goes through the same unsaved-changes check as File > Exit
+        self.master.protocol("WM_DELETE_WINDOW", self.on_exit)
+
         # Bind window resize event to save dimensions
         self.master.bind("<Configure>", self.on_window_resize)
         
@@ -94,12 +170,21 @@ class CultivationJournalApp:
         self.master.bind("<Control-l>", self.load_journal)
         self.master.bind("<Control-n>", self.clear_journal)
         self.master.bind("<Control-o>", self.load_journal)
+        self.master.bind("<Control-f>", self.open_search_dialog)
+        self.master.bind("<Control-Tab>", lambda e: self.switch_journal(step=1))
+        self.master.bind("<Control-Shift-Tab>", lambda e: self.switch_journal(step=-1))
+        self.master.bind("<Control-ISO_Left_Tab>", lambda e: self.switch_journal(step=-1))  # Shift+Tab on X11
         
         self.apply_theme(self.active_theme)  # Apply initial theme
 
         self.create_menu()  # Add menu bar
         self.create_widgets()
 
+    @property
+    def journal(self):
+        """The data dict of the open document."""
+        return self.document.data
+
     def create_widgets(self):
         # --- Main Container Frame ---
         main_container = ttk.Frame(self.master, padding="10")
@@ -122,13 +207,15 @@ class CultivationJournalApp:
         name_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
         
         ttk.Label(name_frame, text="Character Name:", font=("TkDefaultFont", 10, "bold")).pack(side=tk.LEFT, padx=(0, 5))
-        name_entry = ttk.Entry(name_frame, width=30, font=("TkDefaultFont", 10))
+        name_var = tk.StringVar(self.master, value=self.journal.get("Name", ""))
+        name_entry = ttk.Entry(name_frame, width=30, font=("TkDefaultFont", 10), textvariable=name_var)
         name_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.fields["Name"] = name_entry  # Store the Entry widget
-        name_entry.insert(0, self.journal.get("Name", ""))
+        self.field_vars["Name"] = name_var
+        self.tracker.watch_variable("Name", name_var, name_entry)
         
         # Update window title when name changes
-        name_entry.bind("<KeyRelease>", self.update_window_title)
+        name_entry.bind("<KeyRelease>", self._request_title_update)
         name_entry.bind("<FocusIn>", self._on_entry_focus)
         
         # Right side: Cultivation stage with label
@@ -136,10 +223,12 @@ class CultivationJournalApp:
         stage_frame.pack(side=tk.RIGHT)
         
         ttk.Label(stage_frame, text="Cultivation Stage:", font=("TkDefaultFont", 10, "bold")).pack(side=tk.LEFT, padx=(10, 5))
-        stage_entry = ttk.Entry(stage_frame, width=20, font=("TkDefaultFont", 10))
+        stage_var = tk.StringVar(self.master, value=self.journal.get("Stage", ""))
+        stage_entry = ttk.Entry(stage_frame, width=20, font=("TkDefaultFont", 10), textvariable=stage_var)
         stage_entry.pack(side=tk.LEFT)
         self.fields["Stage"] = stage_entry  # Store the Entry widget
-        stage_entry.insert(0, self.journal.get("Stage", ""))
+        self.field_vars["Stage"] = stage_var
+        self.tracker.watch_variable("Stage", stage_var, stage_entry)
         stage_entry.bind("<FocusIn>", self._on_entry_focus)
         
         # Theme selector
@@ -168,74 +257,25 @@ class CultivationJournalApp:
         self.status_bar.grid(row=1, column=0, sticky=(tk.E, tk.W))
         self.update_status_bar()
         
-        tabs_config = {
-            "Cultivation": ["Path/Style", "Affinity/Element(s)", "Notable Breakthroughs", "Active Techniques", "Passive Techniques"],
-            "Background": ["Origin/Background", "Known By", "Notable Actions"],
-            "Inventory": ["Spirit Stones", "Items/Artifacts", "Consumables"],
-            "Quests & Goals": ["Goals", "Hints & Rumors", "Unfinished Quests"],
-            "Session Journal": ["Session Notes"]
-        }
+        # Load progress (only shown while a journal is loading)
+        self.load_progress_frame = ttk.Frame(content_frame)
+        self.load_progress_frame.grid(row=1, column=0, sticky=tk.W)
+        self.load_progress = ttk.Progressbar(self.load_progress_frame, length=150, mode="determinate")
+        self.load_progress.pack(side=tk.LEFT, padx=(5, 5))
+        ttk.Button(self.load_progress_frame, text="Cancel (Esc)", command=self.cancel_load).pack(side=tk.LEFT)
+        self.load_progress_frame.grid_remove()
         
-        # Create tabs and place widgets
-        for tab_name, fields_in_tab in tabs_config.items():
+        # Create empty tabs; their widgets are built the first time each tab is shown
+        self.notebook = notebook
+        self._tab_frames = {}
+        self._built_tabs = set()
+        for tab_name in TABS_CONFIG:
             tab_frame = ttk.Frame(notebook, padding="10")
             notebook.add(tab_frame, text=tab_name)
             tab_frame.columnconfigure(1, weight=1)  # Allow content column to expand
-            
-            row = 0
-            for key in fields_in_tab:
-                if key in self.journal:  # Ensure the key exists in our default journal
-                    # Label
-                    label = ttk.Label(tab_frame, text=key + ":", font=("TkDefaultFont", 9, "bold"))
-                    label.grid(row=row, column=0, sticky="nw", padx=5, pady=5)
-                    
-                    # Choose appropriate widget type based on the field
-                    if key == "Spirit Stones":
-                        # Use Spinbox for numeric values
-                        spinbox = ttk.Spinbox(tab_frame, from_=0, to=1000000, width=10)
-                        spinbox.grid(row=row, column=1, sticky="w", padx=5, pady=5)
-                        spinbox.set(self.journal.get(key, "0"))
-                        self.fields[key] = spinbox
-                        spinbox.bind("<FocusIn>", self._on_entry_focus)
-                    else:
-                        # Use Text widget for multi-line fields
-                        # Adjust height based on expected content length
-                        # Make Session Notes much taller
-                        if key == "Session Notes":
-                            height = 15  # Taller for session journal
-                        elif key in ["Origin/Background", "Notable Actions", "Goals"]:
-                            height = 5   # Medium height for important narrative fields
-                        else:
-                            height = 3   # Standard height for other fields
-                        
-                        text_widget = tk.Text(tab_frame, wrap="word", height=height, width=50)
-                        
-                        # Configure text tags for formatting
-                        text_widget.tag_configure("bold", font=("TkDefaultFont", 10, "bold"))
-                        text_widget.tag_configure("italic", font=("TkDefaultFont", 10, "italic"))
-                        
-                        # Add scrollbar
-                        scrollbar = ttk.Scrollbar(tab_frame, orient="vertical", command=text_widget.yview)
-                        text_widget.configure(yscrollcommand=scrollbar.set)
-                        
-                        # Grid placement
-                        text_widget.grid(row=row, column=1, sticky="nsew", padx=(5, 0), pady=5)
-                        scrollbar.grid(row=row, column=2, sticky="ns", padx=(0, 5), pady=5)
-                        
-                        # Insert content and store widget reference
-                        text_widget.insert("1.0", self.journal.get(key, ""))
-                        self.fields[key] = text_widget
-                        
-                        # Bind focus event
-                        text_widget.bind("<FocusIn>", self._on_text_focus)
-                    
-                    # Add separator after certain fields for visual grouping
-                    if key in ["Affinity/Element(s)", "Passive Techniques", "Notable Actions", "Items/Artifacts"]:
-                        separator = ttk.Separator(tab_frame, orient="horizontal")
-                        row += 1
-                        separator.grid(row=row, column=0, columnspan=3, sticky="ew", pady=10)
-                    
-                    row += 1
+            self._tab_frames[tab_name] = tab_frame
+        notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        self._build_tab(next(iter(TABS_CONFIG)))  # The tab visible at startup
         
         # --- 3. FOOTER AREA ---
         footer_frame = ttk.Frame(main_container, padding=(0, 10, 0, 0))
@@ -257,37 +297,122 @@ class CultivationJournalApp:
         ttk.Button(format_frame, text="B", width=2, command=lambda: self.toggle_tag("bold")).pack(side=tk.LEFT, padx=2)
         ttk.Button(format_frame, text="I", width=2, command=lambda: self.toggle_tag("italic")).pack(side=tk.LEFT, padx=2)
 
-    def save_journal(self, event=None):  # Add optional event parameter for key binding
-        """Saves the journal data to file, including a timestamp."""
-        # Read current values from widgets before saving
-        for key in self.journal:
-            if key in self.fields:
-                # Handle different widget types
-                if isinstance(self.fields[key], tk.Text):
-                    # Get text from start ('1.0') to end ('end'), stripping trailing newline
-                    self.journal[key] = self.fields[key].get("1.0", "end-1c").strip()
-                elif isinstance(self.fields[key], ttk.Entry):
-                    # Get text from Entry widget
-                    self.journal[key] = self.fields[key].get().strip()
-                elif isinstance(self.fields[key], ttk.Spinbox):
-                    # Get value from Spinbox
-                    self.journal[key] = self.fields[key].get()
-        
-        # Save window dimensions
-        self.journal["Window Width"] = self.master.winfo_width()
-        self.journal["Window Height"] = self.master.winfo_height()
+        self.tracker.reset(self.journal)  # Everything just inserted counts as saved
+
+    def _on_tab_changed(self, event=None):
+        """Builds the newly selected tab if this is the first time it is shown."""
+        tab_name = self.notebook.tab(self.notebook.select(), "text")
+        if tab_name not in self._built_tabs:
+            self._build_tab(tab_name)
+
+    def _build_tab(self, tab_name):
+        """Creates the widgets of one tab, filled from self.journal."""
+        if tab_name in self._built_tabs:
+            return
+        self._built_tabs.add(tab_name)
+        tab_frame = self._tab_frames[tab_name]
+        fields_in_tab = TABS_CONFIG[tab_name]
+        text_bg_color, fg_color = self._text_colors()
         
-        # Ensure AI Prompt is saved
-        if "AI Prompt" not in self.journal:
-            self.journal["AI Prompt"] = default_journal["AI Prompt"]
+        row = 0
+        for key in fields_in_tab:
+            if key in self.journal:  # Ensure the key exists in our default journal
+                # Label
+                label = ttk.Label(tab_frame, text=key + ":", font=("TkDefaultFont", 9, "bold"))
+                label.grid(row=row, column=0, sticky="nw", padx=5, pady=5)
+                
+                # Choose appropriate widget type based on the field
+                if key == "Spirit Stones":
+                    # Use Spinbox for numeric values
+                    spinbox_var = tk.StringVar(self.master, value=self.journal.get(key, "0"))
+                    stones_frame = ttk.Frame(tab_frame)
+                    stones_frame.grid(row=row, column=1, sticky="w", padx=5, pady=5)
+                    spinbox = ttk.Spinbox(stones_frame, from_=0, to=1000000, width=10, textvariable=spinbox_var)
+                    spinbox.pack(side=tk.LEFT)
+                    # Once there is a ledger the count is its balance; editing it records an adjustment
+                    ttk.Button(stones_frame, text="Ledger...", command=self.open_ledger).pack(side=tk.LEFT, padx=5)
+                    self.fields[key] = spinbox
+                    self.field_vars[key] = spinbox_var
+                    self.tracker.watch_variable(key, spinbox_var, spinbox)
+                    spinbox.bind("<FocusIn>", self._on_entry_focus)
+                else:
+                    # Use Text widget for multi-line fields
+                    # Adjust height based on expected content length
+                    # Make Session Notes much taller
+                    if key == "Session Notes":
+                        height = 6  # Free-form notes, the dated sessions go below
+                    elif key in ["Origin/Background", "Notable Actions", "Goals"]:
+                        height = 5   # Medium height for important narrative fields
+                    else:
+                        height = 3   # Standard height for other fields
+                    
+                    text_widget = tk.Text(tab_frame, wrap="word", height=height, width=50,
+                                          bg=text_bg_color, fg=fg_color, insertbackground=fg_color)
+                    
+                    # Configure text tags for formatting
+                    text_widget.tag_configure("bold", font=("TkDefaultFont", 10, "bold"))
+                    text_widget.tag_configure("italic", font=("TkDefaultFont", 10, "italic"))
+                    
+                    # Add scrollbar
+                    scrollbar = ttk.Scrollbar(tab_frame, orient="vertical", command=text_widget.yview)
+                    text_widget.configure(yscrollcommand=scrollbar.set)
+                    
+                    # Grid placement
+                    text_widget.grid(row=row, column=1, sticky="nsew", padx=(5, 0), pady=5)
+                    scrollbar.grid(row=row, column=2, sticky="ns", padx=(0, 5), pady=5)
+                    
+                    # Store widget reference and insert content
+                    self.fields[key] = text_widget
+                    self.tracker.watch_text(key, text_widget)
+                    self.autocomplete.attach(text_widget)
+                    self._fill_text(key, self.journal.get(key, ""))
+                    
+                    # Bind focus event
+                    text_widget.bind("<FocusIn>", self._on_text_focus)
+                
+                # Add separator after certain fields for visual grouping
+                if key in ["Affinity/Element(s)", "Passive Techniques", "Notable Actions", "Items/Artifacts"]:
+                    separator = ttk.Separator(tab_frame, orient="horizontal")
+                    row += 1
+                    separator.grid(row=row, column=0, columnspan=3, sticky="ew", pady=10)
+                
+                row += 1
         
-        # Add timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.journal["Last Updated"] = timestamp
+        if tab_name == "Session Journal":
+            # Dated entries below the free-form notes, only the visible ones are rendered
+            ttk.Label(tab_frame, text="Session Log:", font=("TkDefaultFont", 9, "bold")).grid(
+                row=row, column=0, sticky="nw", padx=5, pady=5)
+            self.session_view = SessionLogView(tab_frame, self.get_session_log, self._on_sessions_changed,
+                                               colors=(text_bg_color, fg_color))
+            self.session_view.grid(row=row, column=1, columnspan=2, sticky="nsew", padx=5, pady=5)
+            tab_frame.rowconfigure(row, weight=1)
+        
+        # Widgets start out matching self.journal
+        self.tracker.reset(self.journal, [key for key in fields_in_tab if key in self.fields])
+
+    def _build_all_tabs(self):
+        """Builds every tab that hasn't been shown yet."""
+        for tab_name in TABS_CONFIG:
+            self._build_tab(tab_name)
+
+    def _text_colors(self):
+        """Returns (background, foreground) for Text widgets in the active theme."""
+        theme_config = self.themes.get(self.active_theme, {})
+        return theme_config.get("text_bg", "#FFFFFF"), theme_config.get("fg", "#000000")
+
+    def save_journal(self, event=None):  # Add optional event parameter for key binding
+        """Saves the journal data to file, including a timestamp.
+
+        The file is written on the autosave thread; the status bar reports
+        when it has landed.
+        """
+        if self.current_file and self.watcher.has_changed() and not self.autosave.busy:
+            # Never write over changes someone else made since we last looked
+            self._on_file_changed_on_disk(self.watcher.read_now())
+        self._read_fields()
         
         # Determine character name for suggested filename
-        character_name = self.journal.get("Name", "").strip()
-        default_filename = f"{character_name}_journal.json" if character_name else JOURNAL_FILE
+        default_filename = self.document.suggested_filename()
         
         # Use current file if exists, otherwise prompt for location
         file_to_save = self.current_file if self.current_file else None
@@ -296,27 +421,307 @@ class CultivationJournalApp:
             # Show save dialog with default filename and only allow .json files
             file_to_save = filedialog.asksaveasfilename(
                 defaultextension=".json",
-                filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+                filetypes=JOURNAL_FILETYPES,
                 initialfile=default_filename,
                 title="Save Cultivation Journal"
             )
         
         if file_to_save:  # User selected a file
+            if file_to_save != self.current_file and isinstance(self.document, LibraryDocument):
+                # Save As out of a library: from now on this is an ordinary .json journal
+                self.document = JournalDocument(self.journal)
             self.current_file = file_to_save  # Update current file
-            
-            with open(file_to_save, "w") as f:
-                json.dump(self.journal, f, indent=4)
-                
-            # Update status bar
-            self.update_status_bar(f"Saved to {os.path.basename(file_to_save)} at {timestamp}")
+            self._watch_current_file()
+            if not isinstance(self.document, LibraryDocument):
+                self.workspace.add(file_to_save)
+            self._submit_save(reason="save")
             
             # Update window title
             self.update_window_title()
             
-            return True  # Save successful
+            return True  # Save queued
         
         return False  # Save cancelled
 
+    def _read_fields(self):
+        """Copies edited widget values into self.journal and stamps the time.
+
+        Only fields the change tracker has flagged are read back; every other
+        field already matches self.journal.
+        """
+        edited = self.tracker.take_dirty(self._field_value)
+        self.journal.update(edited)
+        self._snapshot_keys.update(edited)
+        self.entities.update_fields(edited)  # Rescans only the changed lines
+        if "Spirit Stones" in edited and self._record_stones_adjustment():
+            self._snapshot_keys.add(LEDGER_KEY)
+        
+        # Typing moves formatting along with the text, so edited fields need their runs re-read
+        if self._refresh_formatting(edited):
+            self._snapshot_keys.add(FORMATTING_KEY)
+        
+        # Ensure AI Prompt is saved
+        if "AI Prompt" not in self.journal:
+            self.journal["AI Prompt"] = default_journal["AI Prompt"]
+        
+        # Add timestamp
+        return self.document.touch()
+
+    def get_session_log(self):
+        """The SessionLog of the open journal, rebuilt only when the journal changes."""
+        entries = self.journal.setdefault(SESSIONS_KEY, [])
+        if self._session_log is None or self._session_log.entries is not entries:
+            self._session_log = SessionLog(entries)
+            self.journal[SESSIONS_KEY] = self._session_log.entries
+        return self._session_log
+
+    def _on_sessions_changed(self, log):
+        """Stores edited session entries in the journal and schedules a save."""
+        self.journal[SESSIONS_KEY] = log.entries
+        self.tracker.touch(SESSIONS_KEY)
+
+    def get_ledger(self):
+        """The Ledger of the open journal, rebuilt only when the journal changes."""
+        entries = self.journal.setdefault(LEDGER_KEY, [])
+        if self._ledger is None or self._ledger.entries is not entries:
+            self._ledger = Ledger(entries)
+            self.journal[LEDGER_KEY] = self._ledger.entries
+        return self._ledger
+
+    def _on_ledger_changed(self, ledger):
+        """Stores the edited ledger and shows its balance as the Spirit Stones count."""
+        self.journal[LEDGER_KEY] = ledger.entries
+        self.tracker.touch(LEDGER_KEY)
+        stones = stones_value(ledger.balance)
+        if "Spirit Stones" in self.field_vars:
+            self.field_vars["Spirit Stones"].set(stones)  # Flags the field like an edit would
+        else:
+            self.journal["Spirit Stones"] = stones
+            self.tracker.touch("Spirit Stones")
+
+    def _record_stones_adjustment(self):
+        """Turns a hand edit of Spirit Stones into a ledger entry; returns True if one was added."""
+        ledger = self.get_ledger()
+        stones = str(self.journal.get("Spirit Stones", "")).strip()
+        if not len(ledger) or not stones.isdigit() or stones == stones_value(ledger.balance):
+            return False
+        change = min(int(stones), MAX_SPIRIT_STONES) - ledger.balance
+        ledger.add(min(max(change, -MAX_SPIRIT_STONES), MAX_SPIRIT_STONES), ADJUSTMENT_REASON)  # One entry's limit
+        self.journal[LEDGER_KEY] = ledger.entries
+        if self.ledger_dialog and self.ledger_dialog.exists():
+            self.ledger_dialog.refresh()
+        return True
+
+    def open_ledger(self):
+        """Shows the Spirit Stone ledger window (one at a time)."""
+        if self.ledger_dialog and self.ledger_dialog.exists():
+            self.ledger_dialog.window.lift()
+            return
+        self.ledger_dialog = LedgerDialog(self.master, self.get_ledger, self._on_ledger_changed,
+                                          get_stones=self._typed_stones)
+
+    def _typed_stones(self):
+        """The Spirit Stones count as shown, 0 if it isn't a number."""
+        stones = str(self._field_value("Spirit Stones") or "").strip()
+        return int(stones) if stones.isdigit() else 0
+
+    def _field_value(self, key):
+        """Reads one field from its widget, the way it is stored in the journal."""
+        if key not in self.fields:
+            return self.journal.get(key)  # Kept in the journal directly (e.g. Sessions)
+        widget = self.fields[key]
+        # Handle different widget types
+        if isinstance(widget, tk.Text):
+            # Get text from start ('1.0') to end ('end'), stripping trailing newline
+            return widget.get("1.0", "end-1c").strip()
+        elif isinstance(widget, ttk.Spinbox):
+            # Get value from Spinbox
+            return self.field_vars[key].get()
+        # Get text from Entry widget
+        return self.field_vars[key].get().strip()
+
+    def _set_field(self, key, value):
+        """Replaces the contents of one field widget."""
+        widget = self.fields[key]
+        if isinstance(widget, tk.Text):
+            # Clear existing text and insert the new value
+            widget.delete("1.0", "end")
+            self._fill_text(key, value)
+        else:
+            self.field_vars[key].set(value)
+
+    def _fill_text(self, key, value):
+        """Inserts value into an empty Text field, in chunks from the event loop if it is large."""
+        widget = self.fields[key]
+        formatting = (self.journal.get(FORMATTING_KEY) or {}).get(key)
+        if len(value) <= SYNC_FILL_CHARS:
+            widget.insert("1.0", value)
+            apply_formatting(widget, value, formatting)
+            return
+        
+        # The field stays read-only and untracked until all of it is in
+        self.tracker.hold(key)
+        if self._filler is None:
+            self._filler = ChunkedFiller(self.master, on_progress=self._on_fill_progress,
+                                         on_complete=self._on_fill_complete)
+            self._show_load_progress(True)
+
+        def filled(widget, key=key):
+            apply_formatting(widget, value, formatting)
+            self.tracker.release(key, self.journal)
+        self._filler.add(widget, value, on_done=filled)
+
+    def _refresh_formatting(self, keys):
+        """Re-reads the bold/italic runs of the given Text fields into the journal.
+
+        Returns True if the stored formatting changed.
+        """
+        current = self.journal.get(FORMATTING_KEY) or {}
+        updated = dict(current)  # Never modified in place, a queued snapshot may share it
+        for key in keys:
+            widget = self.fields.get(key)
+            if isinstance(widget, tk.Text):
+                runs = widget_formatting(widget)
+                if runs:
+                    updated[key] = runs
+                else:
+                    updated.pop(key, None)
+        if updated == current:
+            return False
+        self.journal[FORMATTING_KEY] = updated
+        return True
+
+    def _populate_fields(self):
+        """Writes self.journal into every field widget and marks them all as saved."""
+        if self._filler is not None:
+            # Whatever was still streaming in belongs to the old contents
+            self._filler.cancel()
+            self._filler = None
+            self._fill_callbacks = []
+            self.tracker.release_all()
+        with self.tracker.suspend():
+            for key in self.fields:
+                default = "0" if isinstance(self.fields[key], ttk.Spinbox) else ""
+                self._set_field(key, self.journal.get(key, default))
+        self.tracker.reset(self.journal)
+        if self.session_view:
+            self.session_view.refresh()
+        if self.ledger_dialog and self.ledger_dialog.exists():
+            self.ledger_dialog.refresh()
+        self._index_entities()
+        self._on_modified_state_changed()
+
+    def _submit_save(self, reason="autosave"):
+        """Hands a snapshot of self.journal to the background writer."""
+        self._cancel_autosave()
+        self._on_modified_state_changed()
+
+        job = SaveJob(self.document, dict(self.journal), self.current_file,
+                      incremental=self.incremental_saves.get(), reason=reason,
+                      keys=self._snapshot_keys)
+        self._snapshot_keys = set()
+        self.autosave.submit(job)
+        self._update_save_status()
+        if not self._autosave_poll_id:
+            self._autosave_poll_id = self.master.after(AUTOSAVE_POLL_MS, self._poll_autosave)
+
+    def _cancel_autosave(self):
+        """Stops the autosave countdown, if one is running."""
+        if self._autosave_after_id:
+            self.master.after_cancel(self._autosave_after_id)
+            self._autosave_after_id = None
+        self._first_unsaved_edit = None
+
+    @instrumented()
+    def _on_field_changed(self, key):
+        """Called by the change tracker after every edit to a field."""
+        self._on_modified_state_changed()
+        self.scheduler.request("autosave countdown", self._on_field_edited)
+
+    def _on_modified_state_changed(self):
+        """Adds or removes the "*" title marker when the dirty state flips."""
+        if self.tracker.is_modified() != self._title_modified:
+            self._request_title_update()
+
+    def _request_title_update(self, event=None):
+        """Refreshes the title once the current burst of events is handled."""
+        self.scheduler.request("title", self.update_window_title, HIGH)
+
+    def _on_field_edited(self, event=None):
+        """Restarts the autosave countdown after an edit (debounced)."""
+        if not self.autosave_enabled.get() or not self.current_file:
+            return
+        now = time.monotonic()
+        if self._first_unsaved_edit is None:
+            self._first_unsaved_edit = now
+        if self._autosave_after_id:
+            self.master.after_cancel(self._autosave_after_id)
+
+        # Don't let continuous typing postpone the save forever
+        waited_ms = (now - self._first_unsaved_edit) * 1000
+        delay = max(0, min(AUTOSAVE_DELAY_MS, int(AUTOSAVE_MAX_DELAY_MS - waited_ms)))
+        self._autosave_after_id = self.master.after(delay, self._autosave_now)
+        self._update_save_status()
+
+    def _autosave_now(self):
+        """Timer callback: snapshot the widgets and queue a background write."""
+        self._autosave_after_id = None
+        if not self.current_file or self._resolving_changes:
+            return
+        if self.watcher.has_changed() and not self.autosave.busy:
+            # Someone else wrote the file: pick up their changes before ours go out
+            self._on_file_changed_on_disk(self.watcher.read_now())
+        self._read_fields()
+        self._submit_save(reason="autosave")
+
+    def _poll_autosave(self):
+        """Picks up finished writes from the worker thread and reports them."""
+        self._autosave_poll_id = None
+        self._process_save_results()
+        if self.autosave.busy:
+            self._autosave_poll_id = self.master.after(AUTOSAVE_POLL_MS, self._poll_autosave)
+
+    def _process_save_results(self):
+        """Reports finished saves; returns False if any of them failed."""
+        all_ok = True
+        for result in self.autosave.poll():
+            self._last_save_result = result
+            diagnostics.record("io", f"save ({result.job.reason})", result.duration,
+                               f"{result.bytes_written} bytes" if result.ok else f"failed: {result.error}")
+            if not result.ok:
+                all_ok = False
+                self.tracker.mark_dirty(result.job.keys)
+                self._on_modified_state_changed()
+                error = result.error
+                detail = error.strerror if isinstance(error, OSError) and error.strerror else str(error)
+                messagebox.showerror("Save Failed", f"Could not save journal to "
+                                     f"{os.path.basename(result.job.path)}: {detail}")
+        self._update_save_status()
+        return all_ok
+
+    def _update_save_status(self):
+        """Shows pending, in-flight or last completed save in the status bar."""
+        if self.autosave.in_flight:
+            self.update_status_bar(f"Saving to {os.path.basename(self.current_file or '')}...")
+        elif self.autosave.pending or self._autosave_after_id:
+            self.update_status_bar("Autosave pending...")
+        elif self._last_save_result:
+            result = self._last_save_result
+            file_name = os.path.basename(result.job.path)
+            if result.ok:
+                timestamp = result.job.data.get("Last Updated", "")
+                self.update_status_bar(f"Saved to {file_name} at {timestamp}")
+            else:
+                self.update_status_bar(f"Save to {file_name} failed")
+
+    def _finish_saves(self):
+        """Waits for the background writer to finish; returns False if a save failed."""
+        if self._autosave_after_id:
+            # An edit is still waiting for its autosave, write it now
+            self._autosave_now()
+        self.autosave.flush()
+        return self._process_save_results()
+
     def save_as_journal(self):
         """Saves the journal to a new file location."""
         # Reset current file to force file dialog
@@ -332,94 +737,407 @@ class CultivationJournalApp:
             return False
 
     def load_journal(self, event=None):  # Add optional event parameter
-        """Loads the journal data from a user-selected file."""
+        """Loads the journal data from a user-selected file.
+
+        The file is parsed on a background thread and large fields are
+        filled in chunks, so the window stays responsive; Esc cancels.
+        """
         file_to_load = filedialog.askopenfilename(
             defaultextension=".json",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+            filetypes=[("Journals", "*.json *" + COMPRESSED_SUFFIX)] + JOURNAL_FILETYPES,
             title="Load Cultivation Journal"
         )
         
         if not file_to_load:  # User cancelled
             return False
+        return self.open_journal(file_to_load)
+
+    def open_journal(self, file_to_load, on_loaded=None, loader=JournalDocument.load):
+        """Starts loading a journal file; on_loaded runs once every field is filled.
+
+        Without on_loaded a "Loaded" message is shown at the end, as for File > Open.
+        loader turns file_to_load into a document on the background thread.
+        """
+        self.cancel_load()  # Only one load at a time
+        
+        # Let the previous journal finish saving first
+        self._finish_saves()
+        self._compact_log()
+        
+        self._load = BackgroundLoad(file_to_load, loader).start()
+        self._load_callback = on_loaded
+        self.update_status_bar(f"Reading {os.path.basename(file_to_load)}...")
+        self._show_load_progress(True, indeterminate=True)
+        self.master.after(LOAD_POLL_MS, self._poll_load)
+        return True
+
+    def _poll_load(self):
+        """Waits for the background parse, then swaps the journal in."""
+        load = self._load
+        if load is None or load.cancelled:
+            return
+        if not load.done:
+            self.master.after(LOAD_POLL_MS, self._poll_load)
+            return
+        
+        self._load = None
+        diagnostics.record("io", "load", load.duration, os.path.basename(load.path))
+        if load.error is not None:
+            self._show_load_progress(False)
+            self.update_status_bar()
+            if isinstance(load.error, JournalError):
+                messagebox.showerror("Load Failed", f"Failed to load journal. {load.error}")
+            else:
+                messagebox.showerror("Load Failed", f"An error occurred while loading: {str(load.error)}")
+            return
+        
+        # Remember what to go back to if the user cancels while the fields fill
+        self._previous_load_state = (self.document, self.current_file)
+        
+        # Update current file reference
+        self.current_file = load.path
+        
+        # Apply the loaded journal
+        self.document = load.document
+        self._watch_current_file()
+        self._park(*self._previous_load_state)
+        if not isinstance(self.document, LibraryDocument):
+            self.workspace.add(load.path)
+        
+        # Ensure AI Prompt exists after loading
+        if "AI Prompt" not in self.journal:
+            self.journal["AI Prompt"] = default_journal["AI Prompt"]
             
-        try:
-            with open(file_to_load, "r") as f:
-                loaded_journal = json.load(f)
-                
-            # Check if it's a valid journal file (has at least some essential keys)
-            essential_keys = ["Name", "Stage"]
-            if not all(key in loaded_journal for key in essential_keys):
-                messagebox.showwarning(
-                    "Invalid Journal File", 
-                    "The selected file does not appear to be a valid Cultivation Journal."
-                )
-                return False
-                
-            # Update current file reference
-            self.current_file = file_to_load
-            
-            # Apply the loaded journal
-            self.journal = loaded_journal
-            
-            # Ensure AI Prompt exists after loading
-            if "AI Prompt" not in self.journal:
-                self.journal["AI Prompt"] = default_journal["AI Prompt"]
-                
-            # Update UI fields
-            for key in self.journal:
-                if key in self.fields:
-                    if isinstance(self.fields[key], tk.Text):
-                        # Clear existing text and insert loaded value
-                        self.fields[key].delete("1.0", "end")
-                        self.fields[key].insert("1.0", self.journal.get(key, ""))
-                    elif isinstance(self.fields[key], ttk.Entry):
-                        # Clear and set Entry widget
-                        self.fields[key].delete(0, tk.END)
-                        self.fields[key].insert(0, self.journal.get(key, ""))
-                    elif isinstance(self.fields[key], ttk.Spinbox):
-                        # Set Spinbox value
-                        self.fields[key].set(self.journal.get(key, "0"))
-            
-            # Update window title to reflect loaded file
+        # Update UI fields (large ones continue in the background)
+        self._fill_started = time.perf_counter()
+        self._show_load_progress(True)
+        self._populate_fields()
+        
+        # Update window title to reflect loaded file
+        self.update_window_title()
+        
+        if self._filler is None:
+            self._on_fill_complete()
+
+    def _on_fill_progress(self, inserted, total):
+        """Updates the progress bar while large fields are being filled."""
+        self.load_progress.configure(maximum=max(total, 1), value=inserted)
+        if total:
+            self.update_status_bar(f"Loading... {inserted * 100 // total}%")
+
+    def _on_fill_complete(self):
+        """Runs once every field shows the loaded journal."""
+        self._filler = None
+        self._show_load_progress(False)
+        self._on_modified_state_changed()
+        callbacks, self._fill_callbacks = self._fill_callbacks, []
+        if self._previous_load_state is None:
+            # Filling a newly built tab or a restore, not a load
+            self.update_status_bar()
+        else:
+            self._previous_load_state = None
+            self._report_loaded()
+        for callback in callbacks:
+            callback()
+
+    def _when_filled(self, callback):
+        """Runs callback now, or once fields still being filled in are complete."""
+        if self._filler is None:
+            callback()
+        else:
+            self._fill_callbacks.append(callback)
+
+    def _report_loaded(self):
+        """Status bar and message after a load has been filled in."""
+        if self._fill_started is not None:
+            diagnostics.record("io", "fill fields", time.perf_counter() - self._fill_started)
+            self._fill_started = None
+        # Show timestamp if available
+        timestamp = self.journal.get("Last Updated", "")
+        file_name = os.path.basename(self.current_file)
+        if self.document.replayed_records:
+            file_name += f" + {self.document.replayed_records} logged saves"
+        if self.document.migrated_from is not None:
+            file_name += ", upgraded from an older version"  # Written to the file by the next save
+            self._adopt_moved_settings(self.document.moved_out)
+        if timestamp:
+            self.update_status_bar(f"Loaded {file_name} (Last updated: {timestamp})")
+        else:
+            self.update_status_bar(f"Loaded {file_name}")
+        
+        callback, self._load_callback = self._load_callback, None
+        if callback:
+            self._fill_callbacks.append(callback)
+        elif timestamp:
+            messagebox.showinfo("Loaded", f"Journal loaded successfully from {file_name}!\nLast updated: {timestamp}")
+        else:
+            messagebox.showinfo("Loaded", f"Journal loaded successfully from {file_name}!")
+
+    def cancel_load(self, event=None):
+        """Cancels a load in progress, going back to the journal that was open before."""
+        if self._load is not None:
+            self._load.cancel()
+            self._load = None
+            self._show_load_progress(False)
+            self.update_status_bar("Load cancelled")
+            return
+        if self._filler is None or self._previous_load_state is None:
+            return
+        
+        self._filler.cancel()
+        self._filler = None
+        self._fill_callbacks = []
+        self._load_callback = None
+        self.tracker.release_all()
+        self.document, self.current_file = self._previous_load_state
+        self._previous_load_state = None
+        if self.current_file:
+            self.workspace.take(self.current_file)  # Current again, not parked
+        self._watch_current_file()
+        self._populate_fields()
+        self.update_window_title()
+        if self._filler is None:
+            self._show_load_progress(False)
+        self.update_status_bar("Load cancelled")
+
+    def _show_load_progress(self, visible, indeterminate=False):
+        """Shows or hides the progress bar used while loading."""
+        if visible:
+            if indeterminate:
+                self.load_progress.configure(mode="indeterminate")
+                self.load_progress.start(15)
+            else:
+                self.load_progress.stop()
+                self.load_progress.configure(mode="determinate", value=0)
+            self.load_progress_frame.grid()
+        else:
+            self.load_progress.stop()
+            self.load_progress_frame.grid_remove()
+
+    # --- Open journals ---
+    def _park(self, document, path):
+        """Keeps a journal being switched away from in the workspace (journal files only)."""
+        if not path or isinstance(document, LibraryDocument):
+            return
+        for evicted in self.workspace.park(path, document):
+            if not self.autosave.busy:
+                self._compact_log(evicted)  # Otherwise the log stays and is replayed on the next open
+
+    def _fill_journals_menu(self):
+        menu = self.journals_menu
+        menu.delete(0, "end")
+        current = os.path.abspath(self.current_file) if self.current_file else None
+        for path in self.workspace.paths:
+            label = os.path.basename(path)
+            if os.path.abspath(path) == current:
+                label = "• " + label
+            elif self.workspace.is_parked(path):
+                label = "  " + label
+            else:
+                label = "  " + label + " (on disk)"  # Evicted from memory, read again when picked
+            menu.add_command(label=label, command=lambda p=path: self.switch_journal(p))
+        if self.workspace.paths:
+            menu.add_separator()
+        menu.add_command(label="Next Journal (Ctrl+Tab)", command=lambda: self.switch_journal(step=1))
+        menu.add_command(label="Previous Journal (Ctrl+Shift+Tab)", command=lambda: self.switch_journal(step=-1))
+        menu.add_command(label="Close Journal", command=self.close_journal,
+                         state="normal" if self.current_file in self.workspace else "disabled")
+
+    @instrumented()
+    def switch_journal(self, path=None, step=None):
+        """Shows another open journal in the same widgets.
+
+        A journal switched away from is saved in the background and kept
+        parsed, so switching back to it doesn't read the file again.
+        """
+        if path is None:
+            path = self.workspace.neighbour(self.current_file, step or 1)
+        if not path or (self.current_file and os.path.abspath(path) == os.path.abspath(self.current_file)):
+            return "break"
+        self.cancel_load()
+        if self._has_unsaved_changes() or self._snapshot_keys:
+            if not self.current_file:
+                if not messagebox.askyesno("Unsaved Changes", "This journal has never been saved. "
+                                           "Save it before switching?"):
+                    return "break"
+                if not self.save_journal():
+                    return "break"
+            else:
+                self._read_fields()
+                self._submit_save(reason="switch")
+        self._cancel_autosave()
+
+        document = self.workspace.take(path)
+        if document is None:
+            self.open_journal(path, on_loaded=lambda: self.update_status_bar(f"Switched to {os.path.basename(path)}"))
+            return "break"
+        self._park(self.document, self.current_file)
+        self.document = document
+        self.current_file = path
+        self._watch_current_file()
+        self._populate_fields()
+        self.update_window_title()
+        self.update_status_bar(f"Switched to {os.path.basename(path)}")
+        return "break"
+
+    def close_journal(self):
+        """Closes the open journal and shows the next open one (or a new journal)."""
+        path = self.current_file
+        if not path or path not in self.workspace:
+            return
+        if self._has_unsaved_changes():
+            if messagebox.askyesno("Unsaved Changes", "Save your changes before closing this journal?"):
+                self._read_fields()
+                self._submit_save(reason="close")
+            else:
+                self._cancel_autosave()
+                self.tracker.reset(self.journal)
+        if not self._finish_saves():
+            return
+        self._compact_log()
+        following = self.workspace.neighbour(path, 1)
+        self.workspace.remove(path)
+        if following:
+            self.current_file = None  # Nothing left to park
+            self.switch_journal(following)
+        else:
+            self.document = JournalDocument()
+            self.current_file = None
+            self._watch_current_file()
+            self._populate_fields()
             self.update_window_title()
-            
-            # Show timestamp if available
-            timestamp = self.journal.get("Last Updated", "")
-            file_name = os.path.basename(file_to_load)
-            if timestamp:
-                self.update_status_bar(f"Loaded {file_name} (Last updated: {timestamp})")
-                messagebox.showinfo("Loaded", f"Journal loaded successfully from {file_name}!\nLast updated: {timestamp}")
+            self.update_status_bar(f"Closed {os.path.basename(path)}")
+
+    # --- Changes made on disk by others ---
+    def _watch_current_file(self):
+        """Points the file watcher at the open journal file (database journals aren't watched)."""
+        watched = self.current_file if not isinstance(self.document, LibraryDocument) else None
+        if watched != self.watcher.path:
+            self.watcher.watch(watched)
+
+    def _watcher_paused(self):
+        """No checks while our own save or a load is running, or a conflict prompt is open."""
+        return self.autosave.busy or self._load is not None or self._filler is not None or self._resolving_changes
+
+    @instrumented()
+    def _on_file_changed_on_disk(self, disk):
+        """Reloads the fields someone else changed in the open file.
+
+        Only the changed fields are written into their widgets. A field that
+        was also edited here (and not saved yet) is a conflict: the user
+        merges the two versions or picks one.
+        """
+        if disk is None or disk.path != self.current_file or isinstance(self.document, LibraryDocument):
+            return
+        changed = self.document.fields_changed_in(disk)
+        base = self.document.saved_data  # What both sides started from
+        self.document.rebase(disk)  # Our next save builds on their file
+        if not changed:
+            return
+
+        self._has_unsaved_changes()  # Drops fields that were edited back to their saved value
+        unsaved = self.tracker.dirty_keys | self._snapshot_keys
+        conflicts = [key for key in changed if key in unsaved]
+        self._replace_fields(disk.data, [key for key in changed if key not in unsaved])
+
+        if conflicts:
+            self._resolving_changes = True
+            try:
+                choice = messagebox.askyesnocancel(
+                    "Journal Changed on Disk",
+                    f"{os.path.basename(self.current_file)} was changed by someone else, and these fields "
+                    f"were also edited here:\n\n{', '.join(conflicts)}\n\n"
+                    "Yes: merge both versions (lines you both changed are marked in the text)\n"
+                    "No: keep your version\n"
+                    "Cancel: take the version on disk",
+                    icon="warning"
+                )
+            finally:
+                self._resolving_changes = False
+            if choice is None:
+                self._snapshot_keys.difference_update(conflicts)
+                self._replace_fields(disk.data, conflicts)
+            elif choice:
+                self._merge_disk_values(base, disk.data, conflicts)
+            if self.tracker.is_modified() or self._snapshot_keys:
+                self._on_field_edited()  # Restart the autosave the prompt held up
+
+        shown = [key for key in changed if key in self.fields or key in (SESSIONS_KEY, LEDGER_KEY, FORMATTING_KEY)]
+        if shown:
+            self.update_status_bar(f"Reloaded from disk: {', '.join(shown)}")
+
+    def _merge_disk_values(self, base, theirs, keys):
+        """Three-way merges the given fields of our journal with the file on disk."""
+        mine = dict(self.journal)
+        mine.update({key: self._field_value(key) for key in keys if key in self.tracker.dirty_keys})
+        result = merge_journals(base, mine, theirs)
+
+        # Bold/italic runs of a merged text field come from the merge too
+        values = {key: result.data.get(key) for key in keys if key in result.data}
+        formatting = dict(self.journal.get(FORMATTING_KEY) or {})
+        merged_formatting = result.data.get(FORMATTING_KEY) or {}
+        for key in values:
+            if key in merged_formatting:
+                formatting[key] = merged_formatting[key]
             else:
-                self.update_status_bar(f"Loaded {file_name}")
-                messagebox.showinfo("Loaded", f"Journal loaded successfully from {file_name}!")
-                
-            return True
-            
-        except json.JSONDecodeError:
-            messagebox.showerror(
-                "Load Failed", 
-                f"Failed to load journal. The file is not valid JSON format."
-            )
-        except Exception as e:
-            messagebox.showerror("Load Failed", f"An error occurred while loading: {str(e)}")
-            
-        return False
+                formatting.pop(key, None)
+        values[FORMATTING_KEY] = formatting
+        keys = list(values)
+        self._replace_fields(values, keys)
+
+        # The merged values are not on disk yet
+        self._snapshot_keys.update(keys)
+        self._when_filled(lambda: self.tracker.mark_dirty(keys))
+        self._on_modified_state_changed()
+        if result.conflicts:
+            messagebox.showwarning("Merge Conflicts", "Some edits overlapped; check these fields:\n\n"
+                                   + "\n".join(result.notes))
+
+    def _replace_fields(self, values, keys):
+        """Puts values[key] into the journal and the widget of each key, counting them as saved."""
+        if not keys:
+            return
+        for key in keys:
+            if key in values:
+                self.journal[key] = values[key]
+            else:
+                self.journal.pop(key, None)
+        with self.tracker.suspend():
+            for key in keys:
+                if key in self.fields:
+                    default = "0" if isinstance(self.fields[key], ttk.Spinbox) else ""
+                    self._set_field(key, self.journal.get(key, default))  # Brings its formatting along
+        self.tracker.reset(self.journal, keys)
+        self.entities.update_fields({key: self.journal.get(key, "") for key in keys})
+
+        if FORMATTING_KEY in keys:
+            # Fields whose text stayed the same may still have new bold/italic runs
+            formatting = self.journal.get(FORMATTING_KEY) or {}
+            for key, widget in self.fields.items():
+                if isinstance(widget, tk.Text) and key not in keys and key not in self.tracker.dirty_keys:
+                    for tag in FORMAT_TAGS:
+                        widget.tag_remove(tag, "1.0", "end")
+                    apply_formatting(widget, widget.get("1.0", "end-1c"), formatting.get(key))
+        if SESSIONS_KEY in keys and self.session_view:
+            self.session_view.refresh()
+        if LEDGER_KEY in keys and self.ledger_dialog and self.ledger_dialog.exists():
+            self.ledger_dialog.refresh()
+        if "Name" in keys:
+            self._request_title_update()
+        self._on_modified_state_changed()
 
     def clear_journal(self, event=None):  # Add optional event parameter
         """Clears all fields to their default state after confirmation."""
         if messagebox.askyesno("Confirm New", "Are you sure you want to clear all fields? Unsaved changes will be lost."):
-            self.journal = default_journal.copy()  # Reset internal data
+            self.cancel_load()
+            self._finish_saves()
+            self._compact_log()
+            self._park(self.document, self.current_file)  # Stays in the Journals menu
+            self.document = self._new_document()  # Reset internal data
             self.current_file = None  # Reset current file reference
+            self._watch_current_file()
             
-            for key, widget in self.fields.items():
-                if isinstance(widget, tk.Text):
-                    widget.delete("1.0", "end")
-                    widget.insert("1.0", self.journal.get(key, ""))  # Insert default value
-                elif isinstance(widget, ttk.Entry):
-                    widget.delete(0, tk.END)
-                    widget.insert(0, self.journal.get(key, ""))
-                elif isinstance(widget, ttk.Spinbox):
-                    widget.set(self.journal.get(key, "0"))
+            self._populate_fields()  # Insert default values
                     
             # Update window title and status bar
             self.update_window_title()
@@ -440,8 +1158,19 @@ class CultivationJournalApp:
         file_menu.add_command(label="Save (Ctrl+S)", command=self.save_journal)
         file_menu.add_command(label="Save As...", command=self.save_as_journal)
         file_menu.add_separator()
+        file_menu.add_command(label="Search Library... (Ctrl+F)", command=self.open_search_dialog)
+        file_menu.add_command(label="History...", command=self.open_history_dialog)
+        file_menu.add_command(label="Export for AI...", command=self.open_ai_export_dialog)
+        file_menu.add_separator()
+        file_menu.add_command(label="Open Journal Database...", command=self.open_library)
+        file_menu.add_command(label="New Journal Database...", command=lambda: self.open_library(create=True))
+        file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.on_exit)
 
+        # Journals menu: the files open in this window, rebuilt each time it opens
+        self.journals_menu = tk.Menu(menubar, tearoff=0, postcommand=self._fill_journals_menu)
+        menubar.add_cascade(label="Journals", menu=self.journals_menu)
+
         # Settings Menu
         settings_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Settings", menu=settings_menu)
@@ -454,9 +1183,20 @@ class CultivationJournalApp:
         for theme_name in self.themes:
             themes_menu.add_command(label=theme_name, command=lambda t=theme_name: self.apply_theme(t))
             
+        settings_menu.add_checkbutton(label="Autosave", variable=self.autosave_enabled)
+        settings_menu.add_checkbutton(label="Incremental Saves (Write-Ahead Log)", variable=self.incremental_saves,
+                                      command=self._on_incremental_saves_toggled)
+        settings_menu.add_checkbutton(label="Autocomplete Names", variable=self.autocomplete_enabled)
+        settings_menu.add_checkbutton(label="Autocomplete from Other Journals in the Folder",
+                                      variable=self.autocomplete_library, command=self._index_entities)
+
         # Add separator and AI Prompt option
         settings_menu.add_separator()
         settings_menu.add_command(label="Edit AI Prompt...", command=self.edit_ai_prompt)
+        settings_menu.add_separator()
+        settings_menu.add_checkbutton(label="Record Diagnostics", variable=self.diagnostics_enabled,
+                                      command=self._on_diagnostics_toggled)
+        settings_menu.add_command(label="Diagnostics...", command=self.open_diagnostics_panel)
 
     def on_exit(self):
         """Handle application exit with unsaved changes check."""
@@ -467,22 +1207,50 @@ class CultivationJournalApp:
                 if not self.save_journal():
                     # User cancelled save, abort exit
                     return
+            else:
+                self._cancel_autosave()  # User chose to discard the edits
         
+        if not self._finish_saves():
+            return  # Keep the window open so the journal isn't lost
+        self._compact_log()
+        for document in self.workspace.documents():
+            self._compact_log(document)
+        if self._settings_after_id is not None:
+            self.master.after_cancel(self._settings_after_id)
+            self._save_settings()
+        self.autosave.stop()
+        if self.library:
+            self.library.close()
         self.master.quit()
+
+    def _on_incremental_saves_toggled(self):
+        """Folds any pending log back into the file when incremental saves are turned off."""
+        if not self.incremental_saves.get():
+            self._finish_saves()
+            self._compact_log()
+
+    def _compact_log(self, document=None):
+        """Rewrites the open journal file (or another document's) with everything still in its write-ahead log.
+
+        Keeps the .json file complete on its own whenever we stop working on
+        it, so it can be shared or uploaded without the sidecar log.
+        """
+        document = document or self.document
+        if not document.has_pending_log():
+            return
+        try:
+            document.compact()
+            if document is self.document:
+                self.watcher.acknowledge()
+        except OSError as e:
+            messagebox.showerror("Save Failed", f"Could not compact journal log: {e.strerror or e}")
         
     def _has_unsaved_changes(self):
-        """Check if there are unsaved changes by comparing with current file."""
-        # Simple implementation - can be enhanced to actually compare content
-        if self.current_file is None and any(
-            self.fields[key].get() != "" if isinstance(self.fields[key], ttk.Entry) else
-            self.fields[key].get("1.0", "end-1c").strip() != "" 
-            for key in self.fields if key != "Spirit Stones"
-        ):
-            return True
-            
-        # More sophisticated checking could be added here
-        return False
+        """Check if any field differs from what was last saved (or loaded)."""
+        # Only the fields flagged by the change tracker are read and hashed
+        return self.tracker.has_unsaved_changes(self._field_value)
     
+    @instrumented()
     def update_window_title(self, event=None):
         """Updates the window title to include character name and filename."""
         name = ""
@@ -498,11 +1266,15 @@ class CultivationJournalApp:
             file_name = os.path.basename(self.current_file)
             title_parts.append(f"[{file_name}]")
             
+        # Leading "*" marks unsaved edits
+        self._title_modified = self.tracker.is_modified()
+        marker = "*" if self._title_modified else ""
         if title_parts:
-            self.master.title(f"{' - '.join(title_parts)} - Cultivation Journal")
+            self.master.title(f"{marker}{' - '.join(title_parts)} - Cultivation Journal")
         else:
-            self.master.title("Cultivation Journal")
+            self.master.title(f"{marker}Cultivation Journal")
 
+    @instrumented()
     def apply_theme(self, theme_name):
         """Applies the selected color theme."""
         if theme_name not in self.themes:
@@ -510,6 +1282,8 @@ class CultivationJournalApp:
             return
 
         self.active_theme = theme_name
+        if self.settings.set("Theme", theme_name):
+            self._schedule_settings_save()
         theme_config = self.themes[theme_name]
         base_theme = theme_config.get("base_theme", "clam")  # Default to clam if not specified
 
@@ -558,18 +1332,23 @@ class CultivationJournalApp:
         for key, widget in self.fields.items():
             if isinstance(widget, tk.Text):
                 widget.config(bg=text_bg_color, fg=fg_color, insertbackground=fg_color)  # Set text bg, fg, and cursor color
+        if self.session_view:
+            self.session_view.set_colors(text_bg_color, fg_color)
 
         # Configure Scrollbars (ttk)
         self.style.configure('Vertical.TScrollbar', background=button_bg_color)  # Scrollbar color matches button
 
+    @instrumented()
     def _on_entry_focus(self, event):
         """Callback function to clear the last focused text widget when an Entry gets focus."""
         self.last_focused_text_widget = None
         
+    @instrumented()
     def _on_text_focus(self, event):
         """Callback function to store the text widget that gained focus."""
         self.last_focused_text_widget = event.widget
 
+    @instrumented()
     def toggle_tag(self, tag_name):
         """Toggles the given tag on the selected text in the LAST FOCUSED Text widget."""
         widget = self.last_focused_text_widget  # Use the stored widget reference
@@ -590,7 +1369,12 @@ class CultivationJournalApp:
                 # If not applied, add it
                 widget.tag_add(tag_name, "sel.first", "sel.last")
         except tk.TclError:
-            pass
+            return
+        
+        # Formatting is saved with the journal; tag changes don't fire <<Modified>>
+        key = next((k for k, w in self.fields.items() if w is widget), None)
+        if key and self._refresh_formatting([key]):
+            self.tracker.touch(FORMATTING_KEY)
     
     def update_status_bar(self, message=None):
         """Updates the status bar with the last saved time or a custom message."""
@@ -604,12 +1388,69 @@ class CultivationJournalApp:
                 else:
                     self.status_bar.config(text="Not saved yet")
     
+    def _on_first_map(self, event):
+        """Waits for the first idle moment after the main window appears."""
+        if event.widget is self.master and self.startup_seconds is None:
+            self.master.after_idle(self._record_startup_time)
+
+    def _record_startup_time(self):
+        """Records how long it took from process launch to the first interactive frame."""
+        if self.startup_seconds is not None:
+            return
+        launched = process_start_time() or _IMPORT_TIME
+        self.startup_seconds = time.time() - launched
+        diagnostics.record("io", "startup", self.startup_seconds, "launch to first frame")
+        if self._exit_after_startup:
+            print(f"Startup: {self.startup_seconds:.3f}s from launch to first frame")
+            self.master.after(0, self.master.destroy)
+
+    @instrumented()
     def on_window_resize(self, event=None):
         """Captures window resize events to save dimensions."""
         if event and event.widget == self.master:
-            if hasattr(self.master, 'after_id'):
-                self.master.after_cancel(self.master.after_id)
-            self.master.after_id = self.master.after(250, lambda: None)
+            # A drag sends a stream of <Configure> events; only the last size matters
+            self.scheduler.request("window size", self._remember_window_size, LOW)
+
+    def _remember_window_size(self):
+        width, height = self.master.winfo_width(), self.master.winfo_height()
+        if width <= 1 or height <= 1:
+            return  # Not mapped yet
+        changed = self.settings.set("Window Width", width)
+        if self.settings.set("Window Height", height) or changed:
+            self._schedule_settings_save()
+
+    # --- User settings ---
+    def _new_document(self):
+        """An empty journal, starting with the user's own AI prompt if they set one."""
+        document = JournalDocument()
+        if self.settings.get("AI Prompt"):
+            document["AI Prompt"] = self.settings.get("AI Prompt")
+        return document
+
+    def _adopt_moved_settings(self, moved):
+        """Keeps the window size an upgraded journal used to store, if the user has no settings yet."""
+        size = {key: moved[key] for key in ("Window Width", "Window Height") if key in moved}
+        if not self._seed_settings or not size:
+            return
+        self._seed_settings = False  # Only the first journal's: later ones must not resize the window
+        for key, value in size.items():
+            self.settings.set(key, value)
+        self.master.geometry(f"{self.settings.get('Window Width')}x{self.settings.get('Window Height')}")
+        self._save_settings()
+
+    def _schedule_settings_save(self):
+        """Writes the settings once they have stopped changing for a moment."""
+        if self._settings_after_id is not None:
+            self.master.after_cancel(self._settings_after_id)
+        self._settings_after_id = self.master.after(SETTINGS_SAVE_DELAY_MS, self._save_settings)
+
+    def _save_settings(self):
+        self._settings_after_id = None
+        try:
+            self.settings.save()
+        except OSError as e:
+            # Preferences aren't worth interrupting the user for
+            self.update_status_bar(f"Could not save settings: {e.strerror or e}")
     
     def edit_ai_prompt(self):
         """Opens a dialog to edit the AI prompt."""
@@ -661,6 +1502,9 @@ The journal is organized into sections for Cultivation details, Background infor
         def save_prompt():
             new_prompt = text_area.get("1.0", "end-1c")
             self.journal["AI Prompt"] = new_prompt
+            # New journals start with the same prompt
+            if self.settings.set("AI Prompt", None if new_prompt == default_prompt else new_prompt):
+                self._schedule_settings_save()
             dialog.destroy()
             self.update_status_bar("AI Prompt updated")
         
@@ -675,8 +1519,711 @@ The journal is organized into sections for Cultivation details, Background infor
         y = self.master.winfo_y() + (self.master.winfo_height() - dialog.winfo_height()) // 2
         dialog.geometry(f"+{x}+{y}")
 
+    # --- Export for AI assistants ---
+    def _current_values(self):
+        """The journal with unsaved widget edits applied, without touching self.journal."""
+        data = dict(self.journal)
+        data.update({key: self._field_value(key) for key in self.tracker.dirty_keys})
+        return data
+
+    def open_ai_export_dialog(self, event=None):
+        """Builds the AI prompt plus the journal within a token budget, to copy or save."""
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Export for AI")
+        dialog.geometry("700x500")
+        dialog.transient(self.master)
+
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        options = ttk.Frame(frame)
+        options.pack(fill=tk.X)
+        ttk.Label(options, text="Token budget:").pack(side=tk.LEFT)
+        budget_var = tk.StringVar(value=str(self.ai_export_budget))
+        ttk.Spinbox(options, from_=500, to=1000000, increment=1000, textvariable=budget_var,
+                    width=10).pack(side=tk.LEFT, padx=5)
+        size_label = ttk.Label(options, text="")
+        size_label.pack(side=tk.LEFT, padx=10)
+
+        preview = tk.Text(frame, wrap="word", height=20)
+        preview.pack(fill=tk.BOTH, expand=True, pady=10)
+
+        def budget():
+            try:
+                return max(int(budget_var.get()), 1)
+            except ValueError:
+                return self.ai_export_budget
+
+        def render(*args):
+            self.ai_export_budget = budget()
+            text = self.ai_exporter.export(self._current_values(), self.ai_export_budget)
+            preview.configure(state="normal")
+            preview.delete("1.0", "end")
+            preview.insert("1.0", text)
+            preview.configure(state="disabled")
+            size_label.configure(text=f"About {estimate_tokens(text):,} tokens, {len(text):,} characters")
+            return text
+
+        def copy_export():
+            text = render()
+            self.master.clipboard_clear()
+            self.master.clipboard_append(text)
+            self.update_status_bar("AI export copied to the clipboard")
+
+        def save_export():
+            path = filedialog.asksaveasfilename(
+                parent=dialog,
+                defaultextension=".txt",
+                filetypes=[("Text Files", "*.txt"), ("All Files", "*.*")],
+                initialfile=f"{self.document.name or 'journal'}_for_ai.txt",
+                title="Save Export for AI"
+            )
+            if not path:
+                return
+            try:
+                with open(path, "w", encoding="utf-8") as f:
+                    for piece in self.ai_exporter.stream(self._current_values(), budget()):
+                        f.write(piece)
+            except OSError as e:
+                messagebox.showerror("Export Failed", f"Could not write {path}: {e.strerror or e}", parent=dialog)
+                return
+            self.update_status_bar(f"AI export saved to {os.path.basename(path)}")
+
+        buttons = ttk.Frame(frame)
+        buttons.pack(fill=tk.X)
+        ttk.Button(buttons, text="Copy to Clipboard", command=copy_export).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Save As...", command=save_export).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Close", command=dialog.destroy).pack(side=tk.RIGHT)
+        budget_var.trace_add("write", lambda *args: self.scheduler.request("ai export preview", render))
+        render()
+
+    # --- Name autocomplete ---
+    def _index_entities(self):
+        """Scans the open journal (and its folder, if enabled) for names on a worker thread."""
+        document = self.document
+        journal = dict(self.journal)
+        library_dir = None
+        if self.autocomplete_library.get() and self.current_file:
+            library_dir = os.path.dirname(os.path.abspath(self.current_file))
+        scan = {"document": document, "fields": None, "library": None, "library_dir": library_dir}
+        self._entity_scan = scan
+        rescan_library = library_dir != self.entities.library_dir
+
+        def run():
+            try:
+                scan["fields"] = scan_fields(journal)
+                if library_dir and rescan_library:
+                    scan["library"] = build_library_trie(library_dir)
+            except Exception as e:  # Autocomplete is a convenience; never let it take the app down
+                print(f"Indexing names failed: {e}")
+
+        worker = threading.Thread(target=run, name="journal-entities", daemon=True)
+        worker.start()
+
+        def wait():
+            if self._entity_scan is not scan:
+                return  # Superseded by a newer journal
+            if worker.is_alive():
+                self.master.after(LOAD_POLL_MS, wait)
+                return
+            self._entity_scan = None
+            if scan["fields"] is not None and self.document is document:
+                self.entities.adopt(scan["fields"])
+                # Edits saved while the scan ran are newer than its snapshot
+                self.entities.update_fields(self.journal)
+            if scan["library"] is not None:
+                self.entities.set_library(scan["library"], library_dir)
+            elif not library_dir and self.entities.library_dir:
+                self.entities.set_library(None)
+
+        wait()
+
+    # --- Library search ---
+    def _search_index(self, library_dir):
+        """Returns the SearchIndex of a directory, creating it on first use."""
+        library_dir = os.path.abspath(library_dir)
+        with self._search_lock:
+            if library_dir not in self._search_indexes:
+                self._search_indexes[library_dir] = SearchIndex(library_dir)
+            return self._search_indexes[library_dir]
+
+    def _after_journal_written(self, job):
+        """Runs on the autosave thread after each write: records a revision and updates the search index."""
+        if job.path == self.watcher.path:
+            self.watcher.acknowledge()  # Our own write, not a change to reload
+        else:
+            self.workspace.acknowledge(job.path)  # A journal switched away from while its save was queued
+        start = time.perf_counter()
+        self._history_for(job.document, job.path).record(job.data, job.reason)
+        indexed = time.perf_counter()
+        self._index_written_journal(job)
+        diagnostics.record("io", "record revision", indexed - start)
+        diagnostics.record("io", "update search index", time.perf_counter() - indexed)
+
+    def _index_written_journal(self, job):
+        """Re-indexes the fields a save changed."""
+        if isinstance(job.document, LibraryDocument):
+            return  # Only .json files in a folder are indexed
+        keys = job.keys or None  # Saves without a list of edited fields re-index everything
+        self._search_index(os.path.dirname(job.path)).update_journal(job.path, job.data, keys)
+
+    def open_search_dialog(self, event=None):
+        """Searches every journal in the open journal's folder (or one the user picks)."""
+        if self.current_file:
+            library_dir = os.path.dirname(os.path.abspath(self.current_file))
+        else:
+            library_dir = filedialog.askdirectory(title="Choose a folder of journals to search")
+            if not library_dir:
+                return
+        index = self._search_index(library_dir)
+
+        dialog = tk.Toplevel(self.master)
+        dialog.title(f"Search Library - {library_dir}")
+        dialog.geometry("650x400")
+        dialog.transient(self.master)
+
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        query_entry = ttk.Entry(frame)
+        query_entry.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        search_button = ttk.Button(frame, text="Search", state="disabled")
+        search_button.grid(row=0, column=1, sticky="e", padx=(5, 0), pady=(0, 5))
+
+        results = ttk.Treeview(frame, columns=("character", "field", "file"), show="headings", selectmode="browse")
+        results.heading("character", text="Character")
+        results.heading("field", text="Field")
+        results.heading("file", text="File")
+        results.column("character", width=150)
+        results.column("field", width=200)
+        results.column("file", width=200)
+        results.grid(row=1, column=0, columnspan=2, sticky="nsew")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=results.yview)
+        results.configure(yscrollcommand=scrollbar.set)
+        scrollbar.grid(row=1, column=2, sticky="ns")
+
+        result_label = ttk.Label(frame, text="Indexing library...")
+        result_label.grid(row=2, column=0, columnspan=2, sticky="w", pady=(5, 0))
+
+        hits = []
+
+        def run_search(event=None):
+            query = query_entry.get().strip()
+            if not query or str(search_button.cget("state")) == "disabled":
+                return
+            start = time.perf_counter()
+            hits[:] = index.search(query)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            results.delete(*results.get_children())
+            for position, hit in enumerate(hits):
+                field = f"Session {hit.session_date}" if hit.session_date is not None else hit.field
+                results.insert("", "end", iid=str(position),
+                               values=(hit.name or "(unnamed)", field, os.path.basename(hit.path)))
+            result_label.config(text=f"{len(hits)} matches ({elapsed_ms:.1f} ms)")
+            if hits:
+                results.selection_set("0")
+                results.focus("0")
+
+        def open_hit(event=None):
+            selection = results.selection()
+            if selection:
+                hit = hits[int(selection[0])]
+                dialog.destroy()
+                self.go_to_search_hit(hit)
+
+        search_button.config(command=run_search)
+        query_entry.bind("<Return>", run_search)
+        results.bind("<Double-Button-1>", open_hit)
+        results.bind("<Return>", open_hit)
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+
+        # Bring the index up to date with the folder without blocking the window
+        refresh = {"reindexed": None, "error": None}
+
+        def refresh_index():
+            try:
+                refresh["reindexed"] = index.refresh()
+            except Exception as e:  # Reported below on the Tk thread
+                refresh["error"] = e
+
+        worker = threading.Thread(target=refresh_index, name="journal-index", daemon=True)
+        worker.start()
+
+        def wait_for_index():
+            if not dialog.winfo_exists():
+                return
+            if worker.is_alive():
+                dialog.after(LOAD_POLL_MS, wait_for_index)
+                return
+            if refresh["error"] is not None:
+                result_label.config(text=f"Could not index {library_dir}: {refresh['error']}")
+                return
+            search_button.config(state="normal")
+            reindexed = refresh["reindexed"]
+            result_label.config(text=f"Indexed {reindexed} changed journals" if reindexed else "Index up to date")
+            run_search()
+
+        wait_for_index()
+        query_entry.focus_set()
+
+        dialog.update_idletasks()
+        x = self.master.winfo_x() + (self.master.winfo_width() - dialog.winfo_width()) // 2
+        y = self.master.winfo_y() + (self.master.winfo_height() - dialog.winfo_height()) // 2
+        dialog.geometry(f"+{x}+{y}")
+
+    def go_to_search_hit(self, hit):
+        """Opens the journal a search hit is in (unless it is already open) and shows the match."""
+        if self.current_file and os.path.abspath(self.current_file) == os.path.abspath(hit.path):
+            self._when_filled(lambda: self._show_search_hit(hit))
+            return
+        if self._has_unsaved_changes():
+            if not messagebox.askyesno("Unsaved Changes",
+                                       "You have unsaved changes. Open the other journal anyway? "
+                                       "Your changes will be saved first."):
+                return
+            if not self.save_journal():
+                return
+        self.open_journal(hit.path, on_loaded=lambda: self._show_search_hit(hit))
+
+    def _show_search_hit(self, hit):
+        """Selects the tab and field of a search hit and highlights the matching word."""
+        if hit.session_date is not None:
+            self._select_tab("Session Journal")
+            if self.session_view:
+                self.session_view.jump_to(hit.session_date)
+            return
+
+        for tab_name, keys in TABS_CONFIG.items():
+            if hit.field in keys:
+                self._select_tab(tab_name)
+                break
+        widget = self.fields.get(hit.field)
+        if widget is None:
+            return
+        if self._filler is not None:
+            # The tab was just built and its field is still filling in
+            self._when_filled(lambda: self._show_search_hit(hit))
+            return
+
+        offset = hit.offsets[0] if hit.offsets else 0
+        if isinstance(widget, tk.Text):
+            start = f"1.0 + {offset} chars"
+            end = f"{start} + {hit.length} chars"
+            widget.tag_remove("sel", "1.0", "end")
+            widget.tag_add("sel", start, end)
+            widget.mark_set("insert", start)
+            widget.see(start)
+        else:
+            widget.selection_range(offset, offset + hit.length)
+            widget.icursor(offset)
+        widget.focus_set()
+        self.update_status_bar(f"Found in {hit.field}")
+
+    def _select_tab(self, tab_name):
+        """Builds (if needed) and shows one notebook tab."""
+        self._build_tab(tab_name)
+        self.notebook.select(self._tab_frames[tab_name])
+
+    # --- Journal database ---
+    def open_library(self, create=False):
+        """Opens (or creates) a journal database and shows its browser."""
+        if create:
+            path = filedialog.asksaveasfilename(
+                defaultextension=LIBRARY_SUFFIX,
+                filetypes=[("Journal Databases", "*" + LIBRARY_SUFFIX), ("All Files", "*.*")],
+                initialfile="journals" + LIBRARY_SUFFIX,
+                title="New Journal Database"
+            )
+        else:
+            path = filedialog.askopenfilename(
+                defaultextension=LIBRARY_SUFFIX,
+                filetypes=[("Journal Databases", "*" + LIBRARY_SUFFIX), ("All Files", "*.*")],
+                title="Open Journal Database"
+            )
+        if not path:
+            return False
+
+        if self.library is None or self.library.path != os.path.abspath(path):
+            try:
+                library = JournalLibrary(path)
+            except JournalError as e:
+                messagebox.showerror("Open Failed", f"Could not open {os.path.basename(path)}. {e}")
+                return False
+            if self.library and not isinstance(self.document, LibraryDocument):
+                self.library.close()  # The open journal doesn't need the old database any more
+            self.library = library
+        self.show_library_browser()
+        return True
+
+    def show_library_browser(self):
+        """Lists the journals in the open database; filtering and sorting only read the metadata index."""
+        library = self.library
+        dialog = tk.Toplevel(self.master)
+        dialog.title(f"Journal Database - {library.name}")
+        dialog.geometry("650x450")
+        dialog.transient(self.master)
+
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(1, weight=1)
+
+        # Filters: name contains, stage, order
+        filter_frame = ttk.Frame(frame)
+        filter_frame.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        ttk.Label(filter_frame, text="Name:").pack(side=tk.LEFT)
+        name_var = tk.StringVar(dialog)
+        name_entry = ttk.Entry(filter_frame, textvariable=name_var, width=20)
+        name_entry.pack(side=tk.LEFT, padx=(2, 10))
+        ttk.Label(filter_frame, text="Stage:").pack(side=tk.LEFT)
+        stage_var = tk.StringVar(dialog, value="(any)")
+        stage_box = ttk.Combobox(filter_frame, textvariable=stage_var, state="readonly", width=15)
+        stage_box.pack(side=tk.LEFT, padx=(2, 10))
+        ttk.Label(filter_frame, text="Sort by:").pack(side=tk.LEFT)
+        order_var = tk.StringVar(dialog, value="Name")
+        order_box = ttk.Combobox(filter_frame, textvariable=order_var, values=list(SORT_ORDERS),
+                                 state="readonly", width=12)
+        order_box.pack(side=tk.LEFT, padx=2)
+
+        listing = ttk.Treeview(frame, columns=("name", "stage", "updated"), show="headings", selectmode="extended")
+        listing.heading("name", text="Name")
+        listing.heading("stage", text="Stage")
+        listing.heading("updated", text="Last Updated")
+        listing.column("name", width=220)
+        listing.column("stage", width=150)
+        listing.column("updated", width=150)
+        listing.grid(row=1, column=0, sticky="nsew")
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=listing.yview)
+        listing.configure(yscrollcommand=scrollbar.set)
+        scrollbar.grid(row=1, column=1, sticky="ns")
+
+        count_label = ttk.Label(frame, text="")
+        count_label.grid(row=2, column=0, columnspan=2, sticky="w", pady=(5, 0))
+
+        def refresh(*args):
+            stage = stage_var.get()
+            start = time.perf_counter()
+            entries = library.list_journals(name_var.get().strip(), None if stage == "(any)" else stage,
+                                            order_var.get())
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            listing.delete(*listing.get_children())
+            for entry in entries:
+                listing.insert("", "end", iid=str(entry.journal_id),
+                               values=(entry.name or "(unnamed)", entry.stage, entry.last_updated))
+            stage_box.configure(values=["(any)"] + library.stages())
+            count_label.config(text=f"{len(entries)} of {library.count()} journals ({elapsed_ms:.1f} ms)")
+
+        def selected_ids():
+            return [int(iid) for iid in listing.selection()]
+
+        def open_selected(event=None):
+            ids = selected_ids()
+            if ids:
+                dialog.destroy()
+                self.open_library_journal(ids[0])
+
+        def new_journal_entry():
+            dialog.destroy()
+            self.open_library_journal(library.create())
+
+        def import_files():
+            paths = filedialog.askopenfilenames(
+                parent=dialog,
+                filetypes=[("Journals", "*.json *" + COMPRESSED_SUFFIX)] + JOURNAL_FILETYPES,
+                title="Import Journals"
+            )
+            failed = []
+            for path in paths:
+                try:
+                    library.import_json(path)
+                except (JournalError, OSError) as e:
+                    failed.append(f"{os.path.basename(path)}: {e}")
+            refresh()
+            if failed:
+                messagebox.showwarning("Import", "Some files were not imported:\n" + "\n".join(failed[:10]),
+                                       parent=dialog)
+
+        def export_selected():
+            ids = selected_ids()
+            if not ids:
+                return
+            folder = filedialog.askdirectory(parent=dialog, title="Export Journals To")
+            if not folder:
+                return
+            for journal_id in ids:
+                document = JournalDocument(library.load(journal_id))
+                try:
+                    library.export_json(journal_id, os.path.join(folder, document.suggested_filename()))
+                except OSError as e:
+                    messagebox.showerror("Export Failed", f"Could not export {document.name}: {e.strerror or e}",
+                                         parent=dialog)
+                    return
+            self.update_status_bar(f"Exported {len(ids)} journals to {folder}")
+
+        def delete_selected():
+            ids = selected_ids()
+            open_id = self.document.journal_id if isinstance(self.document, LibraryDocument) else None
+            if not ids or open_id in ids:
+                if open_id in ids:
+                    messagebox.showwarning("Delete", "The open journal can't be deleted.", parent=dialog)
+                return
+            if messagebox.askyesno("Delete", f"Delete {len(ids)} journals from {library.name}?", parent=dialog):
+                for journal_id in ids:
+                    library.delete(journal_id)
+                refresh()
+
+        name_var.trace_add("write", refresh)
+        stage_box.bind("<<ComboboxSelected>>", refresh)
+        order_box.bind("<<ComboboxSelected>>", refresh)
+        listing.bind("<Double-Button-1>", open_selected)
+        listing.bind("<Return>", open_selected)
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        ttk.Button(button_frame, text="Import JSON...", command=import_files).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Export JSON...", command=export_selected).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text="Delete", command=delete_selected).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Open", command=open_selected).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="New", command=new_journal_entry).pack(side=tk.RIGHT, padx=(5, 5))
+
+        refresh()
+        name_entry.focus_set()
+
+        dialog.update_idletasks()
+        x = self.master.winfo_x() + (self.master.winfo_width() - dialog.winfo_width()) // 2
+        y = self.master.winfo_y() + (self.master.winfo_height() - dialog.winfo_height()) // 2
+        dialog.geometry(f"+{x}+{y}")
+
+    def open_library_journal(self, journal_id):
+        """Opens one journal from the database; its saves then update only the changed fields."""
+        if self._has_unsaved_changes():
+            if not messagebox.askyesno("Unsaved Changes",
+                                       "You have unsaved changes. Open the other journal anyway? "
+                                       "Your changes will be saved first."):
+                return False
+            if not self.save_journal():
+                return False
+        library = self.library
+        return self.open_journal(library.path, loader=lambda path: library.open_document(journal_id))
+
+    # --- Revision history ---
+    def _history_for(self, document, path):
+        """Returns the HistoryStore of a journal file or database journal."""
+        journal_id = document.journal_id if isinstance(document, LibraryDocument) else None
+        history_dir = history_dir_for(path, journal_id)
+        with self._history_lock:
+            if history_dir not in self._histories:
+                self._histories[history_dir] = HistoryStore(history_dir)
+            return self._histories[history_dir]
+
+    def open_history_dialog(self, event=None):
+        """Lists the saved revisions of the open journal with diffs; any of them can be restored."""
+        if not self.current_file:
+            messagebox.showinfo("History", "Save the journal first; every save after that is kept in its history.")
+            return
+        self._read_fields()
+        if self.tracker.is_modified() or self._snapshot_keys:
+            self._submit_save(reason="save")  # So the newest state is in the list too
+        self._finish_saves()
+        history = self._history_for(self.document, self.current_file)
+        revisions = history.revisions()
+
+        dialog = tk.Toplevel(self.master)
+        dialog.title(f"History - {os.path.basename(self.current_file)}")
+        dialog.geometry("800x500")
+        dialog.transient(self.master)
+
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        panes = ttk.PanedWindow(frame, orient=tk.HORIZONTAL)
+        panes.pack(fill=tk.BOTH, expand=True)
+
+        # Revisions, newest first; select one to compare with the one before it, or two to compare them
+        listing = ttk.Treeview(panes, columns=("rev", "time", "reason", "fields"), show="headings",
+                               selectmode="extended")
+        for column, title, width in (("rev", "#", 40), ("time", "Saved", 130), ("reason", "Kind", 70),
+                                     ("fields", "Changed", 160)):
+            listing.heading(column, text=title)
+            listing.column(column, width=width, stretch=(column == "fields"))
+        for revision in reversed(revisions):
+            changed = ", ".join(sorted(revision.fields)) + (" (removed fields)" if revision.removed else "")
+            listing.insert("", "end", iid=str(revision.number),
+                           values=(revision.number, revision.time, revision.reason, changed))
+        panes.add(listing, weight=1)
+
+        text_bg_color, fg_color = self._text_colors()
+        diff_text = tk.Text(panes, wrap="none", width=60, bg=text_bg_color, fg=fg_color)
+        diff_text.tag_configure("added", foreground="#2E7D32")
+        diff_text.tag_configure("removed", foreground="#C62828")
+        diff_text.tag_configure("heading", font=("TkDefaultFont", 9, "bold"))
+        panes.add(diff_text, weight=2)
+
+        size_label = ttk.Label(frame, text=f"{len(revisions)} revisions, "
+                                           f"{history.size_on_disk() / 1024:.0f} KB of history")
+        size_label.pack(anchor="w", pady=(5, 0))
+
+        def selected_numbers():
+            return sorted(int(iid) for iid in listing.selection())
+
+        def show_diff(event=None):
+            numbers = selected_numbers()
+            if not numbers:
+                return
+            old, new = (numbers[0], numbers[-1]) if len(numbers) > 1 else (numbers[0] - 1, numbers[0])
+            changes = history.diff(old, new)
+            diff_text.configure(state="normal")
+            diff_text.delete("1.0", "end")
+            diff_text.insert("end", f"Revision {old} -> {new}\n\n" if old else f"Revision {new}\n\n", "heading")
+            for key, lines in changes.items():
+                diff_text.insert("end", key + "\n", "heading")
+                for line in lines[2:]:  # Skip the ---/+++ header, the key is shown above
+                    tag = "added" if line.startswith("+") else "removed" if line.startswith("-") else ()
+                    diff_text.insert("end", line + "\n", tag)
+                diff_text.insert("end", "\n")
+            if not changes:
+                diff_text.insert("end", "No differences.")
+            diff_text.configure(state="disabled")
+
+        def restore_selected():
+            numbers = selected_numbers()
+            if len(numbers) != 1:
+                messagebox.showinfo("Restore", "Select one revision to restore.", parent=dialog)
+                return
+            number = numbers[0]
+            if not messagebox.askyesno("Restore", f"Replace the journal with revision {number}? "
+                                       "The current version stays in the history.", parent=dialog):
+                return
+            dialog.destroy()
+            self.restore_revision(history, number)
+
+        listing.bind("<<TreeviewSelect>>", show_diff)
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="Restore This Revision", command=restore_selected).pack(side=tk.RIGHT)
+
+        if revisions:
+            listing.selection_set(str(revisions[-1].number))
+        listing.focus_set()
+
+        dialog.update_idletasks()
+        x = self.master.winfo_x() + (self.master.winfo_width() - dialog.winfo_width()) // 2
+        y = self.master.winfo_y() + (self.master.winfo_height() - dialog.winfo_height()) // 2
+        dialog.geometry(f"+{x}+{y}")
+
+    def restore_revision(self, history, number):
+        """Makes an old revision the current journal and saves it as a new revision."""
+        try:
+            restored = history.load_revision(number)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Restore Failed", f"Could not read revision {number}: {e}")
+            return False
+        self.cancel_load()
+        self.journal.clear()
+        self.journal.update(restored)
+        self._populate_fields()
+        self._snapshot_keys.update(restored)
+        self._read_fields()
+        self._submit_save(reason="restore")
+        self.update_window_title()
+        self.update_status_bar(f"Restored revision {number}")
+        return True
+
+    # --- Diagnostics ---
+    def _on_diagnostics_toggled(self):
+        """Turns timing on or off; nothing is measured while it is off."""
+        diagnostics.enabled = self.diagnostics_enabled.get()
+        if diagnostics.enabled:
+            self.stall_monitor.start()
+        else:
+            self.stall_monitor.stop()
+
+    def open_diagnostics_panel(self):
+        """Shows the recorded timings, refreshed every second while the panel is open."""
+        dialog = tk.Toplevel(self.master)
+        dialog.title("Diagnostics")
+        dialog.geometry("700x500")
+        dialog.transient(self.master)
+
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Checkbutton(frame, text="Record handler, I/O and main-loop stall timings",
+                        variable=self.diagnostics_enabled, command=self._on_diagnostics_toggled).pack(anchor="w")
+
+        ttk.Label(frame, text="Summary (slowest total first):", font=("TkDefaultFont", 9, "bold")).pack(
+            anchor="w", pady=(10, 2))
+        summary = ttk.Treeview(frame, columns=("kind", "name", "count", "mean", "p95", "max"),
+                               show="headings", height=8)
+        for column, title, width in (("kind", "Kind", 70), ("name", "Name", 200), ("count", "Calls", 60),
+                                     ("mean", "Mean ms", 80), ("p95", "95% ms", 80), ("max", "Max ms", 80)):
+            summary.heading(column, text=title)
+            summary.column(column, width=width, anchor="w" if column in ("kind", "name") else "e")
+        summary.pack(fill=tk.BOTH, expand=True)
+
+        ttk.Label(frame, text="Recent events:", font=("TkDefaultFont", 9, "bold")).pack(anchor="w", pady=(10, 2))
+        recent = ttk.Treeview(frame, columns=("when", "kind", "name", "ms", "detail"), show="headings", height=8)
+        for column, title, width in (("when", "Time", 90), ("kind", "Kind", 70), ("name", "Name", 180),
+                                     ("ms", "ms", 70), ("detail", "Detail", 200)):
+            recent.heading(column, text=title)
+            recent.column(column, width=width, anchor="e" if column == "ms" else "w")
+        recent.pack(fill=tk.BOTH, expand=True)
+
+        def refresh():
+            if not dialog.winfo_exists():
+                return
+            summary.delete(*summary.get_children())
+            for category, name, count, mean, p95, longest in diagnostics.summary():
+                summary.insert("", "end", values=(category, name, count, f"{mean * 1000:.2f}",
+                                                  f"{p95 * 1000:.2f}", f"{longest * 1000:.2f}"))
+            recent.delete(*recent.get_children())
+            for event in reversed(diagnostics.events()[-200:]):
+                recent.insert("", "end", values=(time.strftime("%H:%M:%S", time.localtime(event.when)),
+                                                 event.category, event.name, f"{event.duration * 1000:.2f}",
+                                                 event.detail))
+            dialog.after(1000, refresh)
+
+        def save_report():
+            path = filedialog.asksaveasfilename(
+                parent=dialog,
+                defaultextension=".json",
+                filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")],
+                initialfile="journal_diagnostics.json",
+                title="Save Diagnostics"
+            )
+            if not path:
+                return
+            try:
+                diagnostics.dump(path)
+            except OSError as e:
+                messagebox.showerror("Save Failed", f"Could not write {path}: {e.strerror or e}", parent=dialog)
+                return
+            self.update_status_bar(f"Diagnostics saved to {os.path.basename(path)}")
+
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        ttk.Button(button_frame, text="Clear", command=diagnostics.clear).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Close", command=dialog.destroy).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="Save to File...", command=save_report).pack(side=tk.RIGHT)
+        dialog.bind("<Escape>", lambda e: dialog.destroy())
+
+        refresh()
+
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for the process pool in the bundled .exe
+
+    # --measure-startup opens the window, prints the cold-start time and quits
+    measure_startup = sys.argv[1:] == ["--measure-startup"]
+
+    # Any other arguments mean batch mode, no window
+    if len(sys.argv) > 1 and not measure_startup:
+        import journal_cli
+        sys.exit(journal_cli.main(sys.argv[1:]))
+
     root = tk.Tk()
-    app = CultivationJournalApp(root)
+    app = CultivationJournalApp(root, measure_startup=measure_startup)
     root.mainloop()
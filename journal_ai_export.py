@@ -0,0 +1,165 @@
+"""Export of the AI prompt plus the journal, sized for an assistant's context.
+
+The export is the "AI Prompt" followed by the journal laid out like the
+tabs, yielded section by section so it can be written straight to a file
+or the clipboard. The session history (Session Notes and the dated
+sessions) gets whatever the other fields leave of the token budget, but
+at least HISTORY_SHARE of it, and shares that out by recency: recent
+sessions are kept in full where possible, older ones are shortened or
+left out. Other fields are only shortened when they alone would go over
+their part of the budget.
+
+Rendered sections are cached per field and per session entry, and reused
+while the value is unchanged, so exporting again after a small edit only
+re-renders the part that was edited.
+"""
+from journal_document import NUMERIC_FIELDS, TABS_CONFIG, default_journal
+from journal_sessions import SESSIONS_KEY
+
+CHARS_PER_TOKEN = 4  # Rough average for English prose; good enough for a budget
+DEFAULT_TOKEN_BUDGET = 8000
+RECENCY_DECAY = 0.7  # Each older session weighs this much of the next newer one
+MIN_ENTRY_TOKENS = 24  # Sessions that would get less than this are left out
+HISTORY_SHARE = 0.5  # Part of the budget kept for the history when the other fields are long
+HISTORY_FIELD = "Session Notes"
+WORD_BACKOFF_CHARS = 40  # How far back a cut looks for a space before splitting a word
+
+
+def estimate_tokens(text):
+    """Approximate token count of text."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def allocate_budget(sizes, budget, decay=RECENCY_DECAY):
+    """Shares budget tokens among items given newest first; returns the tokens granted to each.
+
+    Each item may take up to a share of what is left in proportion to its
+    recency weight (decay ** age). Items smaller than their share are
+    granted in full and the rest flows to the others, so nothing is cut
+    while the budget could hold it.
+    """
+    weights = [max(decay ** age, 1e-300) for age in range(len(sizes))]  # Kept above 0 for the oldest
+    granted = [0] * len(sizes)
+    remaining = budget
+    total_weight = sum(weights)
+    # Smallest size-to-weight first: whatever fits in full is settled before shares are cut
+    for index in sorted(range(len(sizes)), key=lambda i: sizes[i] / weights[i]):
+        share = remaining * weights[index] / total_weight if total_weight else 0
+        granted[index] = min(sizes[index], int(share))
+        remaining -= granted[index]
+        total_weight -= weights[index]
+    return [tokens if tokens == sizes[index] or tokens >= MIN_ENTRY_TOKENS else 0
+            for index, tokens in enumerate(granted)]
+
+
+def _clip_start(text, tokens):
+    """The beginning of text, cut at a word boundary to about tokens."""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    # Back up to a space only near the cut: text without spaces (CJK, a long URL) is cut where it
+    # is, and never inside the first line, which holds the date or field name
+    header_end = text.find("\n", 0, limit) + 1
+    cut = text.rfind(" ", max(limit - WORD_BACKOFF_CHARS, header_end), limit)
+    return text[:cut if cut > 0 else limit].rstrip() + " [...]\n"
+
+
+def _clip_end(text, tokens):
+    """The end of text (the most recent notes), cut at a line boundary to about tokens."""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    tail = text[len(text) - limit:]
+    newline = tail.find("\n")
+    return "[... earlier notes left out ...]\n" + (tail[newline + 1:] if 0 <= newline < len(tail) - 1 else tail)
+
+
+class AIExporter:
+    """Renders exports for AI assistants, reusing sections whose value hasn't changed."""
+
+    def __init__(self):
+        self._fields = {}  # key -> (value, rendered)
+        self._entries = {}  # (date, text) -> rendered
+        self.rendered = 0  # Sections rendered (not taken from the cache) so far
+
+    def _field(self, key, value, render):
+        cached = self._fields.get(key)
+        if cached is not None and (cached[0] is value or cached[0] == value):
+            return cached[1]
+        text = render(value)
+        self.rendered += 1
+        self._fields[key] = (value, text)
+        return text
+
+    def _entry(self, entry, seen):
+        key = (str(entry.get("date", "")), str(entry.get("text", "")))
+        text = self._entries.get(key)
+        if text is None:
+            text = f"[{key[0]}]\n{key[1].strip()}\n\n"
+            self.rendered += 1
+        seen[key] = text
+        return text
+
+    def _fixed_sections(self, journal):
+        """Prompt, header and every tab field except the history, in order."""
+        prompt = journal.get("AI Prompt") or default_journal["AI Prompt"]
+        yield self._field("AI Prompt", prompt, lambda value: value.strip() + "\n\n")
+        yield "=== Cultivation Journal ===\n"
+        for key in ("Name", "Stage", "Last Updated"):
+            value = journal.get(key, "")
+            if value:
+                yield self._field(key, value, lambda value, key=key: f"{key}: {value}\n")
+        for tab_name, fields_in_tab in TABS_CONFIG.items():
+            fields_in_tab = [key for key in fields_in_tab if key != HISTORY_FIELD]
+            if not fields_in_tab:
+                continue  # The Session Journal tab: it all goes under the history
+            yield f"\n== {tab_name} ==\n"
+            for key in fields_in_tab:
+                value = str(journal.get(key, "")).strip()
+                if key in NUMERIC_FIELDS:
+                    yield f"{key}: {value or '0'}\n"
+                elif value:
+                    yield self._field(key, value, lambda value, key=key: f"{key}:\n{value}\n\n")
+
+    def stream(self, journal, budget=DEFAULT_TOKEN_BUDGET):
+        """Yields the export of journal (a dict) in pieces, within about budget tokens."""
+        # Session history, newest first: the running notes, then dated sessions
+        notes = self._field(HISTORY_FIELD, str(journal.get(HISTORY_FIELD, "")).strip(),
+                            lambda value: f"{HISTORY_FIELD}:\n{value}\n\n" if value else "")
+        entries = [entry for entry in journal.get(SESSIONS_KEY) or [] if isinstance(entry, dict)]
+        seen = {}
+        rendered = [self._entry(entry, seen) for entry in reversed(entries)]
+        self._entries = seen  # Deleted sessions drop out of the cache
+        items = ([notes] if notes else []) + rendered
+        item_tokens = [estimate_tokens(item) for item in items]
+
+        fixed = list(self._fixed_sections(journal))
+        fixed_tokens = [estimate_tokens(section) for section in fixed]
+        fixed_budget = budget - min(sum(item_tokens), int(budget * HISTORY_SHARE))
+        if sum(fixed_tokens) > fixed_budget:
+            # Equal weights: short fields stay whole, the longest ones are shortened alike
+            fixed_tokens = allocate_budget(fixed_tokens, fixed_budget, decay=1.0)
+        used = 0
+        for section, tokens in zip(fixed, fixed_tokens):
+            if tokens:
+                used += tokens
+                yield _clip_start(section, tokens)
+        if not items:
+            return
+
+        header = "\n== Session History ==\n"
+        granted = allocate_budget(item_tokens, budget - used - estimate_tokens(header))
+        yield header
+        if notes:
+            yield _clip_end(notes, granted[0]) if granted[0] else f"[{HISTORY_FIELD} left out]\n\n"
+            granted = granted[1:]
+        kept = [(text, tokens) for text, tokens in zip(rendered, granted) if tokens]
+        omitted = len(rendered) - len(kept)
+        if omitted:
+            yield f"[{omitted} sessions left out to fit the budget]\n\n"
+        for text, tokens in reversed(kept):  # Oldest first, as they happened
+            yield _clip_start(text, tokens)
+
+    def export(self, journal, budget=DEFAULT_TOKEN_BUDGET):
+        """The whole export as one string."""
+        return "".join(self.stream(journal, budget))
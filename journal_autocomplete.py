@@ -0,0 +1,126 @@
+"""Inline completion popup for names typed into the journal's Text fields.
+
+After each keystroke the word being typed, together with up to three
+words before it, is looked up in the entity index (longest match first,
+so "Azure Dr" completes to "Azure Dragon Fist" rather than to any word
+starting with "Dr"). Lookups are trie walks, cheap enough to run
+directly in the key handler. Up/Down pick a suggestion, Tab or Return
+accepts it, Escape closes the list.
+"""
+import re
+import tkinter as tk
+
+MIN_PREFIX = 2  # Characters of the current word before suggestions appear
+MAX_WORDS = 4  # Words before the cursor tried as a multi-word name
+VISIBLE_ROWS = 8
+
+_WORD_RUN = re.compile(r"(?:[\w'’-]+[ \t]+){0,%d}[\w'’-]+$" % (MAX_WORDS - 1))
+_IGNORED_KEYS = {"Up", "Down", "Tab", "Return", "Escape", "Shift_L", "Shift_R", "Control_L", "Control_R",
+                 "Alt_L", "Alt_R", "Left", "Right", "Home", "End", "Prior", "Next", "ISO_Left_Tab"}
+
+
+class AutocompletePopup:
+    """One suggestion list shared by every Text field it is attached to."""
+
+    def __init__(self, master, complete, enabled=lambda: True):
+        self.master = master
+        self.complete = complete  # complete(prefix) -> names, most used first
+        self.enabled = enabled
+        self.widget = None  # Text widget the list is showing for
+        self.prefix = ""  # Typed text the suggestions complete
+        self.window = tk.Toplevel(master)
+        self.window.withdraw()
+        self.window.overrideredirect(True)
+        self.listbox = tk.Listbox(self.window, height=VISIBLE_ROWS, activestyle="dotbox", exportselection=False)
+        self.listbox.pack(fill=tk.BOTH, expand=True)
+        self.listbox.bind("<ButtonRelease-1>", lambda e: self.accept())
+
+    def attach(self, widget):
+        widget.bind("<KeyRelease>", self._on_key_release, add="+")
+        for key, handler in (("<Down>", lambda: self.move(1)), ("<Up>", lambda: self.move(-1)),
+                             ("<Tab>", self.accept), ("<Return>", self.accept), ("<Escape>", self.hide)):
+            widget.bind(key, lambda e, handler=handler: handler() if self.visible else None, add="+")
+        widget.bind("<FocusOut>", lambda e: self.master.after_idle(self._hide_unless_focused), add="+")
+        widget.bind("<Button-1>", lambda e: self.hide(), add="+")
+
+    @property
+    def visible(self):
+        return self.widget is not None
+
+    def _candidates(self, widget):
+        """(prefix, names) for the text before the cursor, trying the most words first."""
+        before = widget.get("insert linestart", "insert")
+        match = _WORD_RUN.search(before)
+        if not match or len(re.search(r"[\w'’-]+$", before).group()) < MIN_PREFIX:
+            return "", []
+        run = match.group()
+        starts = [0] + [m.end() for m in re.finditer(r"[ \t]+", run)]
+        for start in starts:  # Longest run of words first
+            prefix = run[start:]
+            names = self.complete(prefix)
+            if names:
+                return prefix, names
+        return "", []
+
+    def _on_key_release(self, event):
+        if event.keysym in _IGNORED_KEYS:
+            return
+        if not self.enabled():
+            self.hide()
+            return
+        prefix, names = self._candidates(event.widget)
+        if not names:
+            self.hide()
+            return
+        self.show(event.widget, prefix, names)
+
+    def show(self, widget, prefix, names):
+        self.widget = widget
+        self.prefix = prefix
+        self.listbox.delete(0, tk.END)
+        for name in names:
+            self.listbox.insert(tk.END, name)
+        self.listbox.configure(height=min(len(names), VISIBLE_ROWS),
+                               width=max(20, max(len(name) for name in names) + 2))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(0)
+        self.listbox.activate(0)
+        box = widget.bbox("insert")
+        if box:
+            x, y, _, height = box
+            self.window.geometry(f"+{widget.winfo_rootx() + x}+{widget.winfo_rooty() + y + height + 2}")
+        self.window.deiconify()
+        self.window.lift()
+
+    def hide(self):
+        if self.widget is None:
+            return None
+        self.widget = None
+        self.window.withdraw()
+        return "break"
+
+    def _hide_unless_focused(self):
+        if self.master.focus_get() not in (self.widget, self.listbox):  # Clicking a suggestion may focus the list
+            self.hide()
+
+    def move(self, step):
+        current = self.listbox.curselection()
+        index = max(0, min(self.listbox.size() - 1, (current[0] if current else -1) + step))
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(index)
+        self.listbox.activate(index)
+        self.listbox.see(index)
+        return "break"
+
+    def accept(self):
+        """Replaces the typed prefix with the selected name."""
+        widget = self.widget
+        selection = self.listbox.curselection()
+        if widget is None or not selection:
+            return self.hide()
+        name = self.listbox.get(selection[0])
+        widget.delete(f"insert - {len(self.prefix)} chars", "insert")
+        widget.insert("insert", name)
+        self.hide()
+        widget.focus_set()
+        return "break"
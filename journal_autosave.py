@@ -0,0 +1,138 @@
+"""Background writer for journal saves.
+
+The GUI takes a snapshot of the widget contents on the Tk thread and hands
+it to an AutosaveWorker; serializing and writing happen on the worker's
+thread so typing never waits on the disk. Only the newest snapshot is
+kept while one is waiting, so a burst of edits turns into a single write.
+Tk must only be touched from the main thread, so results come back
+through a queue that the GUI polls.
+"""
+import queue
+import threading
+import time
+
+
+class SaveJob:
+    """One snapshot waiting to be written."""
+
+    def __init__(self, document, data, path, incremental=False, reason="autosave", keys=()):
+        self.document = document
+        self.data = data
+        self.path = path
+        self.incremental = incremental
+        self.reason = reason
+        self.keys = set(keys)  # Fields edited since the previous snapshot
+        self.merged = 0  # Earlier snapshots this one replaced
+        self.submitted = time.monotonic()
+
+
+class SaveResult:
+    """What happened to a SaveJob, handed back to the GUI thread."""
+
+    def __init__(self, job, error=None, bytes_written=0, duration=0.0):
+        self.job = job
+        self.error = error
+        self.bytes_written = bytes_written
+        self.duration = duration
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class AutosaveWorker:
+    """Single background thread that writes journal snapshots in order."""
+
+    def __init__(self, on_written=None):
+        self.on_written = on_written  # Called on the worker thread after each successful write
+        self._condition = threading.Condition()
+        self._pending = None
+        self._in_flight = None
+        self._stopping = False
+        self._results = queue.Queue()
+        self.completed = 0
+        self._thread = threading.Thread(target=self._run, name="journal-autosave", daemon=True)
+        self._thread.start()
+
+    # --- Called from the GUI thread ---
+    def submit(self, job):
+        """Queues a snapshot, replacing any snapshot still waiting for its turn."""
+        with self._condition:
+            if self._pending is not None:
+                job.merged = self._pending.merged + 1
+                job.keys |= self._pending.keys
+                if self._pending.reason != "autosave":
+                    job.reason = self._pending.reason  # A manual save stays a manual save
+            self._pending = job
+            self._condition.notify()
+
+    @property
+    def pending(self):
+        return self._pending is not None
+
+    @property
+    def in_flight(self):
+        return self._in_flight is not None
+
+    @property
+    def busy(self):
+        return self._pending is not None or self._in_flight is not None
+
+    def poll(self):
+        """Returns the results that finished since the last poll."""
+        results = []
+        while True:
+            try:
+                results.append(self._results.get_nowait())
+            except queue.Empty:
+                return results
+
+    def flush(self, timeout=None):
+        """Blocks until every submitted snapshot has been written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending is not None or self._in_flight is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def stop(self):
+        """Writes whatever is still queued and stops the thread."""
+        self.flush()
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join()
+
+    # --- Worker thread ---
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._pending is None and not self._stopping:
+                    self._condition.wait()
+                if self._pending is None:
+                    return
+                job = self._pending
+                self._pending = None
+                self._in_flight = job
+
+            start = time.perf_counter()
+            try:
+                written = job.document.save_snapshot(job.data, job.path, incremental=job.incremental)
+                result = SaveResult(job, bytes_written=written, duration=time.perf_counter() - start)
+            except Exception as e:  # Reported to the user by the GUI thread
+                result = SaveResult(job, error=e, duration=time.perf_counter() - start)
+            else:
+                if self.on_written:
+                    try:
+                        self.on_written(job)
+                    except Exception as e:  # Follow-up work must never fail the save itself
+                        print(f"After-save hook failed for {job.path}: {e}")
+
+            with self._condition:
+                self._in_flight = None
+                self.completed += 1
+                self._results.put(result)
+                self._condition.notify_all()
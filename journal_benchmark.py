@@ -0,0 +1,349 @@
+"""Benchmarks for loading, saving and displaying journals of every size.
+
+Generates synthetic journals from default_journal (1 KB up to 100 MB),
+times the document layer on its own and then the real app doing
+load_journal, save_journal, clear_journal, apply_theme and
+create_widgets. Results are written as JSON and can be compared with a
+stored baseline:
+
+    python journal_benchmark.py --output results.json
+    python journal_benchmark.py --sizes 1K,1M --baseline baseline.json
+    python journal_benchmark.py --update-baseline baseline.json
+
+The GUI benchmarks need a display. On Linux without one, an Xvfb virtual
+display is started if Xvfb is installed; otherwise they are skipped.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from journal_document import (
+    TIMESTAMP_FORMAT, JournalDocument, TABS_CONFIG, new_journal, timestamp_now, write_json_atomic
+)
+from journal_settings import SETTINGS_ENV
+
+SIZES = {"1K": 1024, "10K": 10 * 1024, "100K": 100 * 1024, "1M": 1024 ** 2,
+         "10M": 10 * 1024 ** 2, "100M": 100 * 1024 ** 2}
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.10  # Slower than the baseline by more than this is a regression
+GUI_TIMEOUT = 600  # Seconds to wait for a load to finish filling the widgets
+
+WORDS = ("qi meridian dantian foundation core nascent soul tribulation sect elder disciple pill furnace "
+         "sword array talisman spirit stone beast realm breakthrough insight dao heaven earth jade "
+         "lotus cave manual technique secluded cultivation formation flying treasure").split()
+
+
+# --- Synthetic journals ---
+def _paragraphs(rng, length):
+    """Returns about length characters of word salad in short paragraphs."""
+    lines = []
+    produced = 0
+    while produced < length:
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        lines.append(line)
+        produced += len(line) + 1
+    return "\n".join(lines)[:length]
+
+
+def synthetic_journal(size, seed=0):
+    """Builds a journal whose JSON file is roughly size bytes.
+
+    Most of the bulk goes into Session Notes and the dated Sessions, as in
+    a long-running campaign; every other text field gets a little.
+    """
+    rng = random.Random(seed)
+    journal = new_journal()
+    journal["Name"] = f"Benchmark Cultivator {seed}"
+    journal["Stage"] = "Core Formation"
+    journal["Spirit Stones"] = str(rng.randint(0, 100000))
+    journal["Last Updated"] = timestamp_now()
+
+    base = len(json.dumps(journal, indent=4))
+    budget = max(size - base, 0)
+    text_fields = [key for fields in TABS_CONFIG.values() for key in fields
+                   if key not in ("Spirit Stones", "Session Notes")]
+    small = budget // (4 * len(text_fields))
+    for key in text_fields:
+        journal[key] = _paragraphs(rng, small)
+
+    remaining = budget - small * len(text_fields)
+    journal["Session Notes"] = _paragraphs(rng, remaining // 2)
+    if remaining // 2 > 200:
+        # Generate a few hundred distinct entries and repeat them so 100 MB doesn't take minutes
+        entry_length = 2000
+        pool = [_paragraphs(rng, entry_length) for _ in range(min(200, max(1, remaining // 2 // entry_length)))]
+        count = max(1, remaining // 2 // (entry_length + 60))
+        first = datetime(2000, 1, 1)
+        journal["Sessions"] = [{"date": (first + timedelta(hours=6 * i)).strftime(TIMESTAMP_FORMAT),
+                                "text": pool[i % len(pool)]} for i in range(count)]
+    return journal
+
+
+def write_synthetic(directory, label, size):
+    path = os.path.join(directory, f"bench_{label}.json")
+    payload = write_json_atomic(path, synthetic_journal(size))
+    return path, len(payload)
+
+
+# --- Timing ---
+def measure(function, repeat, setup=None):
+    """Runs function repeat times and returns the durations in seconds."""
+    runs = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def result(name, label, size, runs):
+    return {"benchmark": name, "size": label, "bytes": size, "runs": runs,
+            "median": statistics.median(runs), "min": min(runs)}
+
+
+def document_benchmarks(path, label, size, repeat):
+    """Load and save through JournalDocument, no widgets involved."""
+    results = []
+    document = JournalDocument.load(path)
+    results.append(result("document.load", label, size, measure(lambda: JournalDocument.load(path), repeat)))
+    results.append(result("document.save", label, size, measure(document.save, repeat)))
+
+    def edit():
+        document["Goals"] = document["Goals"] + "."
+    results.append(result("document.save_incremental", label, size,
+                          measure(document.save_incremental, repeat, setup=edit)))
+    document.compact()
+    return results
+
+
+# --- GUI ---
+def start_virtual_display():
+    """Starts Xvfb when there is no display on Linux; returns the process or None."""
+    if not sys.platform.startswith("linux") or os.environ.get("DISPLAY"):
+        return None
+    xvfb = shutil.which("Xvfb")
+    if not xvfb:
+        return None
+    for number in range(99, 120):
+        if os.path.exists(f"/tmp/.X{number}-lock"):
+            continue
+        process = subprocess.Popen([xvfb, f":{number}", "-screen", "0", "1280x1024x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{number}") or process.poll() is not None:
+                break
+            time.sleep(0.1)
+        if process.poll() is None:
+            os.environ["DISPLAY"] = f":{number}"
+            return process
+    return None
+
+
+class _Unattended:
+    """Answers the app's dialogs so benchmarks run without a person at the keyboard."""
+
+    def __init__(self, module):
+        self.messagebox = module.messagebox
+        self.saved = {}
+
+    def __enter__(self):
+        def fail(title, message, **kwargs):
+            raise RuntimeError(f"{title}: {message}")
+        replacements = {"askyesno": lambda *a, **k: True, "showinfo": lambda *a, **k: None,
+                        "showwarning": fail, "showerror": fail}
+        for name, replacement in replacements.items():
+            self.saved[name] = getattr(self.messagebox, name)
+            setattr(self.messagebox, name, replacement)
+        return self
+
+    def __exit__(self, *exc):
+        for name, original in self.saved.items():
+            setattr(self.messagebox, name, original)
+
+
+def _pump(root, done, timeout=GUI_TIMEOUT):
+    """Runs the Tk event loop until done() is true."""
+    deadline = time.perf_counter() + timeout
+    while not done():
+        root.update()
+        if time.perf_counter() > deadline:
+            raise RuntimeError("Timed out waiting for the window")
+
+
+def gui_unavailable():
+    """Why no window can be opened (no Tk, no display), or None if one can."""
+    try:
+        import tkinter as tk
+    except ImportError as e:
+        return str(e)
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        return str(e)
+    return None
+
+
+def gui_benchmarks(paths, repeat, results):
+    """Times the app itself, appending to results; paths is [(label, path, size)]."""
+    import tkinter as tk
+    import cultivation_journal
+
+    with _Unattended(cultivation_journal):
+        def create():
+            root = tk.Tk()
+            app = cultivation_journal.CultivationJournalApp(root)
+            root.update()
+            app.autosave.stop()
+            root.destroy()
+        results.append(result("create_widgets", "-", 0, measure(create, repeat)))
+
+        root = tk.Tk()
+        app = cultivation_journal.CultivationJournalApp(root)
+        app.autosave_enabled.set(False)
+        app._build_all_tabs()  # Time filling every field, not just the first tab
+        root.update()
+        try:
+            for label, path, size in paths:
+                def load():
+                    loaded = []
+                    app.open_journal(path, on_loaded=lambda: loaded.append(True))
+                    _pump(root, lambda: loaded)
+                results.append(result("load_journal", label, size, measure(load, repeat)))
+
+                def save():
+                    app.tracker.mark_dirty(app.fields)  # Read every field back, as after a full edit
+                    app.save_journal()
+                    app._finish_saves()
+                results.append(result("save_journal", label, size, measure(save, repeat)))
+
+                themes = list(app.themes)
+                def switch_themes():
+                    for theme_name in themes:
+                        app.apply_theme(theme_name)
+                        root.update_idletasks()
+                runs = [run / len(themes) for run in measure(switch_themes, repeat)]
+                results.append(result("apply_theme", label, size, runs))
+
+                def clear():
+                    app.clear_journal()
+                    root.update_idletasks()
+                results.append(result("clear_journal", label, size,
+                                      measure(clear, repeat, setup=lambda: load())))
+        finally:
+            app.autosave.stop()
+            root.destroy()
+
+
+# --- Reporting ---
+def compare(results, baseline, threshold):
+    """Prints each result next to its baseline; returns the regressions."""
+    previous = {(item["benchmark"], item["size"]): item for item in baseline.get("results", [])}
+    regressions = []
+    print(f"{'benchmark':<28}{'size':>6}{'median':>12}{'baseline':>12}{'change':>9}")
+    for item in results:
+        old = previous.get((item["benchmark"], item["size"]))
+        line = f"{item['benchmark']:<28}{item['size']:>6}{item['median'] * 1000:>10.1f}ms"
+        if old:
+            change = item["median"] / old["median"] - 1 if old["median"] else 0.0
+            line += f"{old['median'] * 1000:>10.1f}ms{change:>+8.0%}"
+            if change > threshold:
+                line += "  SLOWER"
+                regressions.append(item)
+            elif change < -threshold:
+                line += "  faster"
+        print(line)
+    return regressions
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark the journal at sizes from 1 KB to 100 MB.")
+    parser.add_argument("--sizes", default=",".join(SIZES),
+                        help=f"comma-separated sizes to run (default: {','.join(SIZES)})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="runs per benchmark (median is reported)")
+    parser.add_argument("--no-gui", action="store_true", help="only run the benchmarks that need no window")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with results stored earlier")
+    parser.add_argument("--update-baseline", metavar="FILE", help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown reported as a regression (default: 0.10)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    labels = [label.strip().upper() for label in args.sizes.split(",") if label.strip()]
+    unknown = [label for label in labels if label not in SIZES]
+    if unknown:
+        print(f"Unknown sizes: {', '.join(unknown)} (choose from {', '.join(SIZES)})", file=sys.stderr)
+        return 2
+
+    results = []
+    display = None
+    with tempfile.TemporaryDirectory(prefix="journal-bench-") as directory:
+        paths = []
+        for label in labels:
+            start = time.perf_counter()
+            path, size = write_synthetic(directory, label, SIZES[label])
+            print(f"generated {label} journal ({size:,} bytes) in {time.perf_counter() - start:.1f}s")
+            paths.append((label, path, size))
+            results.extend(document_benchmarks(path, label, size, args.repeat))
+
+        if not args.no_gui:
+            display = start_virtual_display()
+            # The app saves its settings on resize and theme changes: keep the user's own file out of it
+            previous_settings = os.environ.get(SETTINGS_ENV)
+            os.environ[SETTINGS_ENV] = os.path.join(directory, "settings.json")
+            try:
+                problem = gui_unavailable()
+                if problem:
+                    print(f"GUI benchmarks skipped: {problem}", file=sys.stderr)
+                else:
+                    gui_benchmarks(paths, args.repeat, results)
+            finally:
+                if previous_settings is None:
+                    del os.environ[SETTINGS_ENV]
+                else:
+                    os.environ[SETTINGS_ENV] = previous_settings
+                if display:
+                    display.terminate()
+
+    report = {
+        "created": timestamp_now(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    baseline = None
+    if args.baseline:
+        try:
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Cannot read baseline {args.baseline}: {e}", file=sys.stderr)
+            return 2
+    regressions = compare(results, baseline or {}, args.threshold)
+
+    for target in (args.output, args.update_baseline):
+        if target:
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+    if regressions:
+        print(f"{len(regressions)} benchmarks slower than the baseline by more than {args.threshold:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""Per-field change tracking for the journal widgets.
+
+Instead of reading every widget to find out whether anything changed,
+each field reports its own edits: Text widgets through Tk's <<Modified>>
+event and Entry/Spinbox widgets through a trace on their variable. A
+field marked dirty is only compared with the hash of its last saved value
+when someone actually asks whether there are unsaved changes, so that
+check costs O(changed fields) rather than O(total text).
+"""
+import tkinter as tk
+
+from journal_document import field_hash
+
+
+class ChangeTracker:
+    """Keeps dirty flags and saved-content hashes for the journal fields."""
+
+    def __init__(self, on_change=None):
+        self.on_change = on_change  # Called with the field key after each edit
+        self._widgets = {}
+        self._saved_hashes = {}
+        self._dirty = set()
+        self._suspended = 0
+        self._held = set()  # Fields still being filled by the app
+
+    # --- Registering widgets ---
+    def watch_text(self, key, widget):
+        """Tracks a tk.Text widget through its <<Modified>> event."""
+        self._widgets[key] = widget
+        widget.edit_modified(False)
+        widget.bind("<<Modified>>", lambda e, k=key: self._on_text_modified(k, e.widget), add="+")
+
+    def watch_variable(self, key, variable, widget=None):
+        """Tracks an Entry/Spinbox through a write trace on its variable."""
+        self._widgets[key] = widget
+        variable.trace_add("write", lambda *args, k=key: self._on_variable_written(k))
+
+    def _on_text_modified(self, key, widget):
+        if not widget.edit_modified():
+            return  # The event caused by clearing the flag below
+        # Clear the flag so the next edit fires <<Modified>> again
+        widget.edit_modified(False)
+        if not self._suspended and key not in self._held:
+            self._mark(key)
+
+    def _on_variable_written(self, key):
+        if not self._suspended and key not in self._held:
+            self._mark(key)
+
+    def _mark(self, key):
+        self._dirty.add(key)
+        if self.on_change:
+            self.on_change(key)
+
+    # --- Programmatic updates ---
+    def suspend(self):
+        """Context manager that ignores edits made by the app itself (loading, clearing)."""
+        return _Suspended(self)
+
+    def reset(self, journal, keys=None):
+        """Treats the given journal values as the saved state of the watched fields.
+
+        Resets every watched field, or only those in keys (e.g. a tab that
+        was just built).
+        """
+        keys = list(set(self._widgets) | self._dirty) if keys is None else keys
+        for key in keys:
+            if key in self._held:
+                continue  # Reset by release() once filled
+            self._dirty.discard(key)
+            self._saved_hashes[key] = field_hash(journal.get(key, ""))
+            widget = self._widgets.get(key)
+            if isinstance(widget, tk.Text):
+                widget.edit_modified(False)
+
+    def touch(self, key):
+        """Flags a value the app changed directly in the journal (no widget behind it)."""
+        self._mark(key)
+
+    def hold(self, key):
+        """Ignores edits to one field while the app fills it over several event-loop turns."""
+        self._held.add(key)
+        self._dirty.discard(key)
+
+    def release(self, key, journal):
+        """Ends hold(): the field now shows journal[key], which counts as saved."""
+        self._held.discard(key)
+        self.reset(journal, [key])
+
+    def release_all(self):
+        """Drops every hold without resetting (the fields are about to be refilled)."""
+        self._held.clear()
+
+    def forget(self, key):
+        """Stops tracking a field (its widget was destroyed)."""
+        self._widgets.pop(key, None)
+        self._dirty.discard(key)
+
+    # --- Queries ---
+    @property
+    def dirty_keys(self):
+        return set(self._dirty)
+
+    def is_modified(self):
+        """Cheap check used for the title marker: has any field been edited?"""
+        return bool(self._dirty)
+
+    def take_dirty(self, read_value):
+        """Returns {key: current value} for the dirty fields and marks them clean.
+
+        read_value(key) reads a field from its widget; only dirty fields are read.
+        """
+        values = {}
+        for key in self._dirty:
+            value = read_value(key)
+            values[key] = value
+            self._saved_hashes[key] = field_hash(value)
+        self._dirty.clear()
+        return values
+
+    def mark_dirty(self, keys):
+        """Flags fields as changed again, e.g. after their save failed."""
+        for key in keys:
+            if key in self._widgets:
+                self._dirty.add(key)
+                self._saved_hashes.pop(key, None)  # Whatever is on disk, it isn't this
+
+    def has_unsaved_changes(self, read_value):
+        """True if any dirty field differs from its last saved content.
+
+        Fields that were edited back to their saved value are cleared.
+        """
+        for key in list(self._dirty):
+            if field_hash(read_value(key)) == self._saved_hashes.get(key):
+                self._dirty.discard(key)
+        return bool(self._dirty)
+
+
+class _Suspended:
+    def __init__(self, tracker):
+        self.tracker = tracker
+
+    def __enter__(self):
+        self.tracker._suspended += 1
+        return self.tracker
+
+    def __exit__(self, *exc):
+        self.tracker._suspended -= 1
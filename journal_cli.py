@@ -0,0 +1,371 @@
+"""Command-line batch processing for directories of journals.
+
+Run through cultivation_journal.py, for example:
+
+    python cultivation_journal.py validate campaigns/
+    python cultivation_journal.py normalize campaigns/ --workers 8
+    python cultivation_journal.py migrate campaigns/ -r
+    python cultivation_journal.py touch campaigns/ --timestamp "2025-01-01 00:00:00"
+    python cultivation_journal.py export campaigns/ --output exported/
+    python cultivation_journal.py ai-export campaigns/ --budget 16000
+    python cultivation_journal.py compress archive/ --output archive/compressed/
+    python cultivation_journal.py list campaigns/
+    python cultivation_journal.py merge original.json mine.json theirs.json -o merged.json
+    python cultivation_journal.py publish campaigns/ --output site/ --format html
+"""
+import argparse
+import fnmatch
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from journal_ai_export import DEFAULT_TOKEN_BUDGET, AIExporter
+from journal_container import COMPRESSED_SUFFIX, detect_format, format_for_path
+from journal_document import JournalDocument, JournalError, TIMESTAMP_FORMAT
+from journal_lazy import read_header
+from journal_merge import merge_journals
+from journal_publish import FORMATS, finish_publish, plan_publish, publish_file
+
+DEFAULT_PATTERN = "*.json,*.cjz"  # Comma-separated
+
+
+def _matches(name, pattern):
+    return any(fnmatch.fnmatch(name, part.strip()) for part in pattern.split(","))
+
+
+def find_journals(paths, pattern=DEFAULT_PATTERN, recursive=False):
+    """Expands files and directories into a sorted list of journal paths."""
+    found = []
+    for path in paths:
+        if os.path.isfile(path):
+            found.append(path)
+            continue
+        if recursive:
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [d for d in dirs if not d.startswith(".")]
+                found.extend(os.path.join(root, f) for f in files if _matches(f, pattern))
+        else:
+            with os.scandir(path) as entries:
+                found.extend(e.path for e in entries if e.is_file() and _matches(e.name, pattern))
+    return sorted(found)
+
+
+# --- Per-file jobs (run inside worker processes, so they must stay top-level) ---
+
+def _list_file(path, options):
+    header = read_header(path)  # Decodes only these fields, however big the journal is
+    return "ok", f"{header['Name'] or '(unnamed)'} | {header['Stage'] or '-'} | {header['Last Updated'] or 'never'}"
+
+
+def _validate_file(path, options):
+    document = JournalDocument.load(path)
+    problems = document.validate()
+    if problems:
+        return "invalid", "; ".join(problems)
+    return "ok", ""
+
+
+def _normalize_file(path, options):
+    document = JournalDocument.load(path)
+    if not document.normalize() and document.migrated_from is None:
+        return "unchanged", ""
+    if not options.get("dry_run"):
+        document.save()
+    return "changed", ""
+
+
+def _migrate_file(path, options):
+    document = JournalDocument.load(path)  # Migrates in memory
+    if document.migrated_from is None:
+        return "unchanged", ""
+    if not options.get("dry_run"):
+        document.save()  # Atomic replace; also folds in the write-ahead log
+    return "migrated", f"from schema {document.migrated_from}"
+
+
+def _touch_file(path, options):
+    document = JournalDocument.load(path)
+    timestamp = document.touch(options.get("timestamp"))
+    if not options.get("dry_run"):
+        document.save()
+    return "changed", timestamp
+
+
+def _export_file(path, options):
+    document = JournalDocument.load(path)
+    output_dir = options.get("output") or os.path.dirname(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target = os.path.join(output_dir, stem + ".txt")
+    if not options.get("dry_run"):
+        with open(target, "w", encoding="utf-8") as f:
+            f.write(document.export_text())
+    return "exported", target
+
+
+def _ai_export_file(path, options):
+    document = JournalDocument.load(path)
+    output_dir = options.get("output") or os.path.dirname(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    target = os.path.join(output_dir, stem + ".ai.txt")
+    if not options.get("dry_run"):
+        with open(target, "w", encoding="utf-8") as f:
+            for piece in AIExporter().stream(document.data, options.get("budget") or DEFAULT_TOKEN_BUDGET):
+                f.write(piece)
+    return "exported", target
+
+
+CONVERSIONS = {"compress": COMPRESSED_SUFFIX, "decompress": ".json"}  # Command -> suffix of the files it writes
+
+
+def _conversion_target(path, options, suffix):
+    output_dir = options.get("output") or os.path.dirname(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(output_dir, stem + suffix)
+
+
+def _convert_file(path, options, suffix):
+    if detect_format(path) == format_for_path(suffix):
+        return "skipped", "already " + ("compressed" if suffix == COMPRESSED_SUFFIX else "plain JSON")
+    document = JournalDocument.load(path)
+    target = _conversion_target(path, options, suffix)
+    if os.path.abspath(target) == os.path.abspath(path):
+        return "unchanged", ""
+    if not options.get("dry_run"):
+        document.save(target)  # The new file's format follows its extension
+        return "converted", f"{target} ({os.path.getsize(target) * 100 // max(os.path.getsize(path), 1)}% of the original)"
+    return "converted", target
+
+
+def _compress_file(path, options):
+    return _convert_file(path, options, CONVERSIONS["compress"])
+
+
+def _decompress_file(path, options):
+    return _convert_file(path, options, CONVERSIONS["decompress"])
+
+
+def conversion_clashes(paths, options, suffix):
+    """Returns {target: inputs} for outputs that several inputs, or one over another input, would write."""
+    inputs = {os.path.abspath(path) for path in paths}
+    writers = {}
+    for path in paths:
+        try:
+            if detect_format(path) == format_for_path(suffix):
+                continue  # Skipped by _convert_file, so it writes nothing
+        except OSError:
+            continue  # Reported by the job itself
+        target = os.path.abspath(_conversion_target(path, options, suffix))
+        if target != os.path.abspath(path):
+            writers.setdefault(target, []).append(path)
+    return {target: sources for target, sources in writers.items() if len(sources) > 1 or target in inputs}
+
+
+COMMANDS = {
+    "list": (_list_file, "Show the name, stage and last update of each journal"),
+    "validate": (_validate_file, "Check journals for missing or malformed fields"),
+    "normalize": (_normalize_file, "Fill in missing fields and tidy values in place"),
+    "migrate": (_migrate_file, "Upgrade journals written by older versions to the current schema"),
+    "touch": (_touch_file, "Set 'Last Updated' on every journal"),
+    "export": (_export_file, "Export journals as plain text"),
+    "ai-export": (_ai_export_file, "Export the AI prompt plus each journal, fitted to a token budget"),
+    "compress": (_compress_file, "Write a compressed .cjz copy of each journal"),
+    "decompress": (_decompress_file, "Write a plain .json copy of each compressed journal"),
+}
+
+
+def run_job(job):
+    """Runs one (command, path, options) job and returns (path, status, message)."""
+    command, path, options = job
+    try:
+        status, message = COMMANDS[command][0](path, options)
+    except JournalError as e:
+        status, message = "error", str(e)
+    except OSError as e:
+        status, message = "error", e.strerror or str(e)
+    except Exception as e:  # One malformed journal must not stop the whole batch
+        status, message = "error", f"{type(e).__name__}: {e}"
+    return path, status, message
+
+
+def map_jobs(function, jobs, workers=None):
+    """Runs function over jobs on a process pool, yielding results in order.
+
+    Small batches are handled in-process since starting the pool costs more
+    than the work itself.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) < 2 * workers:
+        for job in jobs:
+            yield function(job)
+        return
+
+    # Hand each worker a few large chunks so per-task overhead stays small
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(function, jobs, chunksize=chunksize):
+            yield result
+
+
+def run_batch(command, paths, options=None, workers=None):
+    """Runs command over paths, yielding (path, status, message) results."""
+    options = options or {}
+    return map_jobs(run_job, [(command, path, options) for path in paths], workers)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="cultivation_journal",
+        description="Batch tools for Cultivation Journal files. Run without arguments to open the app."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, (_, help_text) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("paths", nargs="+", help="Journal files or directories")
+        sub.add_argument("--pattern", default=DEFAULT_PATTERN, help="Filename pattern inside directories (default: %(default)s)")
+        sub.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+        sub.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes (default: all cores)")
+        sub.add_argument("-q", "--quiet", action="store_true", help="Only print problems and the summary")
+        if name not in ("validate", "list"):
+            sub.add_argument("-n", "--dry-run", action="store_true", help="Report what would change without writing")
+        if name == "touch":
+            sub.add_argument("--timestamp", help=f"Timestamp to set, formatted as {TIMESTAMP_FORMAT.replace('%', '%%')} (default: now)")
+        if name in ("export", "ai-export", "compress", "decompress"):
+            sub.add_argument("-o", "--output", help="Directory for the new files (default: next to each journal)")
+        if name == "ai-export":
+            sub.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET,
+                             help="Approximate token limit of each export (default: %(default)s)")
+
+    merge = subparsers.add_parser("merge", help="Merge two copies of a journal edited from the same original")
+    merge.add_argument("base", help="The original both copies started from")
+    merge.add_argument("mine", help="One edited copy; wins fields both sides changed")
+    merge.add_argument("theirs", help="The other edited copy")
+    merge.add_argument("-o", "--output", help="File for the merged journal (default: overwrite MINE)")
+    merge.add_argument("-n", "--dry-run", action="store_true", help="Report conflicts without writing")
+
+    publish = subparsers.add_parser("publish", help="Render journals as Markdown or HTML pages, skipping unchanged ones")
+    publish.add_argument("paths", nargs="+", help="Journal files or directories")
+    publish.add_argument("-o", "--output", required=True, help="Directory for the pages, index and manifest")
+    publish.add_argument("--format", choices=sorted(FORMATS), default="markdown", help="Page format (default: %(default)s)")
+    publish.add_argument("--force", action="store_true", help="Render every journal, even unchanged ones")
+    publish.add_argument("--pattern", default=DEFAULT_PATTERN, help="Filename pattern inside directories (default: %(default)s)")
+    publish.add_argument("-r", "--recursive", action="store_true", help="Search directories recursively")
+    publish.add_argument("-j", "--workers", type=int, default=None, help="Number of worker processes (default: all cores)")
+    publish.add_argument("-q", "--quiet", action="store_true", help="Only print problems and the summary")
+    publish.add_argument("-n", "--dry-run", action="store_true", help="Report what would be rendered without writing")
+    return parser
+
+
+def merge_command(args):
+    """Runs the merge command; returns 0 if it merged cleanly, 1 on conflicts, 2 on errors."""
+    try:
+        base, mine, theirs = (JournalDocument.load(path).data for path in (args.base, args.mine, args.theirs))
+    except (JournalError, OSError) as e:
+        print(f"Cannot read journal: {e}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    result = merge_journals(base, mine, theirs)
+    elapsed = time.perf_counter() - start
+    for note in result.notes:
+        print(f" conflict  {note}")
+
+    target = args.output or args.mine
+    if not args.dry_run:
+        try:
+            JournalDocument(result.data).save(target)  # Format follows the extension
+        except OSError as e:
+            print(f"Cannot write {target}: {e.strerror or e}", file=sys.stderr)
+            return 2
+    state = "merged cleanly" if result.clean else f"merged with {len(result.conflicts)} conflicting fields"
+    print(f"merge: {state} in {elapsed:.2f}s" + ("" if args.dry_run else f" -> {target}"))
+    return 0 if result.clean else 1
+
+
+def publish_command(args):
+    """Runs the publish command; only journals changed since the last run are rendered."""
+    try:
+        paths = find_journals(args.paths, args.pattern, args.recursive)
+        if not args.dry_run:
+            os.makedirs(args.output, exist_ok=True)
+    except OSError as e:
+        print(f"Cannot read {e.filename}: {e.strerror}", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    jobs, results, manifest = plan_publish(paths, args.output, args.format, args.force, args.dry_run)
+    if not args.quiet:
+        for path, status, _ in results:
+            print(f"{status:>9}  {path}")
+    for path, status, entry in map_jobs(publish_file, jobs, args.workers):
+        results.append((path, status, entry))
+        if status == "error" or not args.quiet:
+            print(f"{status:>9}  {path}" + (f"  ({entry})" if status == "error" else ""))
+    try:
+        removed = finish_publish(args.output, args.format, results, manifest, args.dry_run)
+    except OSError as e:
+        print(f"Cannot write {args.output}: {e.strerror or e}", file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+
+    counts = {}
+    for _, status, _ in results:
+        counts[status] = counts.get(status, 0) + 1
+    if removed:
+        counts["removed"] = removed
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "no journals found"
+    rate = len(paths) / elapsed if elapsed > 0 else 0.0
+    print(f"publish: {len(paths)} files in {elapsed:.2f}s ({rate:.0f} files/s) - {summary}")
+    return 1 if counts.get("error") else 0
+
+
+def main(argv=None):
+    """Entry point for the batch commands; returns a process exit code."""
+    args = build_parser().parse_args(argv)
+    if args.command == "merge":
+        return merge_command(args)
+    if args.command == "publish":
+        return publish_command(args)
+
+    options = {
+        "dry_run": getattr(args, "dry_run", False),
+        "timestamp": getattr(args, "timestamp", None),
+        "output": getattr(args, "output", None),
+        "budget": getattr(args, "budget", None),
+    }
+    if options["timestamp"]:
+        try:
+            time.strptime(options["timestamp"], TIMESTAMP_FORMAT)
+        except ValueError:
+            print(f"Invalid timestamp {options['timestamp']!r}, expected {TIMESTAMP_FORMAT}", file=sys.stderr)
+            return 2
+
+    try:
+        paths = find_journals(args.paths, args.pattern, args.recursive)
+    except OSError as e:
+        print(f"Cannot read {e.filename}: {e.strerror}", file=sys.stderr)
+        return 2
+    if args.command in CONVERSIONS:
+        clashes = conversion_clashes(paths, options, CONVERSIONS[args.command])
+        for target, sources in sorted(clashes.items()):
+            print(f"Refusing to {args.command}: {target} would be written from {', '.join(sources)}"
+                  + (" over an input journal" if len(sources) == 1 else ""), file=sys.stderr)
+        if clashes:
+            return 2
+    if options["output"] and not options["dry_run"]:
+        os.makedirs(options["output"], exist_ok=True)
+
+    start = time.perf_counter()
+    counts = {}
+    for path, status, message in run_batch(args.command, paths, options, args.workers):
+        counts[status] = counts.get(status, 0) + 1
+        if status in ("error", "invalid") or not args.quiet:
+            print(f"{status:>9}  {path}" + (f"  ({message})" if message else ""))
+    elapsed = time.perf_counter() - start
+
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "no journals found"
+    rate = len(paths) / elapsed if elapsed > 0 else 0.0
+    print(f"{args.command}: {len(paths)} files in {elapsed:.2f}s ({rate:.0f} files/s) - {summary}")
+
+    return 1 if counts.get("error") or counts.get("invalid") else 0
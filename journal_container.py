@@ -0,0 +1,156 @@
+"""Compressed journal container (.cjz) for archived campaigns.
+
+Layout:
+
+    magic (8 bytes)  version (u16)  table length (u32)
+    table of contents (JSON, uncompressed)
+    field blobs, each compressed on its own
+
+The table of contents holds the header fields (Name, Stage, Last Updated)
+and the offset, length and encoding of every field blob, so a browser can
+show a journal's header, or a single field, without decompressing the
+rest. Saving recompresses only the fields whose value changed.
+"""
+import json
+import struct
+import zlib
+
+from journal_document import JournalError
+
+MAGIC = b"\x89CJZ\r\n\x1a\n"  # Like PNG's: catches text-mode transfers mangling the file
+VERSION = 1
+COMPRESSED_SUFFIX = ".cjz"
+COMPRESSION_LEVEL = 6
+HEADER_KEYS = ["Name", "Stage", "Last Updated"]
+
+_PREAMBLE = struct.Struct(">8sHI")
+
+TEXT = "s"  # Blob is a UTF-8 string
+JSON = "j"  # Blob is any other JSON value
+
+
+def is_container(raw):
+    """True if raw (the start of a file is enough) is a compressed journal."""
+    return raw[:len(MAGIC)] == MAGIC
+
+
+def detect_format(path):
+    """Returns "compressed" or "json" from the file's magic bytes."""
+    with open(path, "rb") as f:
+        return "compressed" if is_container(f.read(len(MAGIC))) else "json"
+
+
+def format_for_path(path):
+    """Format a new file gets from its extension."""
+    return "compressed" if path.lower().endswith(COMPRESSED_SUFFIX) else "json"
+
+
+def _compress_value(value):
+    if isinstance(value, str):
+        return TEXT, zlib.compress(value.encode("utf-8", "surrogatepass"), COMPRESSION_LEVEL)
+    return JSON, zlib.compress(json.dumps(value).encode("utf-8"), COMPRESSION_LEVEL)
+
+
+def _decompress_value(kind, blob):
+    try:
+        raw = zlib.decompress(blob)
+        return raw.decode("utf-8", "surrogatepass") if kind == TEXT else json.loads(raw)
+    except (zlib.error, ValueError) as e:
+        raise JournalError(f"The compressed journal is damaged ({e}).")
+
+
+def encode_container(data, cache=None):
+    """Returns the container bytes for a journal dict.
+
+    cache ({key: (value, kind, blob)}, updated in place) lets unchanged
+    fields reuse the blob compressed by the previous save.
+    """
+    cache = {} if cache is None else cache
+    fields = []
+    blobs = []
+    offset = 0
+    for key, value in data.items():
+        cached = cache.get(key)
+        if cached is not None and (cached[0] is value or cached[0] == value):
+            kind, blob = cached[1], cached[2]
+        else:
+            kind, blob = _compress_value(value)
+            cache[key] = (value, kind, blob)
+        fields.append([key, offset, len(blob), kind])
+        blobs.append(blob)
+        offset += len(blob)
+    for key in list(cache):
+        if key not in data:
+            del cache[key]
+
+    header = {key: data[key] for key in HEADER_KEYS if key in data}
+    table = json.dumps({"header": header, "fields": fields}, separators=(",", ":")).encode("utf-8")
+    return b"".join([_PREAMBLE.pack(MAGIC, VERSION, len(table)), table] + blobs)
+
+
+def _parse_table(preamble, read):
+    if len(preamble) < _PREAMBLE.size or not is_container(preamble):
+        raise JournalError("The file is not a compressed journal.")
+    _, version, table_length = _PREAMBLE.unpack(preamble[:_PREAMBLE.size])
+    if version > VERSION:
+        raise JournalError("The journal was saved by a newer version of the app.")
+    try:
+        return json.loads(read(table_length)), _PREAMBLE.size + table_length
+    except ValueError:
+        raise JournalError("The compressed journal's table of contents is damaged.")
+
+
+def decode_container(raw, cache=None):
+    """Decodes a whole container held in memory into a journal dict.
+
+    cache, if given, is filled like encode_container's so the next save
+    can reuse the blobs just read.
+    """
+    table, start = _parse_table(raw[:_PREAMBLE.size], lambda n: raw[_PREAMBLE.size:_PREAMBLE.size + n])
+    data = {}
+    for key, offset, length, kind in table["fields"]:
+        blob = raw[start + offset:start + offset + length]
+        data[key] = _decompress_value(kind, blob)
+        if cache is not None:
+            cache[key] = (data[key], kind, blob)
+    return data
+
+
+class ContainerReader:
+    """Reads the header or single fields of a .cjz file without decompressing the rest."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._table, self._start = _parse_table(self._file.read(_PREAMBLE.size), self._file.read)
+        except Exception:
+            self._file.close()
+            raise
+        self._fields = {key: (offset, length, kind) for key, offset, length, kind in self._table["fields"]}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._file.close()
+
+    @property
+    def header(self):
+        """Name, Stage and Last Updated, straight from the table of contents."""
+        return dict(self._table.get("header", {}))
+
+    def keys(self):
+        return list(self._fields)
+
+    def read_field(self, key, default=None):
+        """Decompresses one field."""
+        if key not in self._fields:
+            return default
+        offset, length, kind = self._fields[key]
+        self._file.seek(self._start + offset)
+        return _decompress_value(kind, self._file.read(length))
+
@@ -0,0 +1,141 @@
+"""Opt-in timing of event handlers, file I/O and main-loop stalls.
+
+Handlers are wrapped with @instrumented; while recording is off the
+wrapper only checks one flag before calling through. Recorded events go
+into a fixed-size ring buffer that the Settings > Diagnostics panel shows
+and can save to a file for a bug report.
+"""
+import functools
+import json
+import platform
+import threading
+import time
+from collections import deque
+
+RING_SIZE = 5000  # Events kept; older ones are dropped
+STALL_CHECK_MS = 50  # Heartbeat interval of the stall monitor
+STALL_THRESHOLD_MS = 100  # A heartbeat this late means the main loop was blocked
+
+
+class Event:
+    """One timed occurrence."""
+
+    __slots__ = ("when", "category", "name", "duration", "detail")
+
+    def __init__(self, when, category, name, duration, detail=""):
+        self.when = when  # time.time() at the end of the event
+        self.category = category  # "handler", "io" or "stall"
+        self.name = name
+        self.duration = duration  # Seconds
+        self.detail = detail
+
+    def to_dict(self):
+        return {"when": self.when, "category": self.category, "name": self.name,
+                "ms": round(self.duration * 1000, 3), "detail": self.detail}
+
+
+class Diagnostics:
+    """Ring buffer of timed events; record() may be called from any thread."""
+
+    def __init__(self, size=RING_SIZE):
+        self.enabled = False
+        self._events = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, category, name, duration, detail=""):
+        if not self.enabled:
+            return
+        event = Event(time.time(), category, name, duration, detail)
+        with self._lock:
+            self._events.append(event)
+
+    def events(self):
+        with self._lock:
+            return list(self._events)
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def summary(self):
+        """Returns [(category, name, count, mean, p95, max)] in seconds, slowest total first."""
+        groups = {}
+        for event in self.events():
+            groups.setdefault((event.category, event.name), []).append(event.duration)
+        rows = []
+        for (category, name), durations in groups.items():
+            durations.sort()
+            p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+            rows.append((category, name, len(durations), sum(durations) / len(durations), p95, durations[-1]))
+        rows.sort(key=lambda row: -row[2] * row[3])
+        return rows
+
+    def dump(self, path):
+        """Writes every recorded event plus the summary to a JSON file."""
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "summary": [{"category": category, "name": name, "count": count, "mean_ms": mean * 1000,
+                         "p95_ms": p95 * 1000, "max_ms": longest * 1000}
+                        for category, name, count, mean, p95, longest in self.summary()],
+            "events": [event.to_dict() for event in self.events()],
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+diagnostics = Diagnostics()
+
+
+def instrumented(name=None, category="handler"):
+    """Decorator that records how long each call takes while diagnostics are enabled."""
+    def decorate(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not diagnostics.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                diagnostics.record(category, label, time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+
+class StallMonitor:
+    """Schedules a heartbeat on the Tk loop and records how late it runs.
+
+    A heartbeat that fires long after it was due means some handler or
+    redraw held up the main loop for that long.
+    """
+
+    def __init__(self, master):
+        self.master = master
+        self._after_id = None
+        self._due = None
+
+    @property
+    def running(self):
+        return self._after_id is not None
+
+    def start(self):
+        if self._after_id is None:
+            self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self):
+        self._due = time.perf_counter() + STALL_CHECK_MS / 1000
+        self._after_id = self.master.after(STALL_CHECK_MS, self._beat)
+
+    def _beat(self):
+        late = time.perf_counter() - self._due
+        if late * 1000 >= STALL_THRESHOLD_MS:
+            diagnostics.record("stall", "main loop", late)
+        self._schedule()
@@ -0,0 +1,455 @@
+"""Headless journal model shared by the GUI and the batch command line.
+
+Nothing in here touches tkinter, so journals can be read, checked and
+rewritten without opening a window.
+"""
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from datetime import datetime
+
+from journal_wal import WriteAheadLog, checksum, diff_fields, fsync_directory
+
+JOURNAL_FILE = "journal.json"  # Keep default filename as fallback
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+MAX_SPIRIT_STONES = 1000000
+
+# Basic structure of the journal
+default_journal = {
+    # Header fields
+    "Name": "",
+    "Stage": "",
+
+    # Cultivation tab
+    "Path/Style": "",
+    "Affinity/Element(s)": "",
+    "Notable Breakthroughs": "",
+    "Active Techniques": "",
+    "Passive Techniques": "",
+
+    # Background tab
+    "Origin/Background": "",
+    "Known By": "",
+    "Notable Actions": "",
+
+    # Inventory tab
+    "Spirit Stones": "0",  # The ledger balance once there is a ledger
+    "Spirit Stone Ledger": [],  # Dated gains and spends, see journal_ledger.py
+    "Items/Artifacts": "",
+    "Consumables": "",
+
+    # Quests & Goals tab
+    "Goals": "",
+    "Hints & Rumors": "",
+    "Unfinished Quests": "",
+
+    # Session Journal tab
+    "Session Notes": "",
+    "Sessions": [],  # Dated entries, see journal_sessions.py
+
+    # Bold/italic runs of the text fields, see journal_formatting.py
+    "Formatting": {},
+
+    # AI Prompt (used when sharing with AI assistants)
+    "AI Prompt": """This is my Cultivation Journal for my character in a cultivation-themed roleplaying game.
+
+This journal tracks my character's cultivation journey, including their techniques, breakthroughs, inventory, and goals.
+
+When responding about this journal:
+- Refer to my character by name and respect their current cultivation stage
+- Use terminology and concepts from cultivation novels (qi, meridians, spiritual energy, etc.)
+- Help me brainstorm next steps based on my character's current goals and situation
+- Feel free to suggest potential plot developments or challenges based on the information provided
+- Maintain the tone and setting of a cultivation world
+
+The journal is organized into sections for Cultivation details, Background information, Inventory, and Quests & Goals.""",
+
+    # Metadata (not displayed directly)
+    "Last Updated": ""
+}
+
+# Tab structure and the fields shown on each tab
+TABS_CONFIG = {
+    "Cultivation": ["Path/Style", "Affinity/Element(s)", "Notable Breakthroughs", "Active Techniques", "Passive Techniques"],
+    "Background": ["Origin/Background", "Known By", "Notable Actions"],
+    "Inventory": ["Spirit Stones", "Items/Artifacts", "Consumables"],
+    "Quests & Goals": ["Goals", "Hints & Rumors", "Unfinished Quests"],
+    "Session Journal": ["Session Notes"]
+}
+
+HEADER_FIELDS = ["Name", "Stage"]
+ESSENTIAL_KEYS = ["Name", "Stage"]  # A file without these is not a journal
+NUMERIC_FIELDS = ["Spirit Stones"]
+SCHEMA_VERSION_KEY = "Schema Version"  # See journal_schema.py
+METADATA_FIELDS = ["Last Updated", SCHEMA_VERSION_KEY]
+
+
+_MISSING = object()
+
+
+class JournalError(Exception):
+    """Raised when a file cannot be read as a Cultivation Journal."""
+
+
+def new_journal():
+    """Returns a fresh copy of the default journal, at the current schema version."""
+    from journal_schema import SCHEMA_VERSION
+    journal = default_journal.copy()
+    journal[SCHEMA_VERSION_KEY] = SCHEMA_VERSION
+    journal["Sessions"] = []  # Don't share the default list between journals
+    journal["Spirit Stone Ledger"] = []
+    journal["Formatting"] = {}
+    return journal
+
+
+def timestamp_now():
+    """Returns the current time in the format stored under "Last Updated"."""
+    return datetime.now().strftime(TIMESTAMP_FORMAT)
+
+
+def field_hash(value):
+    """Short content hash of a field value, used to spot which fields changed."""
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True)
+    return hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def read_json(path):
+    """Reads a JSON journal file and returns the decoded object."""
+    with open(path, "rb") as f:
+        return json.loads(f.read())
+
+
+def _file_mode(path):
+    """Permission bits for a rewrite of path: its current ones, or the umask default for a new file."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def write_bytes_atomic(path, payload):
+    """Writes payload to a temp file, fsyncs it and renames it over path.
+
+    A crash at any point leaves either the old file or the new one, never a
+    truncated mix of both.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp makes the file owner-only; keep the permissions of the file being replaced
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    fsync_directory(directory)
+
+
+def write_json_atomic(path, data):
+    """Writes data as indented JSON atomically and returns the bytes written."""
+    payload = json.dumps(data, indent=4).encode("utf-8")
+    write_bytes_atomic(path, payload)
+    return payload
+
+
+class JournalDocument:
+    """A single character journal, independent of any widgets."""
+
+    def __init__(self, data=None, path=None):
+        self.data = new_journal() if data is None else data
+        self.path = path
+        self.replayed_records = 0  # Log records applied on load
+        self.migrated_from = None  # Schema version of the file, if loading upgraded it
+        self.moved_out = {}  # Values the upgrade took out of the journal (see journal_schema.migrate)
+        self.format = "json"  # Or "compressed" (.cjz, see journal_container.py)
+        self._blobs = {}  # Compressed fields of the last .cjz save, reused for unchanged fields
+
+        # State of the file on disk, used by incremental saves
+        self._saved = None
+        self._base_checksum = None
+        self._base_size = 0
+        self._stale_log = False  # Set by read-only loads that found a log for another base file
+
+    @classmethod
+    def load(cls, path, read_only=False):
+        """Loads a journal from disk, raising JournalError if it is not one.
+
+        Both plain JSON and compressed journals are accepted; the format is
+        detected from the file's first bytes. Any incremental saves still in
+        the journal's write-ahead log are replayed on top of the file. With
+        read_only, a stale or torn log is left as it is rather than cleaned up.
+        Data from an older schema is migrated in memory; the file itself is
+        upgraded by the next save.
+        """
+        from journal_container import decode_container, is_container
+        from journal_schema import SCHEMA_VERSION, migrate
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+            compressed = is_container(raw)
+            blobs = {}
+            data = decode_container(raw, blobs) if compressed else json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise JournalError(f"The file is not valid JSON format ({e.msg}, line {e.lineno}).")
+        except UnicodeDecodeError:
+            raise JournalError("The file is not a text file.")
+
+        if not isinstance(data, dict) or not all(key in data for key in ESSENTIAL_KEYS):
+            raise JournalError("The selected file does not appear to be a valid Cultivation Journal.")
+
+        document = cls(data, path)
+        document.format = "compressed" if compressed else "json"
+        document._blobs = blobs
+        document._mark_persisted(raw)
+        wal = WriteAheadLog(path)
+        replayed = wal.replay(data, document._base_checksum, repair=not read_only)
+        if replayed is None:
+            document._stale_log = True
+            if not read_only:
+                wal.discard()  # Written against an older copy of the file
+        else:
+            document.replayed_records = replayed
+        if replayed:
+            document._saved = dict(data)
+        version = migrate(data, document.moved_out)  # After the log, whose records were written against the file as it is
+        if version != SCHEMA_VERSION:
+            document.migrated_from = version
+        return document
+
+    def _mark_persisted(self, raw, data=None):
+        """Records the bytes now on disk as the base for incremental saves."""
+        self._base_checksum = checksum(raw)
+        self._base_size = len(raw)
+        self._saved = dict(self.data if data is None else data)
+
+    # --- Dict-like access ---
+    def __getitem__(self, key):
+        return self.data[key]
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def to_dict(self):
+        """Returns a shallow copy of the journal data."""
+        return dict(self.data)
+
+    @property
+    def name(self):
+        return str(self.data.get("Name", "")).strip()
+
+    def suggested_filename(self):
+        """Returns the default filename based on the character name."""
+        return f"{self.name}_journal.json" if self.name else JOURNAL_FILE
+
+    # --- Checks and clean-up ---
+    def validate(self):
+        """Returns a list of problems found in the journal (empty if it is fine)."""
+        problems = []
+        for key in ESSENTIAL_KEYS:
+            if key not in self.data:
+                problems.append(f"missing required field '{key}'")
+
+        from journal_schema import validate_fields
+        problems.extend(validate_fields(self.data))
+
+        stones = self.data.get("Spirit Stones", "0")
+        if isinstance(stones, str):
+            if not stones.strip().isdigit():
+                problems.append(f"'Spirit Stones' is not a whole number: {stones!r}")
+            elif int(stones) > MAX_SPIRIT_STONES:
+                problems.append(f"'Spirit Stones' exceeds {MAX_SPIRIT_STONES}")
+        ledger = self.data.get("Spirit Stone Ledger")
+        if ledger:
+            from journal_ledger import Ledger, stones_value, validate_ledger
+            if not validate_ledger(ledger) and stones != stones_value(Ledger(ledger).balance):
+                problems.append(f"'Spirit Stones' does not match the ledger balance: {stones!r}")
+
+        timestamp = self.data.get("Last Updated", "")
+        if isinstance(timestamp, str) and timestamp:
+            try:
+                datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+            except ValueError:
+                problems.append(f"'Last Updated' is not a valid timestamp: {timestamp!r}")
+
+        return problems
+
+    def normalize(self):
+        """Fills in missing fields and tidies values the way the GUI would on save.
+
+        Returns True if anything was changed.
+        """
+        before = dict(self.data)
+
+        for key, value in new_journal().items():
+            if key not in self.data:
+                self.data[key] = value
+
+        for key, value in list(self.data.items()):
+            if key in NUMERIC_FIELDS:
+                try:
+                    stones = int(str(value).strip() or 0)
+                except ValueError:
+                    stones = 0
+                self.data[key] = str(min(max(stones, 0), MAX_SPIRIT_STONES))
+            elif key == "Sessions":
+                from journal_sessions import normalize_sessions
+                self.data[key] = normalize_sessions(value)
+            elif key == "Spirit Stone Ledger":
+                from journal_ledger import normalize_ledger
+                self.data[key] = normalize_ledger(value)
+            elif key == "Formatting":
+                from journal_formatting import normalize_formatting
+                self.data[key] = normalize_formatting(value)
+            elif key == "AI Prompt":
+                if not isinstance(value, str) or not value.strip():
+                    self.data[key] = default_journal["AI Prompt"]
+            elif key in default_journal:
+                text = "" if value is None else str(value)
+                self.data[key] = text.strip()
+
+        if self.data["Spirit Stone Ledger"]:
+            from journal_ledger import Ledger, stones_value
+            self.data["Spirit Stones"] = stones_value(Ledger(self.data["Spirit Stone Ledger"]).balance)
+
+        return self.data != before
+
+    def touch(self, timestamp=None):
+        """Sets "Last Updated" to the given timestamp (default: now)."""
+        self.data["Last Updated"] = timestamp or timestamp_now()
+        return self.data["Last Updated"]
+
+    def save(self, path=None):
+        """Writes the whole journal to path (or the path it was loaded from)."""
+        self._write_full(self.data, path or self.path)
+        return self.path
+
+    def save_incremental(self):
+        """Appends only the changes since the last save to the write-ahead log.
+
+        Falls back to a full save when there is no base file yet, and
+        compacts the log into the file once it outgrows it. Returns the
+        number of bytes written.
+        """
+        return self._write_incremental(self.data)
+
+    def save_snapshot(self, data, path=None, incremental=False):
+        """Writes a copy of the journal data taken earlier; returns bytes written.
+
+        Used by the autosave thread, which must not read self.data while
+        the GUI keeps editing it.
+        """
+        path = path or self.path
+        if incremental and path == self.path:
+            return self._write_incremental(data)
+        return self._write_full(data, path)
+
+    def _write_full(self, data, path):
+        if not path:
+            raise JournalError("No file to save to.")
+        from journal_container import encode_container, format_for_path
+        # A journal keeps its format; a new file gets the one its extension asks for
+        file_format = self.format if path == self.path else format_for_path(path)
+        if file_format == "compressed":
+            payload = encode_container(data, self._blobs)
+            write_bytes_atomic(path, payload)
+        else:
+            payload = write_json_atomic(path, data)
+        WriteAheadLog(path).discard()  # Everything in it is now in the file
+        self.format = file_format
+        self.path = path
+        self._mark_persisted(payload, data)
+        return len(payload)
+
+    def _write_incremental(self, data):
+        if not self.path or self._saved is None or not os.path.exists(self.path):
+            return self._write_full(data, self.path)
+
+        record = diff_fields(self._saved, data)
+        if not record:
+            return 0
+
+        wal = WriteAheadLog(self.path)
+        written = wal.append(record, self._base_checksum)
+        self._saved = dict(data)
+        if wal.needs_compaction(self._base_size):
+            return self._write_full(data, self.path)
+        return written
+
+    @property
+    def saved_data(self):
+        """Copy of the values as last saved or loaded (what incremental saves compare against)."""
+        return dict(self._saved or {})
+
+    def fields_changed_in(self, other):
+        """Keys whose value in other (the same file, read again) differs from what this document last saved."""
+        saved = self._saved if self._saved is not None else {}
+        changed = [key for key, value in other._saved.items()
+                   if not (saved.get(key, _MISSING) is value or saved.get(key, _MISSING) == value)]
+        return changed + [key for key in saved if key not in other._saved]
+
+    def rebase(self, other):
+        """Takes other (the same file, read again) as what is now on disk.
+
+        Incremental saves then log their changes against the new file;
+        values in self.data are left alone.
+        """
+        self._saved = dict(other._saved)
+        self._base_checksum = other._base_checksum
+        self._base_size = other._base_size
+        self.format = other.format
+        self._blobs = other._blobs
+        if other._stale_log:
+            WriteAheadLog(self.path).discard()  # Appending to it would tie new records to the old file
+
+    def compact(self):
+        """Folds the write-ahead log back into the journal file."""
+        if self._saved is not None:
+            self._write_full(self._saved, self.path)
+
+    def has_pending_log(self):
+        """True if some saves still live only in the write-ahead log."""
+        return bool(self.path) and WriteAheadLog(self.path).exists()
+
+    # --- Export ---
+    def export_text(self):
+        """Renders the journal as plain text, laid out like the tabs in the GUI."""
+        lines = [f"Name: {self.data.get('Name', '')}", f"Stage: {self.data.get('Stage', '')}"]
+        if self.data.get("Last Updated"):
+            lines.append(f"Last Updated: {self.data['Last Updated']}")
+
+        for tab_name, fields_in_tab in TABS_CONFIG.items():
+            lines.append("")
+            lines.append(f"== {tab_name} ==")
+            for key in fields_in_tab:
+                value = str(self.data.get(key, "")).strip()
+                if key in NUMERIC_FIELDS:
+                    lines.append(f"{key}: {value or '0'}")
+                elif value:
+                    lines.append(f"{key}:")
+                    lines.append(value)
+                    lines.append("")
+            if tab_name == "Session Journal":
+                sessions = self.data.get("Sessions")
+                for entry in sessions if isinstance(sessions, list) else []:
+                    if not isinstance(entry, dict):
+                        continue  # Malformed entry; validate reports it
+                    lines.append(f"[{entry.get('date', '')}]")
+                    lines.append(str(entry.get("text", "")).strip())
+                    lines.append("")
+        return "\n".join(lines).rstrip() + "\n"
@@ -0,0 +1,281 @@
+"""Index of the technique, item and NPC names used in a journal, for autocomplete.
+
+Names come from two kinds of field. List fields (techniques, items,
+"Known By") hold one name per line or comma-separated item. Prose fields
+(Session Notes, backgrounds, goals) contribute runs of capitalized words
+such as "Azure Dragon Fist" or "Sword of Nine Heavens".
+
+Names never span lines, so when a field changes only the lines between
+the first and last changed character are scanned again, and the counts
+are adjusted by the difference. Names are kept in a prefix trie whose
+nodes remember their most used completions; an edit only invalidates
+the nodes along the edited names' paths, so a lookup stays well under a
+millisecond with tens of thousands of names.
+"""
+import os
+import re
+from collections import Counter
+
+from journal_document import TABS_CONFIG, JournalError
+from journal_lazy import LazyJournal
+from journal_sessions import SESSIONS_KEY
+from journal_wal import text_splice
+
+LIST_FIELDS = ["Active Techniques", "Passive Techniques", "Items/Artifacts", "Consumables", "Known By"]
+PROSE_FIELDS = [key for keys in TABS_CONFIG.values() for key in keys
+                if key not in LIST_FIELDS and key != "Spirit Stones"] + [SESSIONS_KEY]
+MAX_NAME_LENGTH = 60
+MAX_COMPLETIONS = 8
+
+_LIST_ITEM = re.compile(r"[^,;\n]+")
+_ITEM_PREFIX = re.compile(r"^[\s\-*•·\d.)]+")
+_ITEM_DETAIL = re.compile(r"\s*(?:[:(\[]|\s[-–—]\s).*$")
+# Two or more capitalized words, allowing "of"/"the" between them; never across a line break
+_PROPER_NAME = re.compile(r"\b[A-Z][\w'’-]+(?:[ \t]+(?:(?:of|the|of the)[ \t]+)?[A-Z][\w'’-]+)+")
+# Capitalized only because they start a sentence: "Then Elder Mo left" names "Elder Mo"
+_SENTENCE_STARTERS = {"The", "A", "An", "I", "We", "He", "She", "They", "It", "My", "Our", "His", "Her",
+                      "Their", "After", "Then", "When", "While", "Today", "Yesterday", "Later", "Now",
+                      "This", "That", "There", "Here", "And", "But", "So", "Also", "In", "At", "On",
+                      "With", "From", "To", "By", "For", "Met", "Found", "Got", "Used", "Went", "Learned",
+                      "Bought", "Sold", "Defeated", "Killed", "Visited", "Saw", "Asked", "Told", "Gave", "Took"}
+
+
+def _clean_item(item):
+    item = _ITEM_DETAIL.sub("", _ITEM_PREFIX.sub("", item)).strip()
+    return item if 2 <= len(item) <= MAX_NAME_LENGTH and item[0].isalpha() else None
+
+
+def extract_names(key, text):
+    """Counter of the names in one field's text."""
+    names = Counter()
+    if key in LIST_FIELDS:
+        for match in _LIST_ITEM.finditer(text):
+            item = _clean_item(match.group())
+            if item:
+                names[item] += 1
+    else:
+        for match in _PROPER_NAME.finditer(text):
+            name = match.group()
+            first, _, rest = name.partition(" ")
+            if first in _SENTENCE_STARTERS and " " in rest.strip():
+                name = rest.strip()  # "The Azure Sect" is known as "Azure Sect"
+            elif first in _SENTENCE_STARTERS:
+                continue
+            if len(name) <= MAX_NAME_LENGTH:
+                names[name] += 1
+    return names
+
+
+def field_text(key, value):
+    """The text names are taken from; session entries are joined one per line."""
+    if key == SESSIONS_KEY:
+        return "\n".join(str(entry.get("text", "")).replace("\n", " ")
+                         for entry in value or [] if isinstance(entry, dict))
+    return value if isinstance(value, str) else ""
+
+
+class _Node:
+    __slots__ = ("label", "children", "names", "best")
+
+    def __init__(self, label):
+        self.label = label  # Characters on the edge from the parent (a compressed chain)
+        self.children = {}  # First character of the child's label -> child
+        self.names = None  # {display form: count} of the names ending here
+        self.best = None  # Cached [(count, name)] of the subtree, most used first; None when stale
+
+
+def _common_length(a, b):
+    length = min(len(a), len(b))
+    for position in range(length):
+        if a[position] != b[position]:
+            return position
+    return length
+
+
+class NameTrie:
+    """Case-insensitive prefix trie (radix tree) of names with use counts.
+
+    Each node caches the most used names below it, so a lookup is a walk
+    down the prefix plus a list slice; changing a name only clears the
+    caches on its own path.
+    """
+
+    def __init__(self):
+        self._root = _Node("")
+        self.size = 0  # Distinct names
+
+    def add(self, name, delta=1):
+        """Adds delta uses of name (a negative delta removes uses)."""
+        key = name.lower()
+        path = [self._root]
+        node = self._root
+        position = 0
+        while position < len(key):
+            child = node.children.get(key[position])
+            if child is None:
+                if delta <= 0:
+                    return
+                child = node.children[key[position]] = _Node(key[position:])
+            if key.startswith(child.label, position):
+                common = len(child.label)  # The usual case: the whole edge matches
+            else:
+                common = _common_length(child.label, key[position:])
+            if common < len(child.label):
+                if delta <= 0:
+                    return
+                # Split the edge where the new name leaves it
+                middle = _Node(child.label[:common])
+                child.label = child.label[common:]
+                middle.children[child.label[0]] = child
+                node.children[key[position]] = child = middle
+            node = child
+            path.append(node)
+            position += common
+        names = node.names or {}
+        count = names.get(name, 0) + delta
+        if count > 0:
+            self.size += name not in names
+            names[name] = count
+        elif name in names:
+            del names[name]
+            self.size -= 1
+        node.names = names or None
+        for node in path:
+            node.best = None
+        # Drop nodes left without names below them
+        for depth in range(len(path) - 1, 0, -1):
+            if path[depth].children or path[depth].names:
+                break
+            del path[depth - 1].children[path[depth].label[0]]
+
+    def _best(self, node):
+        if node.best is None:
+            candidates = [(count, name) for name, count in (node.names or {}).items()]
+            for child in node.children.values():
+                candidates.extend(self._best(child))
+            candidates.sort(key=lambda item: (-item[0], len(item[1]), item[1]))
+            node.best = candidates[:MAX_COMPLETIONS]
+        return node.best
+
+    def warm(self):
+        """Fills every cache now (e.g. on a worker thread, before the trie is shared)."""
+        self._best(self._root)
+        return self
+
+    def top(self, prefix):
+        """[(count, name)] of the most used names starting with prefix (ignoring case)."""
+        key = prefix.lower()
+        node = self._root
+        position = 0
+        while position < len(key):
+            node = node.children.get(key[position])
+            if node is None:
+                return []
+            rest = key[position:position + len(node.label)]
+            if not node.label.startswith(rest):
+                return []
+            position += len(node.label)
+        return self._best(node)
+
+    def complete(self, prefix, limit=MAX_COMPLETIONS):
+        """The most used names starting with prefix, longer than it."""
+        return [name for count, name in self.top(prefix) if len(name) > len(prefix)][:limit]
+
+
+class EntityIndex:
+    """Names from the open journal's fields and, optionally, the rest of the library."""
+
+    def __init__(self):
+        self.trie = NameTrie()  # Names in the open journal, kept current as fields change
+        self.library = None  # NameTrie of the other journals in its folder, built on a worker thread
+        self._fields = {}  # key -> (text, Counter of names)
+        self.library_dir = None
+
+    def _apply(self, old, new):
+        for name in old.keys() | new.keys():
+            delta = new.get(name, 0) - old.get(name, 0)
+            if delta:
+                self.trie.add(name, delta)
+
+    def update_field(self, key, value):
+        """Re-indexes one field; only the lines that changed are scanned."""
+        if key not in LIST_FIELDS and key not in PROSE_FIELDS:
+            return
+        text = field_text(key, value)
+        old_text, old_names = self._fields.get(key, ("", Counter()))
+        if text == old_text:
+            return
+        start, old_end, replacement = text_splice(old_text, text)
+        # Widen the changed span to whole lines on both sides
+        line_start = old_text.rfind("\n", 0, start) + 1
+        old_line_end = old_text.find("\n", old_end)
+        old_line_end = len(old_text) if old_line_end < 0 else old_line_end
+        new_end = start + len(replacement)
+        new_line_end = text.find("\n", new_end)
+        new_line_end = len(text) if new_line_end < 0 else new_line_end
+        delta = extract_names(key, text[line_start:new_line_end])
+        delta.subtract(extract_names(key, old_text[line_start:old_line_end]))
+        for name, change in delta.items():
+            if change:
+                old_names[name] += change
+                if old_names[name] <= 0:
+                    del old_names[name]
+                self.trie.add(name, change)
+        self._fields[key] = (text, old_names)
+
+    def update_fields(self, values):
+        for key, value in values.items():
+            self.update_field(key, value)
+
+    def adopt(self, scanned):
+        """Takes the fields of a newly opened journal from scan_fields(); they replace the previous journal's."""
+        for key in self._fields.keys() | scanned.keys():
+            old = self._fields.pop(key, ("", Counter()))[1]
+            new = scanned.get(key, ("", Counter()))
+            self._apply(old, new[1])
+            self._fields[key] = new
+
+    def set_library(self, trie, library_dir=None):
+        """Replaces the names taken from other journals (None to stop using them)."""
+        self.library = trie
+        self.library_dir = library_dir
+
+    def complete(self, prefix, limit=MAX_COMPLETIONS):
+        """The most used names starting with prefix, counting uses in both tries."""
+        if self.library is None:
+            return self.trie.complete(prefix, limit)
+        counts = Counter()
+        for trie in (self.trie, self.library):
+            for count, name in trie.top(prefix):
+                counts[name] += count
+        ranked = sorted(counts.items(), key=lambda item: (-item[1], len(item[0]), item[0]))
+        return [name for name, count in ranked if len(name) > len(prefix)][:limit]
+
+
+def scan_fields(journal):
+    """{key: (text, names)} for the indexed fields of a journal (safe to run on a worker thread)."""
+    scanned = {}
+    for key in LIST_FIELDS + PROSE_FIELDS:
+        if key in journal:
+            text = field_text(key, journal[key])
+            scanned[key] = (text, extract_names(key, text))
+    return scanned
+
+
+def build_library_trie(library_dir):
+    """NameTrie of the names in every .json journal of a directory (run on a worker thread)."""
+    names = Counter()
+    for entry in os.scandir(library_dir):
+        if not entry.name.endswith(".json") or not entry.is_file():
+            continue
+        try:
+            with LazyJournal(entry.path) as journal:  # Decodes only the fields names come from
+                for key in LIST_FIELDS + PROSE_FIELDS:
+                    if key in journal:
+                        names.update(extract_names(key, field_text(key, journal[key])))
+        except (OSError, ValueError, JournalError):
+            continue  # Not a journal, or being written
+    trie = NameTrie()
+    for name, count in names.items():
+        trie.add(name, count)
+    return trie.warm()  # Read-only from here on, so it can be handed to the Tk thread
@@ -0,0 +1,126 @@
+"""Saving and restoring bold/italic formatting of the Text fields.
+
+Formatting is stored in the journal under "Formatting" as
+{field: {tag: runs}}, where runs is a flat list of
+[gap, length, gap, length, ...]: each gap counts the characters since the
+end of the previous run (or the start of the field). Offsets are in
+characters of the saved (stripped) field value.
+
+Reading uses one tag_ranges call per tag and converts the "line.column"
+indices in Python; restoring adds every run of a tag with a single
+tag_add call, however many runs there are.
+"""
+from bisect import bisect_left
+
+FORMATTING_KEY = "Formatting"
+FORMAT_TAGS = ("bold", "italic")
+
+
+def encode_runs(ranges):
+    """[(start, end), ...] in ascending order -> [gap, length, ...]."""
+    runs = []
+    previous_end = 0
+    for start, end in ranges:
+        if end > start:
+            runs.extend((start - previous_end, end - start))
+            previous_end = end
+    return runs
+
+
+def decode_runs(runs):
+    """[gap, length, ...] -> [(start, end), ...]."""
+    ranges = []
+    position = 0
+    for index in range(0, len(runs) - 1, 2):
+        start = position + runs[index]
+        position = start + runs[index + 1]
+        ranges.append((start, position))
+    return ranges
+
+
+def _line_starts(text):
+    """Offset at which each line of text starts."""
+    starts = [0]
+    position = text.find("\n")
+    while position >= 0:
+        starts.append(position + 1)
+        position = text.find("\n", position + 1)
+    return starts
+
+
+def widget_formatting(widget):
+    """Returns {tag: runs} for a Text widget, relative to its stripped contents."""
+    tag_ranges = {tag: widget.tag_ranges(tag) for tag in FORMAT_TAGS}
+    if not any(tag_ranges.values()):
+        return {}  # Nothing formatted: the text itself needn't be read
+
+    raw = widget.get("1.0", "end-1c")
+    lead = len(raw) - len(raw.lstrip())  # The saved value is stripped
+    length = len(raw.strip())
+    starts = _line_starts(raw)
+
+    def offset(index):
+        line, column = map(int, str(index).split("."))
+        return min(max(starts[line - 1] + column - lead, 0), length)
+
+    formatting = {}
+    for tag, indices in tag_ranges.items():
+        ranges = [(offset(indices[i]), offset(indices[i + 1])) for i in range(0, len(indices) - 1, 2)]
+        runs = encode_runs(ranges)
+        if runs:
+            formatting[tag] = runs
+    return formatting
+
+
+def apply_formatting(widget, text, formatting):
+    """Tags the runs in formatting ({tag: runs}) in a Text widget that shows exactly text."""
+    if not formatting:
+        return
+    newlines = [start - 1 for start in _line_starts(text)[1:]]
+
+    def index(offset):
+        line = bisect_left(newlines, offset)  # Newlines before offset
+        column = offset - (newlines[line - 1] + 1 if line else 0)
+        return f"{line + 1}.{column}"
+
+    for tag, runs in formatting.items():
+        if tag not in FORMAT_TAGS:
+            continue
+        indices = []
+        for start, end in decode_runs(runs):
+            indices.extend((index(min(start, len(text))), index(min(end, len(text)))))
+        if indices:
+            widget.tag_add(tag, *indices)  # One Tcl call for every run of this tag
+
+
+def validate_formatting(value):
+    """Returns a list of problems with a "Formatting" value."""
+    if not isinstance(value, dict):
+        return [f"'{FORMATTING_KEY}' should be a mapping, found {type(value).__name__}"]
+    problems = []
+    for field, tags in value.items():
+        if not isinstance(tags, dict):
+            problems.append(f"formatting of '{field}' should be a mapping")
+            continue
+        for tag, runs in tags.items():
+            if not isinstance(runs, list) or len(runs) % 2 or \
+                    not all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in runs):
+                problems.append(f"'{tag}' formatting of '{field}' is not a list of gap/length pairs")
+    return problems
+
+
+def normalize_formatting(value):
+    """Drops anything in a "Formatting" value that can't be applied."""
+    if not isinstance(value, dict):
+        return {}
+    cleaned = {}
+    for field, tags in value.items():
+        if not isinstance(tags, dict):
+            continue
+        kept = {}
+        for tag, runs in tags.items():
+            if tag in FORMAT_TAGS and isinstance(runs, list) and not validate_formatting({field: {tag: runs}}):
+                kept[tag] = runs
+        if kept:
+            cleaned[field] = kept
+    return cleaned
@@ -0,0 +1,286 @@
+"""Revision history of a journal.
+
+Every save records a revision. Field values are stored once as
+zlib-compressed objects named by a hash of their content, and a revision
+lists only the fields whose object changed, so saving an unchanged field
+costs nothing. A new version of a long text field (Session Notes) is
+stored as a splice against its previous version instead of a full copy,
+with a full copy every MAX_DELTA_CHAIN versions to keep reads short.
+History lives next to the journals:
+
+    .journal_history/<journal file>/revisions.jsonl   one line per revision
+    .journal_history/<journal file>/objects/ab/cdef…  field values
+"""
+import difflib
+import hashlib
+import json
+import os
+import threading
+import zlib
+
+from journal_document import timestamp_now, write_bytes_atomic
+from journal_wal import text_splice
+
+HISTORY_DIR = ".journal_history"
+REVISIONS_FILE = "revisions.jsonl"
+DELTA_MIN_LENGTH = 4096  # Shorter text is always stored whole
+MAX_DELTA_CHAIN = 20  # Deltas in a row before a full copy is stored again
+DIFF_CONTEXT_LINES = 3
+
+FULL = b"F"  # Object holds the JSON-encoded value
+DELTA = b"D"  # Object holds {"base", "depth", "splice"} against another object
+
+
+def history_dir_for(path, journal_id=None):
+    """Where the history of a journal file (or of one journal in a database) is kept."""
+    directory, filename = os.path.split(os.path.abspath(path))
+    if journal_id is not None:
+        filename = f"{filename}-{journal_id}"
+    return os.path.join(directory, HISTORY_DIR, filename)
+
+
+def object_id(value):
+    """Content address of a field value."""
+    encoded = json.dumps(value, sort_keys=True).encode("utf-8", "surrogatepass")
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+def field_diff(old, new, old_label="before", new_label="after"):
+    """Returns a unified diff of two field values as a list of lines.
+
+    Only the lines around the changed region are handed to difflib, so
+    diffing two versions of a huge Session Notes field stays fast.
+    """
+    if not isinstance(old, str):
+        old = json.dumps(old, indent=1) if old is not None else ""
+    if not isinstance(new, str):
+        new = json.dumps(new, indent=1) if new is not None else ""
+    if old == new:
+        return []
+    start, old_end, replacement = text_splice(old, new)
+    new_end = start + len(replacement)
+
+    # Widen the changed region to whole lines plus some context (the text
+    # before start and after the ends is the same in both versions)
+    line_start = old.rfind("\n", 0, start) + 1
+    for _ in range(DIFF_CONTEXT_LINES):
+        if line_start == 0:
+            break
+        line_start = old.rfind("\n", 0, line_start - 1) + 1
+    old_region = old[line_start:_context_end(old, old_end)]
+    new_region = new[line_start:_context_end(new, new_end)]
+    lines = list(difflib.unified_diff(old_region.splitlines(), new_region.splitlines(),
+                                      old_label, new_label, n=DIFF_CONTEXT_LINES, lineterm=""))
+    skipped_lines = old.count("\n", 0, line_start)
+    if skipped_lines and lines:
+        lines.insert(2, f"... {skipped_lines} unchanged lines above")
+    return lines
+
+
+def _context_end(text, position):
+    """End of the DIFF_CONTEXT_LINES lines following the one containing position."""
+    for _ in range(DIFF_CONTEXT_LINES + 1):
+        newline = text.find("\n", position)
+        if newline < 0:
+            return len(text)
+        position = newline + 1
+    return position
+
+
+class Revision:
+    """One entry of the history log."""
+
+    def __init__(self, number, time, reason, fields, removed):
+        self.number = number
+        self.time = time
+        self.reason = reason
+        self.fields = fields  # {key: object id} for the fields this revision changed
+        self.removed = removed
+
+
+class HistoryStore:
+    """The revision history of one journal.
+
+    record() runs on the autosave thread while the history browser reads
+    from the Tk thread, so everything goes through one lock.
+    """
+
+    def __init__(self, history_dir):
+        self.history_dir = history_dir
+        self.objects_dir = os.path.join(history_dir, "objects")
+        self.revisions_path = os.path.join(history_dir, REVISIONS_FILE)
+        self._lock = threading.RLock()
+        self._revisions = None  # Loaded on first use
+        self._current = {}  # {key: object id} as of the newest revision
+        self._values = {}  # {key: value} as of the newest revision, when known
+        self._depths = {}  # {object id: delta chain length} of objects written or read
+        self._torn_at = None  # Offset of a torn last revision line, cut off before the next append
+
+    # --- Objects ---
+    def _object_path(self, oid):
+        return os.path.join(self.objects_dir, oid[:2], oid[2:])
+
+    def _write_object(self, oid, kind, payload):
+        path = self._object_path(oid)
+        if os.path.exists(path):
+            return 0  # Content-addressed: already stored
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        blob = zlib.compress(kind + json.dumps(payload).encode("utf-8", "surrogatepass"))
+        write_bytes_atomic(path, blob)
+        return len(blob)
+
+    def read_object(self, oid):
+        """Returns the value stored under oid, following deltas back to a full copy."""
+        with self._lock:
+            chain = []
+            while True:
+                with open(self._object_path(oid), "rb") as f:
+                    raw = zlib.decompress(f.read())
+                kind, payload = raw[:1], json.loads(raw[1:])
+                if kind == FULL:
+                    value = payload
+                    break
+                chain.append(payload["splice"])
+                oid = payload["base"]
+            for start, old_end, replacement in reversed(chain):
+                value = value[:start] + replacement + value[old_end:]
+            return value
+
+    def _store_value(self, key, value):
+        """Stores a field value (as a delta when it pays off); returns (object id, bytes written)."""
+        oid = object_id(value)
+        if os.path.exists(self._object_path(oid)):
+            return oid, 0
+
+        base_oid = self._current.get(key)
+        if isinstance(value, str) and len(value) >= DELTA_MIN_LENGTH and base_oid:
+            depth = self._depths.get(base_oid)
+            if depth is None:
+                depth = self._object_depth(base_oid)
+            old = self._values.get(key)
+            if old is None:
+                old = self.read_object(base_oid)
+            if isinstance(old, str) and depth < MAX_DELTA_CHAIN:
+                splice = text_splice(old, value)
+                if len(splice[2]) < len(value) // 2:
+                    self._depths[oid] = depth + 1
+                    return oid, self._write_object(oid, DELTA, {"base": base_oid, "depth": depth + 1,
+                                                                 "splice": list(splice)})
+        self._depths[oid] = 0
+        return oid, self._write_object(oid, FULL, value)
+
+    def _object_depth(self, oid):
+        with open(self._object_path(oid), "rb") as f:
+            raw = zlib.decompress(f.read())
+        depth = json.loads(raw[1:])["depth"] if raw[:1] == DELTA else 0
+        self._depths[oid] = depth
+        return depth
+
+    # --- Revisions ---
+    def _load(self):
+        if self._revisions is not None:
+            return
+        self._revisions = []
+        self._current = {}
+        try:
+            with open(self.revisions_path, "rb") as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b""
+        complete = raw.rfind(b"\n") + 1  # Anything after the last newline is a crash mid-append
+        self._torn_at = complete if complete < len(raw) else None
+        for line in raw[:complete].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            revision = Revision(entry["rev"], entry.get("time", ""), entry.get("reason", ""),
+                                entry.get("fields", {}), entry.get("removed", []))
+            self._revisions.append(revision)
+            self._current.update(revision.fields)
+            for key in revision.removed:
+                self._current.pop(key, None)
+
+    def revisions(self):
+        """All revisions, oldest first."""
+        with self._lock:
+            self._load()
+            return list(self._revisions)
+
+    def record(self, data, reason="save"):
+        """Adds a revision for a journal snapshot; returns it, or None if nothing changed."""
+        with self._lock:
+            self._load()
+            fields = {}
+            for key, value in data.items():
+                known = self._values.get(key, self)  # self: no cached value
+                if known is value or (known is not self and known == value):
+                    continue
+                oid, _ = self._store_value(key, value)
+                if self._current.get(key) != oid:
+                    fields[key] = oid
+                self._values[key] = value
+            removed = [key for key in self._current if key not in data]
+            if not fields and not removed:
+                return None
+
+            number = self._revisions[-1].number + 1 if self._revisions else 1
+            revision = Revision(number, data.get("Last Updated") or timestamp_now(), reason, fields, removed)
+            entry = {"rev": number, "time": revision.time, "reason": reason, "fields": fields}
+            if removed:
+                entry["removed"] = removed
+            os.makedirs(self.history_dir, exist_ok=True)
+            with open(self.revisions_path, "ab") as f:
+                if self._torn_at is not None:
+                    f.truncate(self._torn_at)  # Or this entry would be glued onto the torn line
+                    self._torn_at = None
+                f.write(json.dumps(entry, separators=(",", ":")).encode("utf-8") + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._revisions.append(revision)
+            self._current.update(fields)
+            for key in removed:
+                self._current.pop(key, None)
+                self._values.pop(key, None)
+            return revision
+
+    def fields_at(self, number):
+        """{key: object id} of the journal as of revision number."""
+        with self._lock:
+            self._load()
+            fields = {}
+            for revision in self._revisions:
+                if revision.number > number:
+                    break
+                fields.update(revision.fields)
+                for key in revision.removed:
+                    fields.pop(key, None)
+            return fields
+
+    def load_revision(self, number):
+        """The whole journal as it was saved in revision number."""
+        return {key: self.read_object(oid) for key, oid in self.fields_at(number).items()}
+
+    def diff(self, old_number, new_number):
+        """Returns {key: diff lines} for the fields that differ between two revisions.
+
+        old_number 0 means "before the first revision".
+        """
+        old_fields = self.fields_at(old_number) if old_number else {}
+        new_fields = self.fields_at(new_number)
+        changes = {}
+        for key in sorted(set(old_fields) | set(new_fields)):
+            if old_fields.get(key) == new_fields.get(key):
+                continue
+            old = self.read_object(old_fields[key]) if key in old_fields else None
+            new = self.read_object(new_fields[key]) if key in new_fields else None
+            changes[key] = field_diff(old, new, f"{key} (rev {old_number})", f"{key} (rev {new_number})")
+        return changes
+
+    def size_on_disk(self):
+        """Bytes used by the history (objects plus the revision log)."""
+        total = 0
+        for root, _, files in os.walk(self.history_dir):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        return total
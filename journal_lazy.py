@@ -0,0 +1,198 @@
+"""Read-only, on-demand access to large journal files.
+
+LazyJournal memory-maps a .json journal and scans it once for the byte
+span of each top-level field, skipping over string contents with
+C-level find() calls instead of decoding them. A field is decoded only
+when it is asked for, so listing the Name and Stage of a 100 MB journal
+costs about as much memory as the index. Compressed .cjz journals are
+served through their own table of contents.
+
+Edits still in the journal's write-ahead log are applied to the fields
+they touch, so what you read matches what the app would load.
+"""
+import json
+import mmap
+import re
+
+from journal_container import HEADER_KEYS, ContainerReader, is_container
+from journal_document import ESSENTIAL_KEYS, JournalError
+from journal_wal import WriteAheadLog, checksum
+
+_WHITESPACE = re.compile(rb"\s*")
+_STRUCTURE = re.compile(rb'["\[\]{}]')  # Characters that matter when skipping a nested value
+_SCALAR_END = re.compile(rb"[,}\]\s]")
+
+
+def _skip_whitespace(buf, position):
+    return _WHITESPACE.match(buf, position).end()
+
+
+def _string_end(buf, start):
+    """Index just past the string starting at start (which holds the opening quote)."""
+    position = start + 1
+    while True:
+        quote = buf.find(b'"', position)
+        if quote < 0:
+            raise JournalError("The file ends in the middle of a text value.")
+        backslashes = 0
+        while buf[quote - 1 - backslashes] == 0x5C:  # An odd number of backslashes escapes the quote
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return quote + 1
+        position = quote + 1
+
+
+def _value_end(buf, start):
+    """Index just past the JSON value starting at start, without decoding it."""
+    first = buf[start:start + 1]
+    if first == b'"':
+        return _string_end(buf, start)
+    if first in (b"{", b"["):
+        depth = 0
+        position = start
+        while True:
+            match = _STRUCTURE.search(buf, position)
+            if match is None:
+                raise JournalError("The file ends in the middle of a list or object.")
+            char = match.group()
+            if char == b'"':
+                position = _string_end(buf, match.start())
+                continue
+            depth += 1 if char in (b"{", b"[") else -1
+            position = match.end()
+            if depth == 0:
+                return position
+    match = _SCALAR_END.search(buf, start)  # Number, true, false or null
+    return match.start() if match else len(buf)
+
+
+def index_fields(buf):
+    """Returns {key: (start, end)} byte spans of the top-level fields of a JSON object."""
+    position = _skip_whitespace(buf, 0)
+    if buf[position:position + 1] != b"{":
+        raise JournalError("The selected file does not appear to be a valid Cultivation Journal.")
+    position = _skip_whitespace(buf, position + 1)
+    index = {}
+    if buf[position:position + 1] == b"}":
+        return index
+    while True:
+        if buf[position:position + 1] != b'"':
+            raise JournalError(f"The file is not valid JSON format (expected a field name at byte {position}).")
+        key_end = _string_end(buf, position)
+        key = json.loads(buf[position:key_end])
+        position = _skip_whitespace(buf, key_end)
+        if buf[position:position + 1] != b":":
+            raise JournalError(f"The file is not valid JSON format (expected ':' at byte {position}).")
+        start = _skip_whitespace(buf, position + 1)
+        end = _value_end(buf, start)
+        index[key] = (start, end)
+        position = _skip_whitespace(buf, end)
+        separator = buf[position:position + 1]
+        if separator == b"}":
+            return index
+        if separator != b",":
+            raise JournalError(f"The file is not valid JSON format (expected ',' at byte {position}).")
+        position = _skip_whitespace(buf, position + 1)
+
+
+class LazyJournal:
+    """A journal file whose fields are decoded one at a time, on request.
+
+    Use it as a context manager (or call close()) so the mapping is
+    released before the file is saved over.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self._container = None
+        self._overlay = {}  # Fields changed by the write-ahead log, already decoded
+        self._removed = set()
+        try:
+            if is_container(self._file.read(16)):
+                self._container = ContainerReader(path)
+                self._index = dict.fromkeys(self._container.keys())
+            else:
+                try:
+                    self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:  # Empty file
+                    raise JournalError("The selected file is empty.")
+                self._index = index_fields(self._map)
+            if not all(key in self._index for key in ESSENTIAL_KEYS):
+                raise JournalError("The selected file does not appear to be a valid Cultivation Journal.")
+            self._apply_log()
+        except Exception:
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._container:
+            self._container.close()
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def _apply_log(self):
+        """Decodes the fields touched by pending write-ahead log records and replays them."""
+        wal = WriteAheadLog(self.path)
+        touched = wal.touched_keys()
+        if not touched:
+            return
+        self._file.seek(0)
+        base = self._map if self._map is not None else self._file.read()
+        overlay = {key: self._decode(key) for key in touched if key in self._index}
+        if wal.replay(overlay, checksum(base), repair=False) is None:
+            return  # Written against another copy of the file; the loader will discard it
+        self._removed = {key for key in touched if key not in overlay}
+        self._overlay = overlay
+
+    def _decode(self, key):
+        if self._container:
+            return self._container.read_field(key)
+        start, end = self._index[key]
+        try:
+            return json.loads(self._map[start:end])
+        except ValueError as e:
+            raise JournalError(f"Field '{key}' is not valid JSON ({e}).")
+
+    # --- Mapping-style access ---
+    def keys(self):
+        return [key for key in self._index if key not in self._removed] + \
+               [key for key in self._overlay if key not in self._index]
+
+    def __contains__(self, key):
+        return key in self._overlay or (key in self._index and key not in self._removed)
+
+    def __getitem__(self, key):
+        if key in self._overlay:
+            return self._overlay[key]
+        if key not in self._index or key in self._removed:
+            raise KeyError(key)
+        return self._decode(key)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def field_size(self, key):
+        """Size of a field on disk in bytes, without decoding it (None for compressed files)."""
+        span = self._index.get(key)
+        return span[1] - span[0] if span else None
+
+    @property
+    def header(self):
+        """Name, Stage and Last Updated."""
+        return {key: self.get(key, "") for key in HEADER_KEYS}
+
+
+def read_header(path):
+    """Name/Stage/Last Updated of a journal in either format, reading as little as possible."""
+    with LazyJournal(path) as journal:
+        return journal.header
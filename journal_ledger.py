@@ -0,0 +1,222 @@
+"""Spirit Stone ledger: dated gains and spends behind the Spirit Stones count.
+
+Transactions are stored in the journal under "Spirit Stone Ledger" as a
+list of {"date": "YYYY-MM-DD HH:MM:SS", "amount": 120, "reason": "..."}
+dicts kept in date order; spends have negative amounts. Once a journal
+has a ledger, its "Spirit Stones" value is the ledger balance.
+
+In memory the amounts live in two Fenwick trees (gains and spends, kept
+apart so range totals can report both), so the balance on any date and
+the totals over any date range cost O(log n) however long the campaign.
+Adding a transaction at the end, the usual case, updates the trees in
+O(log n), though the entries list is still copied (see Ledger); back-
+dating one also rebuilds the trees in O(n).
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from journal_document import MAX_SPIRIT_STONES, TIMESTAMP_FORMAT, timestamp_now
+from journal_sessions import parse_date
+
+LEDGER_KEY = "Spirit Stone Ledger"
+OPENING_REASON = "Opening balance"
+ADJUSTMENT_REASON = "Adjusted by hand"
+
+
+class FenwickTree:
+    """Prefix sums over a growing array of whole numbers (a binary indexed tree)."""
+
+    def __init__(self, values=()):
+        tree = array("q", [0])
+        tree.extend(values)
+        size = len(tree) - 1
+        for index in range(1, size + 1):  # O(n) build: push each node into its parent
+            parent = index + (index & -index)
+            if parent <= size:
+                tree[parent] += tree[index]
+        self._tree = tree
+
+    def __len__(self):
+        return len(self._tree) - 1
+
+    def prefix(self, count):
+        """Sum of the first count values."""
+        tree = self._tree
+        total = 0
+        while count > 0:
+            total += tree[count]
+            count &= count - 1
+        return total
+
+    def range_sum(self, low, high):
+        """Sum of values[low:high]."""
+        return self.prefix(high) - self.prefix(low)
+
+    def add(self, position, delta):
+        """Adds delta to values[position]."""
+        tree = self._tree
+        index = position + 1
+        while index < len(tree):
+            tree[index] += delta
+            index += index & -index
+
+    def append(self, value):
+        """Adds a value at the end in O(log n)."""
+        index = len(self._tree)
+        # The new node covers (index - lowbit, index]: its own value plus the older nodes in that span
+        self._tree.append(value + self.range_sum(index - (index & -index), index - 1))
+
+    def pop(self):
+        """Drops the last value (no other node includes it)."""
+        self._tree.pop()
+
+
+def make_transaction(amount, reason="", date=None):
+    """Builds one ledger entry; negative amounts are spends."""
+    amount = int(amount)
+    if abs(amount) > MAX_SPIRIT_STONES:
+        raise ValueError(f"A transaction can move at most {MAX_SPIRIT_STONES:,} stones.")
+    return {"date": date or timestamp_now(), "amount": amount, "reason": reason}
+
+
+def _date(entry):
+    date = entry.get("date", "") if isinstance(entry, dict) else ""
+    return date if isinstance(date, str) else ""
+
+
+def _valid_amount(amount):
+    return isinstance(amount, int) and not isinstance(amount, bool) and abs(amount) <= MAX_SPIRIT_STONES
+
+
+def entry_amount(entry):
+    """The entry's amount; a malformed or out-of-range one (see validate_ledger) counts as 0."""
+    amount = entry.get("amount", 0) if isinstance(entry, dict) else 0
+    return amount if _valid_amount(amount) else 0
+
+
+def stones_value(balance):
+    """The "Spirit Stones" field for a balance, clamped the way the Spinbox allows."""
+    return str(min(max(balance, 0), MAX_SPIRIT_STONES))
+
+
+class Ledger:
+    """Sorted transactions with a bisect index over their dates and running totals.
+
+    Like SessionLog, changes build a new entries list rather than
+    modifying it in place, so a snapshot handed to the autosave thread
+    stays consistent; that copy makes add() and remove() O(n) overall,
+    while lookups stay O(log n).
+    """
+
+    def __init__(self, entries=None):
+        entries = list(entries or [])
+        dates = [_date(entry) for entry in entries]
+        if any(dates[i] > dates[i + 1] for i in range(len(dates) - 1)):
+            entries.sort(key=_date)
+            dates.sort()
+        self.entries = entries
+        self._dates = dates
+        self._gains, self._spends = self._trees(entries)
+
+    @staticmethod
+    def _trees(entries):
+        amounts = [entry_amount(entry) for entry in entries]
+        return FenwickTree(max(amount, 0) for amount in amounts), FenwickTree(max(-amount, 0) for amount in amounts)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    # --- Lookups ---
+    @property
+    def balance(self):
+        return self._gains.prefix(len(self)) - self._spends.prefix(len(self))
+
+    def balance_after(self, index):
+        """Running balance once transaction index is counted."""
+        return self._gains.prefix(index + 1) - self._spends.prefix(index + 1)
+
+    def balance_at(self, date):
+        """Balance after every transaction dated on or before date."""
+        count = bisect_right(self._dates, date)
+        return self._gains.prefix(count) - self._spends.prefix(count)
+
+    def range_indices(self, start=None, end=None):
+        """(first, last + 1) indices of the transactions with start <= date <= end."""
+        low = bisect_left(self._dates, start) if start else 0
+        high = bisect_right(self._dates, end) if end else len(self._dates)
+        return low, max(low, high)
+
+    def totals(self, start=None, end=None):
+        """(gained, spent) by the transactions dated within [start, end]; spent is positive."""
+        low, high = self.range_indices(start, end)
+        return self._gains.range_sum(low, high), self._spends.range_sum(low, high)
+
+    # --- Changes ---
+    def add(self, amount, reason="", date=None):
+        """Records a transaction in date order and returns its index."""
+        entry = make_transaction(amount, reason, date)
+        index = bisect_right(self._dates, entry["date"])
+        entries = self.entries[:index] + [entry] + self.entries[index:]
+        if index == len(self.entries):
+            self._gains.append(max(entry["amount"], 0))
+            self._spends.append(max(-entry["amount"], 0))
+        else:
+            self._gains, self._spends = self._trees(entries)  # Back-dated: every later prefix moves
+        self.entries = entries  # Only once the totals took the amount, so the two never disagree
+        self._dates.insert(index, entry["date"])
+        return index
+
+    def remove(self, index):
+        """Deletes one transaction."""
+        entries = self.entries[:index] + self.entries[index + 1:]
+        if index == len(self.entries) - 1:
+            self._gains.pop()
+            self._spends.pop()
+        else:
+            self._gains, self._spends = self._trees(entries)
+        self.entries = entries
+        del self._dates[index]
+
+
+def validate_ledger(entries):
+    """Returns a list of problems with a "Spirit Stone Ledger" value."""
+    if not isinstance(entries, list):
+        return [f"'{LEDGER_KEY}' should be a list, found {type(entries).__name__}"]
+    problems = []
+    for position, entry in enumerate(entries):
+        amount = entry.get("amount") if isinstance(entry, dict) else None
+        if not isinstance(amount, int) or isinstance(amount, bool) or not isinstance(entry.get("reason", ""), str):
+            problems.append(f"transaction {position + 1} is not a {{date, amount, reason}} entry")
+            continue
+        if not _valid_amount(amount):
+            problems.append(f"transaction {position + 1} moves more than {MAX_SPIRIT_STONES:,} stones")
+        try:
+            datetime.strptime(entry.get("date", ""), TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            problems.append(f"transaction {position + 1} has an invalid date: {entry.get('date')!r}")
+    return problems
+
+
+def normalize_ledger(entries):
+    """Returns the entries as a clean, date-sorted list of transactions."""
+    if not isinstance(entries, list):
+        return []
+    cleaned = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            amount = int(str(entry.get("amount", "")).strip())
+        except ValueError:
+            continue  # A transaction without an amount means nothing
+        amount = min(max(amount, -MAX_SPIRIT_STONES), MAX_SPIRIT_STONES)
+        try:
+            date = parse_date(str(entry.get("date")))
+        except ValueError:
+            date = None
+        cleaned.append(make_transaction(amount, str(entry.get("reason") or "").strip(), date))
+    return Ledger(cleaned).entries
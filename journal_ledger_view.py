@@ -0,0 +1,228 @@
+"""Window for the Spirit Stone ledger.
+
+Like the session log, only WINDOW_ROWS transactions are in the list at a
+time and the scrollbar works in transaction numbers, so a ledger with
+tens of thousands of entries opens instantly. The running balance of
+each row and the totals of the selected date range come from the
+ledger's prefix sums rather than from adding up the rows.
+"""
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from journal_document import MAX_SPIRIT_STONES, timestamp_now
+from journal_ledger import OPENING_REASON, entry_amount
+from journal_sessions import parse_date
+
+WINDOW_ROWS = 20  # Transactions listed at a time
+
+
+class LedgerDialog:
+    """The Spirit Stones > Ledger... window."""
+
+    def __init__(self, master, get_ledger, on_change, get_stones):
+        self.get_ledger = get_ledger  # Returns the Ledger of the open journal
+        self.on_change = on_change  # Called after a transaction was added or deleted
+        self.get_stones = get_stones  # Current Spirit Stones count, before there is a ledger
+        self.low = 0  # Range being shown (indices into the ledger)
+        self.high = None  # None: up to the last transaction
+        self.top = 0  # First transaction listed
+        self.start = self.end = None  # Dates of the range, for the totals
+
+        self.window = tk.Toplevel(master)
+        self.window.title("Spirit Stone Ledger")
+        self.window.geometry("700x520")
+        self.window.transient(master)
+
+        frame = ttk.Frame(self.window, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(0, weight=1)
+        frame.rowconfigure(2, weight=1)
+
+        # Date range and totals
+        toolbar = ttk.Frame(frame)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew")
+        ttk.Label(toolbar, text="From:").pack(side=tk.LEFT)
+        self.from_entry = ttk.Entry(toolbar, width=12)
+        self.from_entry.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Label(toolbar, text="To:").pack(side=tk.LEFT)
+        self.to_entry = ttk.Entry(toolbar, width=12)
+        self.to_entry.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Button(toolbar, text="Show", command=self.show_range).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="All", command=self.show_all).pack(side=tk.LEFT, padx=2)
+        self.from_entry.bind("<Return>", lambda e: self.show_range())
+        self.to_entry.bind("<Return>", lambda e: self.show_range())
+        self.totals_label = ttk.Label(frame, text="")
+        self.totals_label.grid(row=1, column=0, columnspan=2, sticky="w", pady=5)
+
+        columns = ("date", "amount", "balance", "reason")
+        self.tree = ttk.Treeview(frame, columns=columns, show="headings", height=WINDOW_ROWS,
+                                 selectmode="browse")
+        for column, title, width in zip(columns, ("Date", "Amount", "Balance", "Reason"), (140, 80, 80, 320)):
+            self.tree.heading(column, text=title)
+            self.tree.column(column, width=width, anchor="e" if column in ("amount", "balance") else "w",
+                             stretch=column == "reason")
+        self.tree.grid(row=2, column=0, sticky="nsew")
+        self.scrollbar = ttk.Scrollbar(frame, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=2, column=1, sticky="ns")
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-1))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(1))
+        self.tree.bind("<Delete>", lambda e: self.delete_selected())
+
+        # New transaction
+        form = ttk.LabelFrame(frame, text="New Transaction", padding="5")
+        form.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        self.kind = tk.StringVar(self.window, value="gain")
+        ttk.Radiobutton(form, text="Gain", variable=self.kind, value="gain").grid(row=0, column=0)
+        ttk.Radiobutton(form, text="Spend", variable=self.kind, value="spend").grid(row=0, column=1, padx=(0, 10))
+        ttk.Label(form, text="Amount:").grid(row=0, column=2)
+        self.amount_entry = ttk.Entry(form, width=10)
+        self.amount_entry.grid(row=0, column=3, padx=(2, 10))
+        ttk.Label(form, text="Date:").grid(row=0, column=4)
+        self.date_entry = ttk.Entry(form, width=19)
+        self.date_entry.grid(row=0, column=5, padx=(2, 10))
+        ttk.Label(form, text="Reason:").grid(row=1, column=0, columnspan=2, sticky="w", pady=(5, 0))
+        self.reason_entry = ttk.Entry(form)
+        self.reason_entry.grid(row=1, column=2, columnspan=4, sticky="ew", padx=(0, 10), pady=(5, 0))
+        ttk.Button(form, text="Record", command=self.record).grid(row=0, column=6, rowspan=2, sticky="ns")
+        form.columnconfigure(5, weight=1)
+        self.amount_entry.bind("<Return>", lambda e: self.record())
+        self.reason_entry.bind("<Return>", lambda e: self.record())
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=4, column=0, columnspan=2, sticky="ew", pady=(10, 0))
+        ttk.Button(buttons, text="Delete Selected", command=self.delete_selected).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Close", command=self.window.destroy).pack(side=tk.RIGHT)
+
+        self.date_entry.insert(0, timestamp_now())
+        self.amount_entry.focus_set()
+        self.refresh()
+
+    def exists(self):
+        return bool(self.window.winfo_exists())
+
+    # --- Rendering ---
+    def _bounds(self):
+        ledger = self.get_ledger()
+        high = len(ledger) if self.high is None else min(self.high, len(ledger))
+        return ledger, min(self.low, high), high
+
+    def refresh(self, keep_position=False):
+        """Redraws the list (call after the journal changed)."""
+        if not keep_position:
+            self.low, self.high, self.start, self.end = 0, None, None, None
+            self.top = max(0, len(self.get_ledger()) - WINDOW_ROWS)  # Newest transactions in view
+        self.render()
+
+    def render(self):
+        ledger, low, high = self._bounds()
+        self.top = max(low, min(self.top, high - WINDOW_ROWS))
+        bottom = min(high, self.top + WINDOW_ROWS)
+
+        self.tree.delete(*self.tree.get_children())
+        for index in range(self.top, bottom):
+            entry = ledger[index]
+            self.tree.insert("", "end", iid=str(index), values=(
+                entry.get("date", ""), f"{entry_amount(entry):+,}",
+                f"{ledger.balance_after(index):,}", entry.get("reason", "")))
+
+        total = high - low
+        if total:
+            self.scrollbar.set((self.top - low) / total, (bottom - low) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        gained, spent = ledger.totals(self.start, self.end)
+        summary = f"Balance: {ledger.balance:,}"
+        if self.start or self.end:
+            summary += f"    In range: +{gained:,} / -{spent:,}"
+            if self.end:
+                summary += f"    Balance at {self.end[:10]}: {ledger.balance_at(self.end):,}"
+        else:
+            summary += f"    Gained: {gained:,}    Spent: {spent:,}"
+        self.totals_label.config(text=f"{summary}    ({total:,} transactions)")
+
+    # --- Navigation ---
+    def scroll(self, rows):
+        self.top += rows
+        self.render()
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command: positions are fractions of the transaction range, not pixels."""
+        ledger, low, high = self._bounds()
+        if action == "moveto":
+            self.top = low + int(float(amount) * (high - low))
+        elif action == "scroll":
+            step = WINDOW_ROWS - 1 if unit == "pages" else 1
+            self.top += int(amount) * step
+        self.render()
+
+    def show_range(self):
+        """Limits the list and the totals to the From/To dates (either may be blank)."""
+        try:
+            start = parse_date(self.from_entry.get()) if self.from_entry.get().strip() else None
+            end = parse_date(self.to_entry.get(), end_of_period=True) if self.to_entry.get().strip() else None
+        except ValueError as e:
+            messagebox.showwarning("Invalid Date", str(e), parent=self.window)
+            return
+        self.start, self.end = start, end
+        self.low, high = self.get_ledger().range_indices(start, end)
+        self.high = high if end else None
+        self.top = self.low
+        self.render()
+
+    def show_all(self):
+        self.from_entry.delete(0, tk.END)
+        self.to_entry.delete(0, tk.END)
+        self.refresh()
+
+    # --- Editing ---
+    def record(self):
+        """Adds the transaction in the form to the ledger."""
+        try:
+            amount = int(self.amount_entry.get().strip().replace(",", ""))
+            if not 0 < amount <= MAX_SPIRIT_STONES:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("Invalid Amount",
+                                   f"Enter the number of stones as a whole number from 1 to {MAX_SPIRIT_STONES:,}.",
+                                   parent=self.window)
+            return
+        try:
+            date = parse_date(self.date_entry.get())
+        except ValueError as e:
+            messagebox.showwarning("Invalid Date", str(e), parent=self.window)
+            return
+        ledger = self.get_ledger()
+        if self.kind.get() == "spend":
+            amount = -amount
+            if ledger.balance_at(date) + amount < 0 and not messagebox.askyesno(
+                    "Not Enough Stones", "This spend takes the balance below zero. Record it anyway?",
+                    parent=self.window):
+                return
+        if not len(ledger):
+            opening = self.get_stones()
+            if opening:
+                ledger.add(opening, OPENING_REASON, date)  # The count so far becomes the first entry
+        index = ledger.add(amount, self.reason_entry.get().strip(), date)
+        self.on_change(ledger)
+        self.amount_entry.delete(0, tk.END)
+        self.reason_entry.delete(0, tk.END)
+        self.date_entry.delete(0, tk.END)
+        self.date_entry.insert(0, timestamp_now())
+        self.top = index
+        self.render()
+
+    def delete_selected(self):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        index = int(selection[0])
+        entry = self.get_ledger()[index]
+        if messagebox.askyesno("Delete Transaction",
+                               f"Delete {entry_amount(entry):+,} ({entry.get('reason') or 'no reason'})?",
+                               parent=self.window):
+            ledger = self.get_ledger()
+            ledger.remove(index)
+            self.on_change(ledger)
+            self.render()
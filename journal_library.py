@@ -0,0 +1,240 @@
+"""Many journals in one SQLite database.
+
+Every field of every journal is its own row in the fields table, so a save
+rewrites only the fields that changed. The journals table keeps Name, Stage
+and "Last Updated" in indexed columns, which lets the library browser list,
+filter and sort thousands of characters without reading a single field body.
+Journals can be imported from and exported to the usual .json files.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from journal_document import JournalDocument, JournalError, new_journal, write_json_atomic
+from journal_schema import SCHEMA_VERSION, migrate
+
+LIBRARY_SUFFIX = ".db"
+LIBRARY_SCHEMA_VERSION = 1  # Layout of the database tables (PRAGMA user_version), not of the journals
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS journals (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    stage TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    last_updated TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS journals_by_name ON journals (name);
+CREATE INDEX IF NOT EXISTS journals_by_stage ON journals (stage, name);
+CREATE INDEX IF NOT EXISTS journals_by_updated ON journals (last_updated);
+
+CREATE TABLE IF NOT EXISTS fields (
+    journal_id INTEGER NOT NULL REFERENCES journals (id) ON DELETE CASCADE,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    is_json INTEGER NOT NULL DEFAULT 0,  -- 1: value is JSON (numbers, the Sessions list)
+    PRIMARY KEY (journal_id, key)
+) WITHOUT ROWID;
+"""
+
+# Journal keys mirrored into indexed columns of the journals table
+METADATA_COLUMNS = {"Name": "name", "Stage": "stage", "Last Updated": "last_updated"}
+
+# Orderings offered by the library browser
+SORT_ORDERS = {
+    "Name": "name, id",
+    "Stage": "stage, name, id",
+    "Last Updated": "last_updated DESC, id",
+}
+
+
+def _encode(value):
+    """Returns (stored text, is_json) for one field value."""
+    if isinstance(value, str):
+        return value, 0
+    return json.dumps(value), 1
+
+
+def _decode(text, is_json):
+    return json.loads(text) if is_json else text
+
+
+class LibraryEntry:
+    """One row of the library listing: a journal's metadata, without its fields."""
+
+    def __init__(self, journal_id, name, stage, last_updated):
+        self.journal_id = journal_id
+        self.name = name
+        self.stage = stage
+        self.last_updated = last_updated
+
+
+class JournalLibrary:
+    """A SQLite database of journals.
+
+    One connection is shared by the Tk thread and the autosave thread; a
+    lock keeps their statements from interleaving.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._lock = threading.RLock()
+        try:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA foreign_keys = ON")
+            self._conn.execute("PRAGMA journal_mode = WAL")  # Readers don't wait on a save
+            self._conn.execute("PRAGMA synchronous = NORMAL")
+            with self._conn:
+                self._conn.executescript(SCHEMA)
+                version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+                if version > LIBRARY_SCHEMA_VERSION:
+                    raise JournalError("The library was created by a newer version of the journal.")
+                self._conn.execute(f"PRAGMA user_version = {LIBRARY_SCHEMA_VERSION}")
+        except sqlite3.DatabaseError as e:
+            raise JournalError(f"The file is not a journal library ({e}).")
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    # --- Listing (metadata only) ---
+    def list_journals(self, text="", stage=None, order="Name", limit=None):
+        """Returns LibraryEntry rows whose name contains text, optionally of one stage."""
+        query = "SELECT id, name, stage, last_updated FROM journals WHERE 1"
+        params = []
+        if text:
+            query += " AND name LIKE ? ESCAPE '\\'"
+            escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            params.append(f"%{escaped}%")
+        if stage:
+            query += " AND stage = ?"
+            params.append(stage)
+        query += " ORDER BY " + SORT_ORDERS.get(order, SORT_ORDERS["Name"])
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [LibraryEntry(*row) for row in rows]
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM journals").fetchone()[0]
+
+    def stages(self):
+        """Distinct cultivation stages in the library (read from the stage index)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT stage FROM journals WHERE stage != '' ORDER BY stage").fetchall()
+        return [row[0] for row in rows]
+
+    # --- Whole journals ---
+    def create(self, data=None):
+        """Adds a journal (a new blank one if data is None) and returns its id."""
+        data = new_journal() if data is None else data
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT INTO journals (name, stage, last_updated) VALUES (?, ?, ?)",
+                                        self._metadata(data))
+            journal_id = cursor.lastrowid
+            self._conn.executemany("INSERT INTO fields (journal_id, key, value, is_json) VALUES (?, ?, ?, ?)",
+                                   [(journal_id, key) + _encode(value) for key, value in data.items()])
+        return journal_id
+
+    def load(self, journal_id):
+        """Returns the data dict of one journal."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value, is_json FROM fields WHERE journal_id = ?",
+                                      (journal_id,)).fetchall()
+        if not rows:
+            raise JournalError(f"Journal {journal_id} is not in {self.name}.")
+        return {key: _decode(value, is_json) for key, value, is_json in rows}
+
+    def delete(self, journal_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM journals WHERE id = ?", (journal_id,))
+
+    def open_document(self, journal_id):
+        """Loads a journal as a LibraryDocument, ready for per-field saves.
+
+        Data from an older schema is migrated; the changed fields are written by the next save.
+        """
+        document = LibraryDocument(self, journal_id, self.load(journal_id))
+        version = migrate(document.data, document.moved_out)
+        if version != SCHEMA_VERSION:
+            document.migrated_from = version
+        return document
+
+    # --- Per-field updates ---
+    def write_fields(self, journal_id, changed, removed=()):
+        """Replaces the given fields (and deletes removed ones) in one transaction.
+
+        Returns the number of characters of field text written.
+        """
+        rows = [(journal_id, key) + _encode(value) for key, value in changed.items()]
+        metadata = {column: changed[key] for key, column in METADATA_COLUMNS.items() if key in changed}
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO fields (journal_id, key, value, is_json) "
+                                   "VALUES (?, ?, ?, ?)", rows)
+            if removed:
+                self._conn.executemany("DELETE FROM fields WHERE journal_id = ? AND key = ?",
+                                       [(journal_id, key) for key in removed])
+            if metadata:
+                assignments = ", ".join(f"{column} = ?" for column in metadata)
+                self._conn.execute(f"UPDATE journals SET {assignments} WHERE id = ?",
+                                   [str(value) for value in metadata.values()] + [journal_id])
+        return sum(len(row[2]) for row in rows)
+
+    @staticmethod
+    def _metadata(data):
+        return tuple(str(data.get(key, "")) for key in METADATA_COLUMNS)
+
+    # --- JSON import/export ---
+    def import_json(self, path):
+        """Copies a .json journal (including any unsaved write-ahead log) into the library."""
+        return self.create(JournalDocument.load(path).data)
+
+    def export_json(self, journal_id, path):
+        """Writes one journal out as a .json file, at the current schema; returns the bytes written."""
+        data = self.load(journal_id)
+        migrate(data)
+        return len(write_json_atomic(path, data))
+
+
+class LibraryDocument(JournalDocument):
+    """A journal that lives in a JournalLibrary instead of its own file.
+
+    path is the library file. Saves compare each field with what was last
+    written and update only the rows that differ, so there is no
+    write-ahead log to replay or compact.
+    """
+
+    def __init__(self, library, journal_id, data):
+        super().__init__(data, library.path)
+        self.library = library
+        self.journal_id = journal_id
+        self._saved = dict(data)
+
+    def save(self, path=None):
+        self.save_snapshot(self.data)
+        return self.path
+
+    def save_snapshot(self, data, path=None, incremental=False):
+        if path and os.path.abspath(path) != self.library.path:
+            raise JournalError("Library journals can only be saved to their library; export them instead.")
+        changed = {key: value for key, value in data.items()
+                   if key not in self._saved or self._saved[key] != value}
+        removed = [key for key in self._saved if key not in data]
+        if not changed and not removed:
+            return 0
+        written = self.library.write_fields(self.journal_id, changed, removed)
+        self._saved = dict(data)
+        return written
+
+    def compact(self):
+        pass  # Nothing is ever left in a log
+
+    def has_pending_log(self):
+        return False
@@ -0,0 +1,122 @@
+"""Non-blocking journal loading for the GUI.
+
+BackgroundLoad reads and parses a file on a worker thread. ChunkedFiller
+then feeds large values into Text widgets a bounded chunk at a time from
+the Tk event loop, so the window keeps repainting and handling input
+while a multi-megabyte Session Notes field streams in.
+"""
+import threading
+import time
+
+from journal_document import JournalDocument
+
+CHUNK_CHARS = 32 * 1024  # Characters inserted per Tcl call
+FRAME_BUDGET_MS = 12  # Time spent inserting before yielding back to the event loop
+SYNC_FILL_CHARS = CHUNK_CHARS  # Values up to this size are inserted in one go
+
+
+class BackgroundLoad:
+    """Loads a journal on a worker thread; poll done from the Tk thread."""
+
+    def __init__(self, path, loader=JournalDocument.load):
+        self.path = path
+        self.document = None
+        self.error = None
+        self.cancelled = False
+        self.duration = 0.0  # Seconds spent reading and parsing
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, args=(loader,), name="journal-load", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self, loader):
+        start = time.perf_counter()
+        try:
+            self.document = loader(self.path)
+        except Exception as e:  # Reported by the GUI thread
+            self.error = e
+        finally:
+            self.duration = time.perf_counter() - start
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def cancel(self):
+        """Marks the load as unwanted; the parse still finishes but is ignored."""
+        self.cancelled = True
+
+
+class ChunkedFiller:
+    """Inserts text into Text widgets in bounded chunks via after()."""
+
+    def __init__(self, master, on_progress=None, on_complete=None):
+        self.master = master
+        self.on_progress = on_progress  # Called with (inserted_chars, total_chars)
+        self.on_complete = on_complete  # Called once everything queued is inserted
+        self._queue = []  # [widget, text, position, on_done]
+        self._total = 0
+        self._inserted = 0
+        self._after_id = None
+
+    @property
+    def running(self):
+        return bool(self._queue)
+
+    def add(self, widget, text, on_done=None):
+        """Queues text to be appended to widget, which stays read-only until it is all in."""
+        widget.configure(state="disabled")
+        self._queue.append([widget, text, 0, on_done])
+        self._total += len(text)
+        if self._after_id is None:
+            self._after_id = self.master.after(1, self._step)
+
+    def _step(self):
+        self._after_id = None
+        deadline = time.perf_counter() + FRAME_BUDGET_MS / 1000
+        while self._queue and time.perf_counter() < deadline:
+            item = self._queue[0]
+            widget, text, position, on_done = item
+            chunk = text[position:position + CHUNK_CHARS]
+            try:
+                widget.configure(state="normal")
+                widget.insert("end-1c", chunk)
+                widget.configure(state="disabled")
+            except Exception:
+                # Widget destroyed while loading: drop it
+                chunk = text[position:]
+            item[2] = position + len(chunk)
+            self._inserted += len(chunk)
+            if item[2] >= len(text):
+                self._queue.pop(0)
+                self._finish_widget(widget, on_done)
+
+        if self.on_progress:
+            self.on_progress(self._inserted, self._total)
+        if self._queue:
+            self._after_id = self.master.after(1, self._step)
+        elif self.on_complete:
+            self.on_complete()
+
+    def _finish_widget(self, widget, on_done):
+        try:
+            widget.configure(state="normal")
+        except Exception:
+            return
+        if on_done:
+            on_done(widget)
+
+    def cancel(self):
+        """Stops inserting; widgets already queued are left partly filled but editable."""
+        if self._after_id is not None:
+            self.master.after_cancel(self._after_id)
+            self._after_id = None
+        for widget, _, _, _ in self._queue:
+            try:
+                widget.configure(state="normal")
+            except Exception:
+                pass
+        self._queue = []
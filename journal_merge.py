@@ -0,0 +1,345 @@
+"""Three-way merge of two journals edited from a common original.
+
+Fields are merged one at a time against the base (the version both
+sides started from). Short fields (Name, Stage, Spirit Stones, anything
+unknown) are atomic: a side that changed the field wins, and if both
+changed it differently the field is a conflict. Long text fields are
+merged line by line, so two players adding to different parts of the
+Session Notes both keep their lines; overlapping edits are left in the
+text between conflict markers. Session entries and Spirit Stone ledger
+transactions are merged the same way, one entry per "line"; with a
+ledger, Spirit Stones is then its merged balance rather than a conflict.
+
+The line diff trims the common head and tail with slice compares, then
+anchors on lines that occur exactly once on both sides (patience diff),
+so the usual "someone added a few lines" case stays linear however
+large the notes are.
+"""
+import json
+from bisect import bisect_left
+from collections import Counter
+from itertools import compress, count, repeat
+from operator import and_, not_
+
+from journal_document import METADATA_FIELDS, NUMERIC_FIELDS, TABS_CONFIG
+from journal_formatting import FORMATTING_KEY
+from journal_ledger import LEDGER_KEY, Ledger, stones_value
+from journal_sessions import SESSIONS_KEY, entry_date
+from journal_wal import text_splice
+
+# Fields merged line by line; everything else (except Sessions and Formatting) is atomic
+LINE_MERGED_FIELDS = [key for fields in TABS_CONFIG.values() for key in fields
+                      if key not in NUMERIC_FIELDS] + ["AI Prompt"]
+
+MINE_MARKER = "<<<<<<< this copy\n"
+SEPARATOR_MARKER = "=======\n"
+THEIRS_MARKER = ">>>>>>> other copy\n"
+
+CHUNK_LINES = 32  # Average lines per chunk when diffing long texts (a power of two)
+CHUNKED_DIFF_LINES = 4096  # Texts with fewer lines (both sides together) are diffed line by line directly
+
+_MISSING = object()
+
+
+# --- Line diff ---
+
+def _unique_anchors(a, b):
+    """Pairs (i, j) with a[i] == b[j] for lines unique on both sides, longest in-order run."""
+    a_counts, b_counts = Counter(a), Counter(b)  # Counted in C
+    positions = dict(zip(b, range(len(b))))
+    candidates = [(i, positions[line]) for i, line in enumerate(a)
+                  if a_counts[line] == 1 and b_counts[line] == 1]
+    if all(candidates[k][1] < candidates[k + 1][1] for k in range(len(candidates) - 1)):
+        return candidates  # Already in order, the usual case
+
+    # Longest increasing subsequence of the b positions (patience sorting)
+    tails = []  # b position ending the best run of each length
+    tail_index = []
+    previous = []
+    for index, (_, j) in enumerate(candidates):
+        length = bisect_left(tails, j)
+        if length == len(tails):
+            tails.append(j)
+            tail_index.append(index)
+        else:
+            tails[length] = j
+            tail_index[length] = index
+        previous.append(tail_index[length - 1] if length else -1)
+    anchors = []
+    index = tail_index[-1] if tail_index else -1
+    while index >= 0:
+        anchors.append(candidates[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _chunks(lines):
+    """Groups lines into chunks cut after lines whose hash is a multiple of CHUNK_LINES.
+
+    The cuts depend only on line contents, so an edit changes the chunks
+    around it and no others, however many lines it inserts. Returns the
+    chunks (as strings) and the line index at which each one starts, plus
+    len(lines).
+    """
+    # hash(line) & (CHUNK_LINES - 1) == 0, evaluated in C without a Python-level loop
+    is_cut = map(not_, map(and_, map(hash, lines), repeat(CHUNK_LINES - 1)))
+    starts = [0] + list(compress(count(1), is_cut))
+    if starts[-1] != len(lines):
+        starts.append(len(lines))
+    return ["".join(lines[starts[k]:starts[k + 1]]) for k in range(len(starts) - 1)], starts
+
+
+def diff_lines(a, b):
+    """Returns hunks [(start, end, replacement)] turning list a of lines into list b.
+
+    Each hunk replaces a[start:end] with the list replacement; hunks are in
+    order and never touch. Long texts are first compared a chunk of lines
+    at a time, and only the chunks that differ are diffed line by line.
+    """
+    # Only the stretch between the common head and tail needs diffing
+    offset, old_end, replacement = text_splice(a, b)
+    a, b = a[offset:old_end], replacement
+    if len(a) + len(b) < CHUNKED_DIFF_LINES:
+        return [(offset + start, offset + end, lines) for start, end, lines in _diff(a, b)]
+    a_chunks, a_starts = _chunks(a)
+    b_chunks, b_starts = _chunks(b)
+    hunks = []
+    shift = 0  # b chunk index minus a chunk index before the current hunk
+    for start, end, replacement in _diff(a_chunks, b_chunks):
+        a_lo, a_hi = a_starts[start], a_starts[end]
+        b_lo, b_hi = b_starts[start + shift], b_starts[start + shift + len(replacement)]
+        hunks.extend((offset + a_lo + i, offset + a_lo + j, lines) for i, j, lines in _diff(a[a_lo:a_hi], b[b_lo:b_hi]))
+        shift += len(replacement) - (end - start)
+    return hunks
+
+
+def _diff(a, b):
+    """Patience diff of two lists, see diff_lines."""
+    hunks = []
+    stack = [(0, len(a), 0, len(b))]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+        # Same head and tail trimmed with slice compares (works on lists as well as strings)
+        start, old_end, replacement = text_splice(a[alo:ahi], b[blo:bhi])
+        alo, ahi, blo, bhi = alo + start, alo + old_end, blo + start, blo + start + len(replacement)
+        if alo == ahi and blo == bhi:
+            continue
+        anchors = _unique_anchors(a[alo:ahi], b[blo:bhi]) if alo < ahi and blo < bhi else []
+        if not anchors:
+            hunks.append((alo, ahi, b[blo:bhi]))
+            continue
+        # Diff the gaps between anchors; pushed last-first so hunks come out in order
+        gaps = []
+        a_next, b_next = alo, blo
+        for i, j in anchors:
+            if a_next < alo + i or b_next < blo + j:  # Consecutive anchors leave no gap
+                gaps.append((a_next, alo + i, b_next, blo + j))
+            a_next, b_next = alo + i + 1, blo + j + 1
+        gaps.append((a_next, ahi, b_next, bhi))
+        stack.extend(reversed(gaps))
+    return hunks
+
+
+# --- Three-way merge of sequences ---
+
+def merge_sequences(base, mine, theirs, on_conflict):
+    """Merges two edited copies of the list base; returns (merged, conflict count).
+
+    on_conflict(base_part, mine_part, theirs_part) returns the items to put
+    where both sides changed the same stretch differently. Insertions by
+    both sides at the same spot are kept, mine first.
+    """
+    ours, others = diff_lines(base, mine), diff_lines(base, theirs)
+    merged = []
+    conflicts = 0
+    position = 0
+    i = j = 0
+    while i < len(ours) or j < len(others):
+        # Start a group with the earliest hunk, then pull in every hunk that overlaps it
+        if j >= len(others) or (i < len(ours) and ours[i][:2] <= others[j][:2]):
+            group_start, group_end = ours[i][0], ours[i][1]
+        else:
+            group_start, group_end = others[j][0], others[j][1]
+        mine_hunks, theirs_hunks = [], []
+        while True:
+            if i < len(ours) and _joins(ours[i], group_start, group_end):
+                hunk = ours[i]
+                mine_hunks.append(hunk)
+                i += 1
+            elif j < len(others) and _joins(others[j], group_start, group_end):
+                hunk = others[j]
+                theirs_hunks.append(hunk)
+                j += 1
+            else:
+                break
+            group_end = max(group_end, hunk[1])
+
+        merged.extend(base[position:group_start])
+        original = base[group_start:group_end]
+        mine_part = _apply(base, group_start, group_end, mine_hunks)
+        theirs_part = _apply(base, group_start, group_end, theirs_hunks)
+        if not theirs_hunks or mine_part == theirs_part:
+            merged.extend(mine_part)
+        elif not mine_hunks:
+            merged.extend(theirs_part)
+        elif group_start == group_end:
+            merged.extend(mine_part + theirs_part)  # Both added at the same spot
+        else:
+            merged.extend(on_conflict(original, mine_part, theirs_part))
+            conflicts += 1
+        position = group_end
+    merged.extend(base[position:])
+    return merged, conflicts
+
+
+def _joins(hunk, group_start, group_end):
+    """True if hunk overlaps the group, or touches it where one of them only inserts."""
+    start, end = hunk[0], hunk[1]
+    if start < group_end and end > group_start:
+        return True
+    touching = start == group_end or end == group_start
+    return touching and (start == end or group_start == group_end)
+
+
+def _apply(base, start, end, hunks):
+    """base[start:end] with hunks (all inside that range) applied."""
+    result = []
+    position = start
+    for hunk_start, hunk_end, replacement in hunks:
+        result.extend(base[position:hunk_start])
+        result.extend(replacement)
+        position = hunk_end
+    result.extend(base[position:end])
+    return result
+
+
+def _with_newline(lines):
+    if lines and not lines[-1].endswith("\n"):
+        return lines[:-1] + [lines[-1] + "\n"]
+    return lines
+
+
+def _conflict_lines(base_part, mine_part, theirs_part):
+    return [MINE_MARKER] + _with_newline(mine_part) + [SEPARATOR_MARKER] + \
+           _with_newline(theirs_part) + [THEIRS_MARKER]
+
+
+def merge_text(base, mine, theirs):
+    """Merges two edited copies of a text line by line; returns (text, conflict count)."""
+    if mine == theirs or theirs == base:
+        return mine, 0
+    if mine == base:
+        return theirs, 0
+    lines, conflicts = merge_sequences(base.splitlines(True), mine.splitlines(True),
+                                       theirs.splitlines(True), _conflict_lines)
+    return "".join(lines), conflicts
+
+
+def merge_sessions(base, mine, theirs):
+    """Merges two edited copies of the session entries; returns (entries, conflict count).
+
+    An entry edited differently on both sides keeps both versions.
+    """
+    def keys(entries):
+        return [json.dumps(entry, sort_keys=True) for entry in entries or []]
+
+    merged, conflicts = merge_sequences(keys(base), keys(mine), keys(theirs),
+                                        lambda base_part, mine_part, theirs_part: mine_part + theirs_part)
+    entries = [json.loads(key) for key in merged]
+    entries.sort(key=entry_date)  # Stable, so same-date entries keep their merged order
+    return entries, conflicts
+
+
+# --- Journals ---
+
+class MergeResult:
+    """A merged journal and what could not be merged cleanly."""
+
+    def __init__(self, data, conflicts, notes):
+        self.data = data
+        self.conflicts = conflicts  # Field names edited incompatibly on both sides
+        self.notes = notes  # One line per conflict or dropped value, for the user
+
+    @property
+    def clean(self):
+        return not self.conflicts
+
+
+def _pick(base, mine, theirs):
+    """Atomic three-way choice; returns (value, conflicted). Mine wins a conflict."""
+    if mine == theirs or theirs == base:
+        return mine, False
+    if mine == base:
+        return theirs, False
+    return mine, True
+
+
+def merge_journals(base, mine, theirs):
+    """Merges two journals edited from base; returns a MergeResult.
+
+    Formatting follows its field: when a text field combines edits from
+    both sides, its bold/italic runs no longer line up and are dropped.
+    """
+    data = {}
+    conflicts = []
+    notes = []
+    keys = list(mine) + [key for key in theirs if key not in mine]
+    keys += [key for key in base if key not in mine and key not in theirs]
+    for key in keys:
+        if key == FORMATTING_KEY:
+            data[key] = None  # Keeps its place; needs the merged text, filled in below
+            continue
+        old, ours, others = base.get(key, _MISSING), mine.get(key, _MISSING), theirs.get(key, _MISSING)
+        if key == "Last Updated":
+            value = max(value for value in (ours, others, "") if isinstance(value, str))
+        elif key in METADATA_FIELDS:
+            value = ours if ours is not _MISSING else others
+        elif key in LINE_MERGED_FIELDS and all(isinstance(v, str) or v is _MISSING for v in (old, ours, others)):
+            value, count = merge_text(*("" if v is _MISSING else v for v in (old, ours, others)))
+            if count:
+                conflicts.append(key)
+                notes.append(f"{key}: {count} overlapping edits, marked in the text")
+        elif key in (SESSIONS_KEY, LEDGER_KEY):
+            value, count = merge_sessions(*([] if not isinstance(v, list) else v for v in (old, ours, others)))
+            if count:
+                conflicts.append(key)
+                notes.append(f"{key}: {count} entries edited on both sides, both versions kept")
+        else:
+            value, conflicted = _pick(old, ours, others)
+            if conflicted:
+                conflicts.append(key)
+                notes.append(f"{key}: changed on both sides, kept this copy's {ours!r}")
+        if value is not _MISSING:
+            data[key] = value
+
+    if data.get(LEDGER_KEY):
+        # Transactions from both sides are all kept, so the count follows from them
+        data["Spirit Stones"] = stones_value(Ledger(data[LEDGER_KEY]).balance)
+        if "Spirit Stones" in conflicts:
+            index = conflicts.index("Spirit Stones")
+            del conflicts[index]
+            del notes[index]  # Notes of atomic fields line up with their conflicts
+    if FORMATTING_KEY in data:
+        data[FORMATTING_KEY] = _merge_formatting(base, mine, theirs, data, notes)
+    return MergeResult(data, conflicts, notes)
+
+
+def _merge_formatting(base, mine, theirs, merged, notes):
+    formats = [journal.get(FORMATTING_KEY) or {} for journal in (base, mine, theirs)]
+    result = {}
+    for field in dict.fromkeys([*formats[1], *formats[2], *formats[0]]):
+        text = merged.get(field)
+        if text == mine.get(field) and text == theirs.get(field):
+            runs, _ = _pick(*(formatting.get(field) for formatting in formats))
+        elif text == mine.get(field):
+            runs = formats[1].get(field)
+        elif text == theirs.get(field):
+            runs = formats[2].get(field)
+        else:
+            if formats[1].get(field) or formats[2].get(field):
+                notes.append(f"{field}: bold/italic dropped, the text combines both copies")
+            runs = None
+        if runs:
+            result[field] = runs
+    return result
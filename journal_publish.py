@@ -0,0 +1,317 @@
+"""Publishing journals as Markdown or HTML pages, e.g. for a campaign wiki.
+
+Pages follow the tab layout of the app (TABS_CONFIG) and keep bold and
+italic text. A manifest in the output directory records, for every
+journal, the content hash it was rendered from and the file signature
+(size and mtime of the journal and its write-ahead log) seen at the
+time. A journal whose signature hasn't moved is skipped without being
+opened; one whose signature moved but whose bytes hash the same is
+skipped after hashing. Only the rest are parsed and rendered, across a
+process pool, so re-publishing a large library after one edit costs
+about as much as publishing that one journal.
+"""
+import hashlib
+import html
+import json
+import os
+import re
+
+from journal_document import NUMERIC_FIELDS, TABS_CONFIG, JournalDocument, JournalError, write_bytes_atomic
+from journal_formatting import FORMATTING_KEY, decode_runs
+from journal_ledger import LEDGER_KEY, Ledger
+from journal_sessions import SESSIONS_KEY
+from journal_wal import wal_path_for
+from journal_watcher import file_signature
+
+FORMATS = {"markdown": ".md", "html": ".html"}
+MANIFEST_NAME = ".publish-manifest.json"
+RENDER_VERSION = 1  # Bump when the page layout changes, so every page is rendered again
+HASH_CHUNK = 1024 * 1024
+
+_MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]<>])")
+
+
+def escape_markdown(text):
+    return _MARKDOWN_SPECIAL.sub(r"\\\1", text)
+
+
+# --- Rendering ---
+
+def formatted_segments(text, formatting):
+    """Splits text into (segment, bold, italic) pieces from its {tag: runs} formatting."""
+    edges = {0, len(text)}
+    ranges = {}
+    for tag in ("bold", "italic"):
+        ranges[tag] = [(min(start, len(text)), min(end, len(text))) for start, end in
+                       decode_runs((formatting or {}).get(tag, []))]
+        for start, end in ranges[tag]:
+            edges.update((start, end))
+    edges = sorted(edges)
+    segments = []
+    for start, end in zip(edges, edges[1:]):
+        flags = [any(low <= start and end <= high for low, high in ranges[tag]) for tag in ("bold", "italic")]
+        if segments and segments[-1][1:] == tuple(flags):
+            segments[-1] = (segments[-1][0] + text[start:end],) + segments[-1][1:]
+        else:
+            segments.append((text[start:end],) + tuple(flags))
+    return segments
+
+
+_MARKERS = {"bold": "**", "italic": "*"}
+
+
+def _markdown_text(text, formatting):
+    lines = [[]]
+    for segment, bold, italic in formatted_segments(text, formatting):
+        tags = [tag for tag, on in (("bold", bold), ("italic", italic)) if on]
+        for position, line in enumerate(segment.split("\n")):
+            if position:
+                lines.append([])
+            lines[-1].append((line, tags))
+    out = []
+    for line in lines:
+        # Emphasis has to hug the text and can't cross a line break, so markers are
+        # placed around the words only, nested, and closed at the end of each line
+        parts, stack, spaces = [], [], ""
+        for segment, tags in line:
+            core = segment.strip()
+            if not core:
+                spaces += segment
+                continue
+            while stack and not set(stack) <= set(tags):
+                parts.append(_MARKERS[stack.pop()])
+            parts.append(spaces + segment[:len(segment) - len(segment.lstrip())])
+            for tag in tags:
+                if tag not in stack:
+                    stack.append(tag)
+                    parts.append(_MARKERS[tag])
+            parts.append(escape_markdown(core))
+            spaces = segment[len(segment.rstrip()):]
+        parts.extend(_MARKERS[tag] for tag in reversed(stack))
+        out.append("".join(parts) + spaces)
+    # A single newline is a hard line break; blank lines stay paragraph breaks
+    return re.sub(r"(?<=\S)\n(?=\S)", "  \n", "\n".join(out))
+
+
+def _html_text(text, formatting):
+    out = []
+    for segment, bold, italic in formatted_segments(text, formatting):
+        segment = html.escape(segment)
+        if italic:
+            segment = f"<em>{segment}</em>"
+        if bold:
+            segment = f"<strong>{segment}</strong>"
+        out.append(segment)
+    return "<br>\n".join("".join(out).split("\n"))
+
+
+def _ledger_summary(entries):
+    ledger = Ledger(entries)
+    gained, spent = ledger.totals()
+    return f"{len(ledger)} ledger transactions: {gained:,} gained, {spent:,} spent"
+
+
+def _sections(data):
+    """Yields (tab name, [(heading, text, formatting)]) for the tabs with anything in them.
+
+    Spirit Stones comes with a None heading and a one-line summary as its text.
+    """
+    formatting = data.get(FORMATTING_KEY) or {}
+    for tab_name, fields_in_tab in TABS_CONFIG.items():
+        items = []
+        for key in fields_in_tab:
+            value = str(data.get(key, "")).strip()
+            if key in NUMERIC_FIELDS:
+                if data.get(LEDGER_KEY):
+                    items.append((None, f"{key}: {value or '0'}", _ledger_summary(data[LEDGER_KEY])))
+                elif value and value != "0":
+                    items.append((None, f"{key}: {value}", None))
+            elif value:
+                items.append((key, value, formatting.get(key)))
+        if tab_name == "Session Journal":
+            for entry in data.get(SESSIONS_KEY) or []:
+                if isinstance(entry, dict) and str(entry.get("text", "")).strip():
+                    items.append((str(entry.get("date", "")), str(entry["text"]).strip(), None))
+        if items:
+            yield tab_name, items
+
+
+def render_markdown(data):
+    """The journal as a Markdown page."""
+    lines = [f"# {escape_markdown(str(data.get('Name') or 'Unnamed'))}", ""]
+    if data.get("Stage"):
+        lines.append(f"**Stage:** {escape_markdown(str(data['Stage']))}  ")
+    if data.get("Last Updated"):
+        lines.append(f"**Last Updated:** {escape_markdown(str(data['Last Updated']))}")
+    for tab_name, items in _sections(data):
+        lines += ["", f"## {escape_markdown(tab_name)}"]
+        for heading, text, formatting in items:
+            if heading is None:  # Spirit Stones, with the ledger summary as its "formatting"
+                lines += ["", f"**{escape_markdown(text)}**" + (f"  \n_{formatting}_" if formatting else "")]
+            else:
+                lines += ["", f"### {escape_markdown(heading)}", "", _markdown_text(text, formatting)]
+    return "\n".join(lines).rstrip() + "\n"
+
+
+def render_html(data):
+    """The journal as a standalone HTML page."""
+    name = html.escape(str(data.get("Name") or "Unnamed"))
+    parts = ["<!DOCTYPE html>", '<html><head><meta charset="utf-8">', f"<title>{name}</title>",
+             "<style>body{font-family:sans-serif;max-width:50em;margin:2em auto;line-height:1.5}"
+             "h3{margin-bottom:.2em}</style>", "</head><body>", f"<h1>{name}</h1>"]
+    meta = []
+    if data.get("Stage"):
+        meta.append(f"<strong>Stage:</strong> {html.escape(str(data['Stage']))}")
+    if data.get("Last Updated"):
+        meta.append(f"<strong>Last Updated:</strong> {html.escape(str(data['Last Updated']))}")
+    if meta:
+        parts.append(f"<p>{'<br>'.join(meta)}</p>")
+    for tab_name, items in _sections(data):
+        parts.append(f"<h2>{html.escape(tab_name)}</h2>")
+        for heading, text, formatting in items:
+            if heading is None:
+                summary = f"<br><em>{html.escape(formatting)}</em>" if formatting else ""
+                parts.append(f"<p><strong>{html.escape(text)}</strong>{summary}</p>")
+            else:
+                parts.append(f"<h3>{html.escape(heading)}</h3>")
+                parts.append(f"<p>{_html_text(text, formatting)}</p>")
+    parts.append("</body></html>")
+    return "\n".join(parts) + "\n"
+
+
+RENDERERS = {"markdown": render_markdown, "html": render_html}
+
+
+def render_index(entries, fmt):
+    """A page linking every published journal: entries are manifest entries sorted as listed."""
+    if fmt == "html":
+        rows = "\n".join(f'<tr><td><a href="{html.escape(entry["output"])}">{html.escape(entry["name"] or "Unnamed")}'
+                         f'</a></td><td>{html.escape(entry["stage"])}</td></tr>' for entry in entries)
+        return ('<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Characters</title></head><body>\n'
+                f"<h1>Characters</h1>\n<table>\n<tr><th>Name</th><th>Stage</th></tr>\n{rows}\n</table>\n</body></html>\n")
+    rows = "\n".join(f"| [{escape_markdown(entry['name'] or 'Unnamed')}]({entry['output']}) "
+                     f"| {entry['stage'].replace('|', '/')} |" for entry in entries)
+    return f"# Characters\n\n| Name | Stage |\n| --- | --- |\n{rows}\n"
+
+
+# --- Incremental publishing ---
+
+def content_hash(path, fmt):
+    """Hash of everything a page is rendered from: the journal, its log, the format and the layout version."""
+    digest = hashlib.blake2b(f"{fmt}:{RENDER_VERSION}".encode(), digest_size=16)
+    for file_path in (path, wal_path_for(path)):
+        try:
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+                    digest.update(chunk)
+        except FileNotFoundError:
+            pass
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _signature(path):
+    return json.loads(json.dumps(file_signature(path)))  # Lists, as the manifest stores it
+
+
+def publish_file(job):
+    """Renders one journal unless its hash matches the manifest; runs in a worker process.
+
+    job is (path, target, fmt, previous manifest entry or None, dry_run).
+    Returns (path, status, manifest entry or error message).
+    """
+    path, target, fmt, previous, dry_run = job
+    try:
+        signature = _signature(path)  # Taken first: a change while we read shows up next run
+        digest = content_hash(path, fmt)
+        if previous and previous.get("hash") == digest and os.path.exists(target):
+            return path, "unchanged", dict(previous, signature=signature)
+        data = JournalDocument.load(path, read_only=True).data
+        if not dry_run:
+            write_bytes_atomic(target, RENDERERS[fmt](data).encode("utf-8"))
+    except JournalError as e:
+        return path, "error", str(e)
+    except OSError as e:
+        return path, "error", e.strerror or str(e)
+    except Exception as e:  # A malformed journal fails on its own, not the whole run
+        return path, "error", f"{type(e).__name__}: {e}"
+    entry = {"hash": digest, "signature": signature, "output": os.path.basename(target),
+             "name": str(data.get("Name", "")), "stage": str(data.get("Stage", ""))}
+    return path, "exported", entry
+
+
+def load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("journals", {}) if isinstance(manifest, dict) else {}
+
+
+def save_manifest(output_dir, journals):
+    payload = json.dumps({"version": RENDER_VERSION, "journals": journals}, indent=1, sort_keys=True)
+    write_bytes_atomic(os.path.join(output_dir, MANIFEST_NAME), payload.encode("utf-8"))
+
+
+def _manifest_key(path, output_dir):
+    return os.path.relpath(os.path.abspath(path), os.path.abspath(output_dir))
+
+
+def plan_publish(paths, output_dir, fmt, force=False, dry_run=False):
+    """Returns (jobs for publish_file, results of journals skipped on their signature alone, old manifest).
+
+    With force every journal is rendered again.
+    """
+    manifest = load_manifest(output_dir)
+    suffix = FORMATS[fmt]
+    jobs = []
+    skipped = []
+    stems = [os.path.splitext(os.path.basename(path))[0] for path in paths]
+    own_names = {stem + suffix for stem in stems}  # Never handed to another journal
+    taken = {"index" + suffix}
+    for path, stem in zip(paths, stems):
+        output = stem + suffix
+        counter = 1
+        while output in taken or (counter > 1 and output in own_names):  # Same file name in two folders
+            counter += 1
+            output = f"{stem}-{counter}{suffix}"
+        taken.add(output)
+        target = os.path.join(output_dir, output)
+        previous = manifest.get(_manifest_key(path, output_dir))
+        if force or not previous or previous.get("output") != output:
+            previous = None
+        if previous and previous.get("signature") == _signature(path) and os.path.exists(target):
+            skipped.append((path, "unchanged", previous))
+        else:
+            jobs.append((path, target, fmt, previous, dry_run))
+    return jobs, skipped, manifest
+
+
+def finish_publish(output_dir, fmt, results, manifest, dry_run=False):
+    """Writes the manifest and index page, and removes pages of journals no longer published.
+
+    results is [(path, status, entry)]; returns the number of pages removed.
+    A journal that failed keeps its old page and entry, and is tried again next run.
+    """
+    journals = {}
+    for path, status, entry in results:
+        key = _manifest_key(path, output_dir)
+        if status != "error":
+            journals[key] = entry
+        elif key in manifest:
+            journals[key] = dict(manifest[key], signature=None)
+    live = {entry["output"] for entry in journals.values()}
+    stale = {entry["output"] for entry in manifest.values() if entry.get("output")} - live  # Gone journals, or an earlier format
+    # Switching format leaves the other format's index behind too
+    stale |= {"index" + os.path.splitext(output)[1] for output in stale} - {"index" + FORMATS[fmt]}
+    if not dry_run:
+        for output in stale:
+            try:
+                os.remove(os.path.join(output_dir, output))
+            except OSError:
+                pass
+        index = sorted(journals.values(), key=lambda entry: (entry["name"].lower(), entry["output"]))
+        write_bytes_atomic(os.path.join(output_dir, "index" + FORMATS[fmt]), render_index(index, fmt).encode("utf-8"))
+        save_manifest(output_dir, journals)
+    return sum(not output.startswith("index.") for output in stale)
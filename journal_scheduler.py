@@ -0,0 +1,69 @@
+"""Coalescing scheduler for UI refreshes.
+
+Handlers that fire on every keystroke or every <Configure> event don't
+redraw anything themselves; they ask the scheduler to run a refresh
+under a key. Requests with the same key are merged, and everything
+requested runs once, in priority order, when Tk next goes idle. However
+many listeners a keystroke triggers, each refresh runs at most once per
+pass.
+"""
+import time
+
+from journal_diagnostics import diagnostics
+
+HIGH = 0  # Things the user is looking at right now (title, dirty markers)
+NORMAL = 10
+LOW = 20  # Bookkeeping that can wait for the other refreshes
+
+
+class UIScheduler:
+    """Runs requested callbacks once per idle pass, de-duplicated by key."""
+
+    def __init__(self, master):
+        self.master = master
+        self._pending = {}  # key -> [priority, order, callback]
+        self._order = 0
+        self._after_id = None
+        self.requests = 0  # Requests received, including merged ones
+        self.passes = 0
+
+    def request(self, key, callback, priority=NORMAL):
+        """Runs callback in the next idle pass; a later request for the same key replaces it.
+
+        A merged request keeps the more urgent of the two priorities.
+        """
+        self.requests += 1
+        entry = self._pending.get(key)
+        if entry is None:
+            self._order += 1
+            self._pending[key] = [priority, self._order, callback]
+        else:
+            entry[0] = min(entry[0], priority)
+            entry[2] = callback
+        if self._after_id is None:
+            self._after_id = self.master.after_idle(self._run)
+
+    def cancel(self, key):
+        self._pending.pop(key, None)
+
+    def flush(self):
+        """Runs everything pending now instead of waiting for idle."""
+        if self._after_id is not None:
+            self.master.after_cancel(self._after_id)
+        self._run()
+
+    def _run(self):
+        self._after_id = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        self.passes += 1
+        start = time.perf_counter()
+        for key, (_, _, callback) in sorted(pending.items(), key=lambda item: item[1][:2]):
+            try:
+                callback()
+            except Exception as e:  # One broken refresh must not stop the others
+                print(f"UI update {key!r} failed: {e}")
+        if diagnostics.enabled:
+            diagnostics.record("handler", "ui update pass", time.perf_counter() - start,
+                               f"{len(pending)} updates: {', '.join(map(str, pending))}")
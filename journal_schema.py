@@ -0,0 +1,155 @@
+"""Versioned journal schema: migrations for older files and the field validator.
+
+Every journal records the schema it was written with under
+"Schema Version" (files from before versioning count as version 0).
+Loading a journal runs the registered migration steps from its version up
+to SCHEMA_VERSION, in order, so fields added (or renamed) since it was
+written are filled in instead of silently missing. The migrate command
+of the batch CLI does the same for a whole directory and writes the
+results back.
+
+To change the schema, add a step with @migration(<version it upgrades
+from>); SCHEMA_VERSION follows from the registered steps. Steps must
+not depend on the current default_journal staying as it is, since they
+also run on files many versions old. A step that moves a value out of
+the journal returns it as {key: value}, so the caller can keep it
+elsewhere (the app puts the old window size into the user's settings).
+
+The field validator is compiled once from default_journal into a table
+of per-key checks, so validating a journal is one dict lookup per field.
+"""
+from journal_document import SCHEMA_VERSION_KEY, JournalError, default_journal
+from journal_formatting import FORMATTING_KEY, validate_formatting
+from journal_ledger import LEDGER_KEY, validate_ledger
+from journal_sessions import SESSIONS_KEY, validate_sessions
+
+_MIGRATIONS = {}  # Version upgraded from -> (description, step)
+
+
+def migration(from_version, description):
+    """Registers a step that upgrades journal data in place from from_version to the next."""
+    def register(step):
+        if from_version in _MIGRATIONS:
+            raise ValueError(f"Two migrations from schema version {from_version}")
+        _MIGRATIONS[from_version] = (description, step)
+        return step
+    return register
+
+
+@migration(0, "Add the fields introduced before versioning and store numbers consistently")
+def _from_unversioned(data):
+    # The fields of schema 1, frozen here: later changes to default_journal must not alter this step
+    fields = {
+        "Name": "", "Stage": "",
+        "Path/Style": "", "Affinity/Element(s)": "", "Notable Breakthroughs": "",
+        "Active Techniques": "", "Passive Techniques": "",
+        "Origin/Background": "", "Known By": "", "Notable Actions": "",
+        "Spirit Stones": "0", "Spirit Stone Ledger": [], "Items/Artifacts": "", "Consumables": "",
+        "Goals": "", "Hints & Rumors": "", "Unfinished Quests": "",
+        "Session Notes": "", "Sessions": [],
+        "Formatting": {},
+        "AI Prompt": """This is my Cultivation Journal for my character in a cultivation-themed roleplaying game.
+
+This journal tracks my character's cultivation journey, including their techniques, breakthroughs, inventory, and goals.
+
+When responding about this journal:
+- Refer to my character by name and respect their current cultivation stage
+- Use terminology and concepts from cultivation novels (qi, meridians, spiritual energy, etc.)
+- Help me brainstorm next steps based on my character's current goals and situation
+- Feel free to suggest potential plot developments or challenges based on the information provided
+- Maintain the tone and setting of a cultivation world
+
+The journal is organized into sections for Cultivation details, Background information, Inventory, and Quests & Goals.""",
+        "Last Updated": "", "Window Width": 800, "Window Height": 600,
+    }
+    for key, value in fields.items():
+        data.setdefault(key, value)
+    if isinstance(data["Spirit Stones"], int) and not isinstance(data["Spirit Stones"], bool):
+        data["Spirit Stones"] = str(data["Spirit Stones"])  # Early hand-edited files stored a number
+    for key in ("Window Width", "Window Height"):
+        if isinstance(data[key], str) and data[key].strip().isdigit():
+            data[key] = int(data[key])
+
+
+@migration(1, "Move the window size out of the journal into the user's settings")
+def _drop_window_size(data):
+    moved = {}
+    for key in ("Window Width", "Window Height"):
+        value = data.pop(key, None)
+        if isinstance(value, int) and not isinstance(value, bool) and value > 0:
+            moved[key] = value
+    return moved
+
+
+SCHEMA_VERSION = len(_MIGRATIONS)  # Steps run 0 -> 1 -> ... -> SCHEMA_VERSION
+
+
+def schema_version(data):
+    """The schema version a journal's data was written with."""
+    version = data.get(SCHEMA_VERSION_KEY, 0)
+    if not isinstance(version, int) or isinstance(version, bool) or version < 0:
+        raise JournalError(f"The journal has an invalid schema version: {version!r}.")
+    if version > SCHEMA_VERSION:
+        raise JournalError(f"The journal was written by a newer version of the app (schema {version}).")
+    return version
+
+
+def migrate(data, moved=None):
+    """Upgrades journal data in place to SCHEMA_VERSION; returns the version it had before.
+
+    Values the steps moved out of the journal are added to the moved dict, if one is given.
+    """
+    start = version = schema_version(data)
+    while version < SCHEMA_VERSION:
+        taken = _MIGRATIONS[version][1](data)
+        if taken and moved is not None:
+            moved.update(taken)
+        version += 1
+        data[SCHEMA_VERSION_KEY] = version
+    return start
+
+
+def migration_steps(version):
+    """Descriptions of the steps a journal at version goes through."""
+    return [_MIGRATIONS[step][0] for step in range(version, SCHEMA_VERSION)]
+
+
+# --- Validation ---
+
+def _whole_number(key):
+    problem = [f"'{key}' should be a whole number"]
+
+    def check(value):
+        return problem if not isinstance(value, int) or isinstance(value, bool) else []
+    return check
+
+
+def _text(key):
+    def check(value):
+        return [] if isinstance(value, str) else [f"'{key}' should be text, found {type(value).__name__}"]
+    return check
+
+
+def compile_validator(schema=None):
+    """Returns validate(data) -> problems, checking each field against schema's types."""
+    special = {
+        SESSIONS_KEY: validate_sessions,
+        LEDGER_KEY: validate_ledger,
+        FORMATTING_KEY: validate_formatting,
+        SCHEMA_VERSION_KEY: _whole_number(SCHEMA_VERSION_KEY),
+    }
+    checks = {key: _whole_number(key) if isinstance(value, int) else _text(key)
+              for key, value in (schema or default_journal).items()}
+    checks.update(special)
+
+    def validate(data):
+        problems = []
+        for key, value in data.items():
+            check = checks.get(key)
+            if check is not None:
+                problems.extend(check(value))
+        return problems
+    return validate
+
+
+validate_fields = compile_validator()
@@ -0,0 +1,260 @@
+"""Full-text search across a directory of journals.
+
+Each journal in a library gets a small index file ("shard") in
+<library>/.journal_index/ mapping every token to the fields and character
+offsets where it appears. Saving a journal re-indexes only the fields that
+changed and rewrites only that journal's shard. Searching loads all
+shards into one inverted index (token -> {(file, field): offsets}) and
+ranks matching fields by TF-IDF.
+"""
+import json
+import math
+import os
+import re
+import threading
+
+from journal_document import TABS_CONFIG, read_json, write_bytes_atomic
+from journal_lazy import LazyJournal
+from journal_watcher import file_signature
+
+INDEX_DIR = ".journal_index"
+INDEX_VERSION = 2
+SHARD_SUFFIX = ".idx"
+JOURNAL_PATTERN = re.compile(r".*\.(json|cjz)$", re.IGNORECASE)
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+MIN_TOKEN_LENGTH = 2
+SESSION_FIELD_PREFIX = "Sessions@"  # Session entries are indexed as "Sessions@<position>"
+
+# Fields worth searching (metadata and the AI prompt are left out)
+SEARCH_FIELDS = ["Name", "Stage"] + [key for fields in TABS_CONFIG.values() for key in fields]
+
+
+def tokenize(text):
+    """Yields (token, offset) for every word in text, lowercased."""
+    for match in TOKEN_PATTERN.finditer(text):
+        token = match.group()
+        if len(token) >= MIN_TOKEN_LENGTH:
+            yield token.lower(), match.start()
+
+
+def field_postings(text):
+    """Returns {token: [offsets]} for one field value."""
+    postings = {}
+    for token, offset in tokenize(text):
+        postings.setdefault(token, []).append(offset)
+    return postings
+
+
+def searchable_fields(data, keys=None):
+    """Returns {field: text} for the searchable parts of a journal.
+
+    keys limits the result to fields that changed; "Sessions" expands to
+    one field per session entry, keyed by its position (two entries can
+    share a date).
+    """
+    fields = {}
+    for key in SEARCH_FIELDS:
+        if keys is None or key in keys:
+            value = data.get(key, "")
+            if isinstance(value, str):
+                fields[key] = value
+    if keys is None or "Sessions" in keys:
+        for position, entry in enumerate(_session_entries(data)):
+            fields[SESSION_FIELD_PREFIX + str(position)] = str(entry.get("text", ""))
+    return fields
+
+
+def _session_entries(data):
+    sessions = data.get("Sessions", [])
+    return [entry for entry in sessions if isinstance(entry, dict)] if isinstance(sessions, list) else []
+
+
+class SearchHit:
+    """One matching field in one journal."""
+
+    def __init__(self, path, name, field, score, offsets, length, session_date=None):
+        self.path = path
+        self.name = name
+        self.field = field
+        self.score = score
+        self.offsets = offsets  # Where the first query token occurs in the field
+        self.length = length  # Length of that token, for selecting it
+        self.session_date = session_date  # Date of the session entry the hit is in, None for ordinary fields
+
+
+class SearchIndex:
+    """The search index of one library directory.
+
+    Safe to use from the autosave thread and the Tk thread at the same time.
+    """
+
+    def __init__(self, library_dir):
+        self.library_dir = os.path.abspath(library_dir)
+        self.index_dir = os.path.join(self.library_dir, INDEX_DIR)
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._shards = {}  # filename -> shard dict
+        self._postings = {}  # token -> {(filename, field): offsets}
+
+    # --- Shards on disk ---
+    def _shard_path(self, filename):
+        return os.path.join(self.index_dir, filename + SHARD_SUFFIX)
+
+    def _read_shard(self, filename):
+        try:
+            shard = read_json(self._shard_path(filename))
+        except (OSError, ValueError):
+            return None
+        return shard if shard.get("version") == INDEX_VERSION else None
+
+    def _write_shard(self, filename, shard):
+        os.makedirs(self.index_dir, exist_ok=True)
+        write_bytes_atomic(self._shard_path(filename), json.dumps(shard, separators=(",", ":")).encode("utf-8"))
+
+    def _source_signature(self, filename):
+        """(mtime, size) of the journal and of its write-ahead log, as lists like the shard stores them."""
+        return [list(part) if part else None for part in file_signature(os.path.join(self.library_dir, filename))]
+
+    # --- Updating ---
+    def update_journal(self, path, data, keys=None):
+        """Re-indexes a journal that was just written.
+
+        Only the fields in keys are re-tokenized (all of them if keys is None
+        or the journal has no shard yet).
+        """
+        filename = os.path.basename(path)
+        with self._lock:
+            old_shard = self._shards.get(filename) if self._loaded else self._read_shard(filename)
+            if old_shard is None:
+                old_shard = {"version": INDEX_VERSION, "fields": {}}
+                keys = None
+            shard = dict(old_shard)
+            if keys is None:
+                shard["fields"] = {}
+            elif "Sessions" in keys:
+                # Dates may have moved, so drop every session field before re-adding them
+                shard["fields"] = {field: postings for field, postings in old_shard["fields"].items()
+                                   if not field.startswith(SESSION_FIELD_PREFIX)}
+            else:
+                shard["fields"] = dict(old_shard["fields"])
+
+            for field, text in searchable_fields(data, keys).items():
+                shard["fields"][field] = field_postings(text)
+            if keys is None or "Sessions" in keys:
+                shard["session_dates"] = [str(entry.get("date", "")) for entry in _session_entries(data)]
+            shard["name"] = data.get("Name", "")
+            signature = self._source_signature(filename)
+            if signature[0] is None:
+                return
+            shard["signature"] = signature
+            self._write_shard(filename, shard)
+
+            if self._loaded:
+                self._remove_postings(filename, self._shards.get(filename))
+                self._shards[filename] = shard
+                self._add_postings(filename, shard)
+
+    def refresh(self):
+        """Loads every shard and brings the index up to date with the directory.
+
+        Journals changed outside the app (or never indexed) are re-indexed;
+        shards of deleted journals are removed. Returns the number of
+        journals that had to be re-indexed.
+        """
+        with self._lock:
+            try:
+                filenames = [name for name in os.listdir(self.library_dir)
+                             if JOURNAL_PATTERN.match(name) and os.path.isfile(os.path.join(self.library_dir, name))]
+            except OSError:
+                filenames = []
+
+            if not self._loaded:
+                self._shards = {}
+                self._postings = {}
+                for filename in filenames:
+                    shard = self._read_shard(filename)
+                    if shard is not None:
+                        self._shards[filename] = shard
+                        self._add_postings(filename, shard)
+                self._loaded = True
+
+            reindexed = 0
+            for filename in filenames:
+                shard = self._shards.get(filename)
+                current = self._source_signature(filename)
+                if current[0] is None:
+                    continue
+                # The log counts too: incremental saves change only the .wal sidecar
+                if shard is not None and shard.get("signature") == current:
+                    continue
+                path = os.path.join(self.library_dir, filename)
+                try:
+                    # Only the searchable fields are decoded, not the whole file
+                    with LazyJournal(path) as journal:
+                        self.update_journal(path, journal)
+                except Exception:
+                    continue  # Not a journal
+                reindexed += 1
+
+            for filename in set(self._shards) - set(filenames):
+                self._remove_postings(filename, self._shards.pop(filename))
+                try:
+                    os.remove(self._shard_path(filename))
+                except OSError:
+                    pass
+            return reindexed
+
+    def _add_postings(self, filename, shard):
+        for field, postings in shard.get("fields", {}).items():
+            for token, offsets in postings.items():
+                self._postings.setdefault(token, {})[(filename, field)] = offsets
+
+    def _remove_postings(self, filename, shard):
+        if not shard:
+            return
+        for field, postings in shard.get("fields", {}).items():
+            for token in postings:
+                entries = self._postings.get(token)
+                if entries is not None:
+                    entries.pop((filename, field), None)
+                    if not entries:
+                        del self._postings[token]
+
+    # --- Searching ---
+    def search(self, query, limit=100):
+        """Returns SearchHits for fields in journals containing every query word, best first."""
+        tokens = [token for token, _ in tokenize(query)]
+        if not tokens:
+            return []
+        with self._lock:
+            if not self._loaded:
+                self.refresh()
+
+            matches = [self._postings.get(token, {}) for token in dict.fromkeys(tokens)]
+            if not all(matches):
+                return []
+
+            # Every word must appear somewhere in the journal (not necessarily the same field)
+            files = set.intersection(*({filename for filename, _ in entries} for entries in matches))
+            total_fields = sum(len(shard.get("fields", {})) for shard in self._shards.values()) or 1
+
+            scores = {}
+            for entries in matches:
+                idf = math.log(1 + total_fields / len(entries))
+                for (filename, field), offsets in entries.items():
+                    if filename in files:
+                        scores[(filename, field)] = scores.get((filename, field), 0.0) + (1 + math.log(len(offsets))) * idf
+
+            first = matches[0]
+            hits = []
+            for (filename, field), score in sorted(scores.items(), key=lambda item: -item[1])[:limit]:
+                offsets = first.get((filename, field), [])
+                shard = self._shards[filename]
+                session_date = None
+                if field.startswith(SESSION_FIELD_PREFIX):
+                    dates = shard.get("session_dates", [])
+                    position = int(field[len(SESSION_FIELD_PREFIX):])
+                    session_date = dates[position] if position < len(dates) else ""
+                hits.append(SearchHit(os.path.join(self.library_dir, filename), shard.get("name", ""),
+                                      field, score, offsets, len(tokens[0]), session_date))
+            return hits
@@ -0,0 +1,221 @@
+"""Virtualized display of the dated session entries.
+
+Only a window of WINDOW_ENTRIES entries is ever inserted into the Text
+widget; the scrollbar works in entry numbers rather than pixels, so a
+journal with thousands of sessions opens and scrolls as fast as one with
+ten. Double-click an entry's date to edit or delete it.
+"""
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from journal_document import timestamp_now
+from journal_sessions import parse_date
+
+WINDOW_ENTRIES = 25  # Entries rendered at a time
+
+
+class SessionLogView:
+    """The "Session Log" panel on the Session Journal tab."""
+
+    def __init__(self, parent, get_log, on_change, colors=("#FFFFFF", "#000000")):
+        self.get_log = get_log  # Returns the SessionLog of the open journal
+        self.on_change = on_change  # Called after an entry was added, edited or deleted
+        self.low = 0  # Range being shown (indices into the log)
+        self.high = None  # None: up to the last entry
+        self.top = 0  # First entry rendered
+
+        self.frame = ttk.Frame(parent)
+        self.frame.columnconfigure(0, weight=1)
+        self.frame.rowconfigure(1, weight=1)
+
+        # Toolbar: date range, jump and new entry
+        toolbar = ttk.Frame(self.frame)
+        toolbar.grid(row=0, column=0, columnspan=2, sticky="ew", pady=(0, 5))
+        ttk.Label(toolbar, text="From:").pack(side=tk.LEFT)
+        self.from_entry = ttk.Entry(toolbar, width=12)
+        self.from_entry.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Label(toolbar, text="To:").pack(side=tk.LEFT)
+        self.to_entry = ttk.Entry(toolbar, width=12)
+        self.to_entry.pack(side=tk.LEFT, padx=(2, 5))
+        ttk.Button(toolbar, text="Show", command=self.show_range).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="All", command=self.show_all).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="New Entry...", command=self.new_entry).pack(side=tk.RIGHT, padx=2)
+        self.count_label = ttk.Label(toolbar, text="")
+        self.count_label.pack(side=tk.RIGHT, padx=10)
+        self.from_entry.bind("<Return>", lambda e: self.show_range())
+        self.to_entry.bind("<Return>", lambda e: self.show_range())
+
+        text_bg, fg = colors
+        self.text = tk.Text(self.frame, wrap="word", height=15, width=50, cursor="arrow",
+                            bg=text_bg, fg=fg, insertbackground=fg)
+        self.text.tag_configure("header", font=("TkDefaultFont", 9, "bold"))
+        self.text.tag_bind("header", "<Double-Button-1>", self._on_header_double_click)
+        self.text.configure(state="disabled")
+        self.text.grid(row=1, column=0, sticky="nsew")
+
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns")
+
+        # Mouse wheel scrolls by entries (Windows/macOS send <MouseWheel>, X11 buttons 4/5)
+        self.text.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        self.text.bind("<Button-4>", lambda e: self.scroll(-1))
+        self.text.bind("<Button-5>", lambda e: self.scroll(1))
+
+        self.refresh()
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def set_colors(self, text_bg, fg):
+        self.text.config(bg=text_bg, fg=fg, insertbackground=fg)
+
+    # --- Rendering ---
+    def _bounds(self):
+        log = self.get_log()
+        high = len(log) if self.high is None else min(self.high, len(log))
+        return log, min(self.low, high), high
+
+    def refresh(self, keep_position=False):
+        """Redraws the visible window (call after the journal changed)."""
+        if not keep_position:
+            self.low, self.high = 0, None
+            self.top = max(0, len(self.get_log()) - WINDOW_ENTRIES)  # Newest sessions first in view
+        self.render()
+
+    def render(self):
+        log, low, high = self._bounds()
+        self.top = max(low, min(self.top, high - WINDOW_ENTRIES))
+        bottom = min(high, self.top + WINDOW_ENTRIES)
+
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        for index in range(self.top, bottom):
+            entry = log[index]
+            self.text.insert("end", str(entry.get("date", "")) + "\n", ("header", f"entry-{index}"))
+            self.text.insert("end", str(entry.get("text", "")) + "\n\n")
+        if high == low:
+            self.text.insert("end", "No sessions yet. Use \"New Entry...\" to add one." if not len(log)
+                             else "No sessions in this range.")
+        self.text.configure(state="disabled")
+
+        total = high - low
+        if total:
+            self.scrollbar.set((self.top - low) / total, (bottom - low) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        shown = f"{self.top - low + 1}-{bottom - low} of {total}" if total else "0"
+        self.count_label.config(text=f"Sessions {shown}")
+
+    # --- Navigation ---
+    def scroll(self, entries):
+        self.top += entries
+        self.render()
+        return "break"
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command: positions are fractions of the entry range, not pixels."""
+        log, low, high = self._bounds()
+        if action == "moveto":
+            self.top = low + int(float(amount) * (high - low))
+        elif action == "scroll":
+            step = WINDOW_ENTRIES - 1 if unit == "pages" else 1
+            self.top += int(amount) * step
+        self.render()
+
+    def jump_to(self, date):
+        """Shows every session, scrolled so the first one on or after date is at the top."""
+        self.low, self.high = 0, None
+        self.top = self.get_log().index_at(date)
+        self.render()
+
+    def show_range(self):
+        """Limits the view to the From/To dates (either may be blank).
+
+        With only From filled in this is a jump: the view starts at the
+        first session on or after that date.
+        """
+        try:
+            start = parse_date(self.from_entry.get()) if self.from_entry.get().strip() else None
+            end = parse_date(self.to_entry.get(), end_of_period=True) if self.to_entry.get().strip() else None
+        except ValueError as e:
+            messagebox.showwarning("Invalid Date", str(e))
+            return
+        self.low, high = self.get_log().range_indices(start, end)
+        self.high = high if end else None
+        self.top = self.low
+        self.render()
+
+    def show_all(self):
+        self.from_entry.delete(0, tk.END)
+        self.to_entry.delete(0, tk.END)
+        self.refresh()
+
+    # --- Editing ---
+    def _on_header_double_click(self, event):
+        for tag in self.text.tag_names(f"@{event.x},{event.y}"):
+            if tag.startswith("entry-"):
+                self.edit_entry(int(tag[len("entry-"):]))
+                return "break"
+
+    def new_entry(self):
+        self._entry_dialog(None)
+
+    def edit_entry(self, index):
+        self._entry_dialog(index)
+
+    def _entry_dialog(self, index):
+        """Dialog to add (index None), edit or delete one session entry."""
+        log = self.get_log()
+        entry = log[index] if index is not None else None
+        dialog = tk.Toplevel(self.frame)
+        dialog.title("Edit Session" if entry else "New Session")
+        dialog.geometry("500x350")
+        dialog.transient(self.frame.winfo_toplevel())
+        dialog.grab_set()
+
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        date_row = ttk.Frame(frame)
+        date_row.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(date_row, text="Date:").pack(side=tk.LEFT, padx=(0, 5))
+        date_entry = ttk.Entry(date_row, width=20)
+        date_entry.pack(side=tk.LEFT)
+        text_area = tk.Text(frame, wrap="word", height=12, width=60)
+        text_area.pack(fill=tk.BOTH, expand=True)
+
+        if entry:
+            date_entry.insert(0, str(entry.get("date", "")))
+            text_area.insert("1.0", str(entry.get("text", "")))
+        else:
+            date_entry.insert(0, timestamp_now())
+
+        def save_entry():
+            try:
+                date = parse_date(date_entry.get())
+            except ValueError as e:
+                messagebox.showwarning("Invalid Date", str(e), parent=dialog)
+                return
+            text = text_area.get("1.0", "end-1c").strip()
+            if index is None:
+                new_index = log.add(text, date)
+            else:
+                new_index = log.update(index, text, date)
+            dialog.destroy()
+            self.on_change(log)
+            self.top = new_index
+            self.render()
+
+        def delete_entry():
+            if messagebox.askyesno("Delete Session", "Delete this session entry?", parent=dialog):
+                log.remove(index)
+                dialog.destroy()
+                self.on_change(log)
+                self.render()
+
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(fill=tk.X, pady=(10, 0))
+        if entry:
+            ttk.Button(button_frame, text="Delete", command=delete_entry).pack(side=tk.LEFT)
+        ttk.Button(button_frame, text="Save", command=save_entry).pack(side=tk.RIGHT, padx=(5, 0))
+        ttk.Button(button_frame, text="Cancel", command=dialog.destroy).pack(side=tk.RIGHT, padx=(5, 5))
+        text_area.focus_set()
@@ -0,0 +1,142 @@
+"""Time-indexed session entries.
+
+Sessions are stored in the journal under "Sessions" as a list of
+{"date": "YYYY-MM-DD HH:MM:SS", "text": "..."} dicts kept in date order.
+The timestamp format sorts the same as the dates it describes, so a
+parallel list of dates can be searched with bisect: jumping to a date or
+counting the sessions in a range is O(log n) however long the campaign.
+"""
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from journal_document import TIMESTAMP_FORMAT, timestamp_now
+
+SESSIONS_KEY = "Sessions"
+DATE_FORMATS = [TIMESTAMP_FORMAT, "%Y-%m-%d %H:%M", "%Y-%m-%d", "%Y-%m"]
+
+
+def parse_date(text, end_of_period=False):
+    """Parses a full or partial date ("2024-05", "2024-05-03", ...) into a sortable timestamp.
+
+    With end_of_period the result is the last moment of that month/day,
+    which is what the upper bound of a range wants. Raises ValueError if
+    the text isn't a date.
+    """
+    text = text.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(text, date_format)
+        except ValueError:
+            continue
+        stamp = parsed.strftime(TIMESTAMP_FORMAT)
+        if end_of_period and date_format != TIMESTAMP_FORMAT:
+            # Pad the missing parts with their maximum values
+            given = len(parsed.strftime(date_format))
+            stamp = stamp[:given] + "9999-19-39 29:59:59"[given:]
+        return stamp
+    raise ValueError(f"Not a date: {text!r} (expected YYYY-MM-DD or YYYY-MM-DD HH:MM:SS)")
+
+
+def make_entry(text, date=None):
+    """Builds one session entry."""
+    return {"date": date or timestamp_now(), "text": text}
+
+
+def entry_date(entry):
+    """The entry's date; a malformed one (see validate_sessions) sorts first as ""."""
+    date = entry.get("date", "") if isinstance(entry, dict) else ""
+    return date if isinstance(date, str) else ""
+
+
+class SessionLog:
+    """Sorted session entries with a bisect index over their dates.
+
+    Changes never modify the entries list in place; they build a new list,
+    so a snapshot handed to the autosave thread stays consistent.
+    """
+
+    def __init__(self, entries=None):
+        entries = list(entries or [])
+        dates = [entry_date(entry) for entry in entries]
+        if any(dates[i] > dates[i + 1] for i in range(len(dates) - 1)):
+            entries.sort(key=entry_date)
+            dates.sort()
+        self.entries = entries
+        self._dates = dates
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __getitem__(self, index):
+        return self.entries[index]
+
+    # --- Lookups ---
+    def index_at(self, date):
+        """Index of the first entry on or after date."""
+        return bisect_left(self._dates, date)
+
+    def range_indices(self, start=None, end=None):
+        """(first, last + 1) indices of the entries with start <= date <= end."""
+        low = bisect_left(self._dates, start) if start else 0
+        high = bisect_right(self._dates, end) if end else len(self._dates)
+        return low, max(low, high)
+
+    def between(self, start=None, end=None):
+        """Returns the entries dated within [start, end]."""
+        low, high = self.range_indices(start, end)
+        return self.entries[low:high]
+
+    # --- Changes ---
+    def add(self, text, date=None):
+        """Adds an entry in date order and returns its index."""
+        entry = make_entry(text, date)
+        index = bisect_right(self._dates, entry["date"])
+        self.entries = self.entries[:index] + [entry] + self.entries[index:]
+        self._dates.insert(index, entry["date"])
+        return index
+
+    def update(self, index, text, date=None):
+        """Changes an entry's text (and date, which may move it); returns its new index."""
+        old = self.entries[index]
+        if date is None or date == entry_date(old):
+            self.entries = self.entries[:index] + [dict(old, text=text)] + self.entries[index + 1:]
+            return index
+        self.remove(index)
+        return self.add(text, date)
+
+    def remove(self, index):
+        """Deletes one entry."""
+        self.entries = self.entries[:index] + self.entries[index + 1:]
+        del self._dates[index]
+
+
+def validate_sessions(entries):
+    """Returns a list of problems with a "Sessions" value."""
+    if not isinstance(entries, list):
+        return [f"'{SESSIONS_KEY}' should be a list, found {type(entries).__name__}"]
+    problems = []
+    for position, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not isinstance(entry.get("text"), str):
+            problems.append(f"session {position + 1} is not a {{date, text}} entry")
+            continue
+        try:
+            datetime.strptime(entry.get("date", ""), TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            problems.append(f"session {position + 1} has an invalid date: {entry.get('date')!r}")
+    return problems
+
+
+def normalize_sessions(entries):
+    """Returns the entries as a clean, date-sorted list of {date, text} dicts."""
+    if not isinstance(entries, list):
+        return []
+    cleaned = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        try:
+            date = parse_date(str(entry.get("date")))
+        except ValueError:
+            date = None  # Undated entries are stamped with the current time
+        cleaned.append(make_entry(str(entry.get("text", "")).strip(), date))
+    return SessionLog(cleaned).entries
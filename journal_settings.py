@@ -0,0 +1,98 @@
+"""Per-user preferences, kept apart from the journals themselves.
+
+Window size, theme and the AI prompt new journals start with live in a
+small settings.json in the user's configuration folder. They used to be
+stored in each journal, so resizing the window changed the journal and
+a new journal forgot them. The app saves the file on a short timer after
+the last change, so dragging the window edge writes it once.
+
+A missing or unreadable settings file just means the defaults; a broken
+preference is never a reason not to start.
+"""
+import json
+import os
+import sys
+
+from journal_document import write_bytes_atomic
+
+APP_DIR_NAME = "CultivationJournal"
+SETTINGS_FILE = "settings.json"
+SETTINGS_ENV = "CULTIVATION_JOURNAL_SETTINGS"  # Overrides the settings file path
+SETTINGS_SAVE_DELAY_MS = 1000  # Quiet time after the last change before the file is written
+
+DEFAULT_SETTINGS = {
+    "Window Width": 800,
+    "Window Height": 600,
+    "Theme": "Mortal Realm",
+    "AI Prompt": None,  # Prompt for new journals; None for the built-in one
+}
+
+
+def settings_path():
+    """Where this user's settings are stored."""
+    if os.environ.get(SETTINGS_ENV):
+        return os.environ[SETTINGS_ENV]
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(base, APP_DIR_NAME, SETTINGS_FILE)
+
+
+def _valid(key, value):
+    default = DEFAULT_SETTINGS[key]
+    if isinstance(default, int):
+        return isinstance(value, int) and not isinstance(value, bool) and value > 0
+    return isinstance(value, str) or (default is None and value is None)
+
+
+class Settings:
+    """The preferences as a dict of known keys, remembering what was last written."""
+
+    def __init__(self, path=None, values=None):
+        self.path = path or settings_path()
+        self.values = dict(DEFAULT_SETTINGS)
+        self.values.update(values or {})
+        self._written = dict(self.values)
+
+    @classmethod
+    def load(cls, path=None):
+        """Reads the settings file; unknown keys and values of the wrong type are ignored."""
+        settings = cls(path)
+        try:
+            with open(settings.path, "rb") as f:
+                stored = json.loads(f.read())
+        except (OSError, ValueError):
+            return settings
+        if isinstance(stored, dict):
+            for key, value in stored.items():
+                if key in DEFAULT_SETTINGS and _valid(key, value):
+                    settings.values[key] = value
+        settings._written = dict(settings.values)
+        return settings
+
+    def get(self, key):
+        return self.values[key]
+
+    def set(self, key, value):
+        """Changes one preference; returns True if it differs from before."""
+        if self.values[key] == value:
+            return False
+        self.values[key] = value
+        return True
+
+    @property
+    def dirty(self):
+        return self.values != self._written
+
+    def save(self):
+        """Writes the settings if they changed since the last write; returns the bytes written."""
+        if not self.dirty:
+            return 0
+        payload = json.dumps(self.values, indent=4).encode("utf-8")
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        write_bytes_atomic(self.path, payload)
+        self._written = dict(self.values)
+        return len(payload)
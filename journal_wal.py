@@ -0,0 +1,227 @@
+"""Append-only write-ahead log for incremental journal saves.
+
+Each save appends one line to a sidecar file next to the journal
+("<journal>.wal") holding only the fields that changed since the last
+save. Long text fields are logged as a splice (the slice that changed)
+rather than the whole value, so typing a line at the end of a huge
+Session Notes field costs a few bytes; likewise new entries at the end of
+a list (the dated Sessions) are logged on their own. Loading replays the log on top of
+the base file; compaction folds it back in with an atomic rename.
+"""
+import json
+import os
+import zlib
+
+WAL_SUFFIX = ".wal"
+WAL_VERSION = 1
+SPLICE_MIN_LENGTH = 256  # Shorter values are just logged whole
+COMPACT_MIN_BYTES = 1024 * 1024  # Never compact a log smaller than this
+
+_MISSING = object()
+
+
+def wal_path_for(path):
+    """Returns the sidecar log path for a journal file."""
+    return path + WAL_SUFFIX
+
+
+def checksum(raw_bytes):
+    """Checksum used to tie a log to the exact base file it was written against."""
+    return zlib.crc32(raw_bytes) & 0xFFFFFFFF
+
+
+def fsync_directory(directory):
+    """Flushes a directory entry so a rename survives a crash (no-op on Windows)."""
+    if os.name != "posix":
+        return
+    fd = os.open(directory or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _common_prefix_length(a, b):
+    """Length of the common prefix of two strings, found with C-level slice compares."""
+    low, high = 0, min(len(a), len(b))
+    if a[:high] == b[:high]:
+        return high
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def _common_suffix_length(a, b, limit):
+    """Length of the common suffix of two strings, not overlapping the first limit chars."""
+    low, high = 0, min(len(a), len(b)) - limit
+    if high <= 0:
+        return 0
+    if a[len(a) - high:] == b[len(b) - high:]:
+        return high
+    while low < high:
+        mid = (low + high + 1) // 2
+        if a[len(a) - mid:len(a) - low] == b[len(b) - mid:len(b) - low]:
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def text_splice(old, new):
+    """Returns (start, old_end, replacement) such that old[:start] + replacement + old[old_end:] == new."""
+    start = _common_prefix_length(old, new)
+    suffix = _common_suffix_length(old, new, start)
+    return start, len(old) - suffix, new[start:len(new) - suffix]
+
+
+def diff_fields(saved, current):
+    """Builds a log record of the differences between two journal dicts."""
+    fields = {}
+    splices = {}
+    appends = {}
+    for key, value in current.items():
+        old = saved.get(key, _MISSING)
+        if old is value or old == value:
+            continue
+        if isinstance(old, list) and isinstance(value, list) and len(value) > len(old) \
+                and value[:len(old)] == old:
+            appends[key] = value[len(old):]
+            continue
+        if isinstance(old, str) and isinstance(value, str) and len(value) >= SPLICE_MIN_LENGTH:
+            start, old_end, replacement = text_splice(old, value)
+            if len(replacement) < len(value) // 2:
+                splices[key] = [start, old_end, replacement]
+                continue
+        fields[key] = value
+
+    record = {}
+    if fields:
+        record["fields"] = fields
+    if splices:
+        record["splices"] = splices
+    if appends:
+        record["appends"] = appends
+    removed = [key for key in saved if key not in current]
+    if removed:
+        record["removed"] = removed
+    return record
+
+
+def apply_record(data, record):
+    """Applies one log record to a journal dict in place."""
+    data.update(record.get("fields", {}))
+    for key, (start, old_end, replacement) in record.get("splices", {}).items():
+        old = data.get(key, "")
+        data[key] = old[:start] + replacement + old[old_end:]
+    for key, items in record.get("appends", {}).items():
+        data[key] = list(data.get(key, [])) + items
+    for key in record.get("removed", []):
+        data.pop(key, None)
+
+
+class WriteAheadLog:
+    """The sidecar log of one journal file."""
+
+    def __init__(self, journal_path):
+        self.journal_path = journal_path
+        self.path = wal_path_for(journal_path)
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def replay(self, data, base_checksum, repair=True):
+        """Applies every complete record to data, returning how many were applied.
+
+        Returns None if the log was written against a different base file.
+        A torn last line (from a crash mid-append) is cut off so the next
+        append starts on a clean line, unless repair is False (readers that
+        must not touch the file while another process may be appending).
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0
+
+        applied = 0
+        with f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return None
+            if not isinstance(header, dict) or header.get("wal") != WAL_VERSION or header.get("base") != base_checksum:
+                return None
+
+            valid_end = f.tell()
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Incomplete append
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                apply_record(data, record)
+                applied += 1
+                valid_end += len(line)
+
+        if repair and valid_end < self.size():
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+                os.fsync(f.fileno())
+        return applied
+
+    def touched_keys(self):
+        """Keys changed or removed by the complete records in the log, without applying them."""
+        keys = set()
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return keys
+        with f:
+            f.readline()  # Header; replay() checks it
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                for part in ("fields", "splices", "appends"):
+                    keys.update(record.get(part, {}))
+                keys.update(record.get("removed", []))
+        return keys
+
+    def append(self, record, base_checksum):
+        """Durably appends one record, starting a new log if needed. Returns bytes written."""
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        is_new = self.size() == 0
+        if is_new:
+            line = json.dumps({"wal": WAL_VERSION, "base": base_checksum}) + "\n" + line
+        payload = line.encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        if is_new:
+            fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        return len(payload)
+
+    def needs_compaction(self, base_size):
+        """True once the log has grown past the size of the base file."""
+        return self.size() > max(base_size, COMPACT_MIN_BYTES)
+
+    def discard(self):
+        """Deletes the log (after its contents have been folded into the base file)."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,124 @@
+"""Notices when the open journal is changed on disk by someone else.
+
+Journals synced through a shared folder can be rewritten by another
+player while they are open here. FileWatcher polls the size and mtime of
+the journal and its write-ahead log, one os.stat each, which is cheap
+enough to do every couple of seconds. When they move, the file is read
+again on a worker thread, without repairing or discarding anything on
+disk, and handed to the GUI, which compares it field by field with what
+it last saved.
+"""
+import os
+
+from journal_document import JournalDocument
+from journal_loader import BackgroundLoad
+from journal_wal import wal_path_for
+
+WATCH_INTERVAL_MS = 2000
+READ_POLL_MS = 50
+
+
+def file_signature(path):
+    """(mtime, size) of a journal and of its log; None for a missing file."""
+    signature = []
+    for file_path in (path, wal_path_for(path)):
+        try:
+            stat = os.stat(file_path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def read_disk_state(path):
+    """The journal as it is on disk, read without modifying the file or its log."""
+    return JournalDocument.load(path, read_only=True)
+
+
+class FileWatcher:
+    """Polls one journal file from the Tk loop and reports changes made by others.
+
+    on_change(disk_document) runs on the Tk thread. is_busy(), if given, is
+    asked before each check; while it returns True (a save or load is in
+    progress) the check waits for the next poll.
+    """
+
+    def __init__(self, master, on_change, is_busy=None, interval_ms=WATCH_INTERVAL_MS):
+        self.master = master
+        self.on_change = on_change
+        self.is_busy = is_busy or (lambda: False)
+        self.interval_ms = interval_ms
+        self.path = None
+        self._signature = None  # What the file looked like when we last wrote or read it
+        self._read = None  # BackgroundLoad of a check in progress
+        self._read_signature = None
+        self._after_id = None
+
+    def watch(self, path):
+        """Starts watching path (None stops watching)."""
+        self.path = path
+        self._read = None
+        if path is None:
+            if self._after_id is not None:
+                self.master.after_cancel(self._after_id)
+                self._after_id = None
+            return
+        self.acknowledge()
+        if self._after_id is None:
+            self._after_id = self.master.after(self.interval_ms, self._poll)
+
+    def acknowledge(self):
+        """Takes the file as it is now as known (e.g. right after writing it ourselves).
+
+        Safe to call from the autosave thread.
+        """
+        if self.path:
+            self._signature = file_signature(self.path)
+
+    def has_changed(self):
+        """True if the file or its log moved since it was last acknowledged."""
+        return bool(self.path) and file_signature(self.path) != self._signature
+
+    def check(self):
+        """Re-reads the file on a worker thread if it changed; on_change follows once it is read."""
+        if self._read is not None or not self.has_changed():
+            return
+        self._read_signature = file_signature(self.path)
+        self._read = BackgroundLoad(self.path, read_disk_state).start()
+        self.master.after(READ_POLL_MS, self._poll_read)
+
+    def read_now(self):
+        """Reads the file on this thread if it changed and returns it (None if unchanged or unreadable)."""
+        if not self.has_changed():
+            return None
+        self._read = None  # Whatever a background check finds would be older than this
+        signature = file_signature(self.path)
+        try:
+            disk = read_disk_state(self.path)
+        except Exception:
+            disk = None  # Deleted or half-written by the other side; the next save replaces it
+        self._signature = signature
+        return disk
+
+    def _poll(self):
+        self._after_id = None
+        if self.path is None:
+            return
+        if not self.is_busy():
+            self.check()
+        self._after_id = self.master.after(self.interval_ms, self._poll)
+
+    def _poll_read(self):
+        read = self._read
+        if read is None:
+            return  # Superseded by watch() or read_now()
+        if not read.done:
+            self.master.after(READ_POLL_MS, self._poll_read)
+            return
+        self._read = None
+        if read.path != self.path or self.is_busy():
+            return  # Checked again by a later poll if it still differs
+        # A change that lands while we were reading moves the signature again and is caught next poll
+        self._signature = self._read_signature
+        if read.error is None:
+            self.on_change(read.document)
@@ -0,0 +1,135 @@
+"""The journals open in one window, with recently used ones kept parsed.
+
+A game master switches between a dozen characters in a session. The
+workspace remembers every journal file opened in the window and keeps
+the documents of the most recently used ones in memory, so switching
+back to one only swaps its data into the existing widgets instead of
+asking for the file and parsing it again. Once more than
+WORKSPACE_MAX_JOURNALS documents or about WORKSPACE_MAX_BYTES of text
+are parked, the least recently used are dropped; they stay in the list
+and are read from disk when picked again.
+
+A parked document is only reused while its file is as we left it (or
+as our own autosave wrote it); if someone else changed it in the
+meantime it is read again.
+"""
+import os
+import threading
+from collections import OrderedDict
+
+from journal_watcher import file_signature
+
+WORKSPACE_MAX_JOURNALS = 12
+WORKSPACE_MAX_BYTES = 256 * 1024 * 1024
+ENTRY_OVERHEAD = 64  # Rough bytes per session/ledger entry beyond its text
+
+
+def estimate_size(data):
+    """Approximate memory taken by a journal's text, in characters."""
+    size = 0
+    for value in data.values():
+        if isinstance(value, str):
+            size += len(value)
+        elif isinstance(value, list):
+            size += sum(len(str(entry.get("text") or entry.get("reason") or "")) + ENTRY_OVERHEAD
+                        if isinstance(entry, dict) else ENTRY_OVERHEAD for entry in value)
+    return size
+
+
+def _key(path):
+    return os.path.abspath(path)
+
+
+class Workspace:
+    """Open journal paths in the order they were opened, plus an LRU of parsed documents.
+
+    park() and take() run on the Tk thread; acknowledge() is called from
+    the autosave thread after each write, hence the lock.
+    """
+
+    def __init__(self, max_journals=WORKSPACE_MAX_JOURNALS, max_bytes=WORKSPACE_MAX_BYTES):
+        self.max_journals = max_journals
+        self.max_bytes = max_bytes
+        self.paths = []  # Every open journal, in the order opened
+        self._parked = OrderedDict()  # key -> [document, signature, size], least recently used first
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, path):
+        return any(_key(open_path) == _key(path) for open_path in self.paths)
+
+    def add(self, path):
+        """Lists a journal as open (no-op if it already is)."""
+        if path not in self:
+            self.paths.append(path)
+
+    def remove(self, path):
+        """Closes a journal: drops it from the list and from memory."""
+        self.paths = [open_path for open_path in self.paths if _key(open_path) != _key(path)]
+        with self._lock:
+            self._drop(_key(path))
+
+    def is_parked(self, path):
+        with self._lock:
+            return _key(path) in self._parked
+
+    # --- Parked documents ---
+    def park(self, path, document):
+        """Keeps the document of a journal being switched away from; returns those evicted to make room."""
+        self.add(path)
+        key = _key(path)
+        size = estimate_size(document.data)
+        evicted = []
+        with self._lock:
+            self._drop(key)
+            self._parked[key] = [document, file_signature(path), size]
+            self._bytes += size
+            while len(self._parked) > 1 and (len(self._parked) > self.max_journals or self._bytes > self.max_bytes):
+                oldest = next(iter(self._parked))
+                evicted.append(self._parked[oldest][0])
+                self._drop(oldest)
+        return evicted
+
+    def take(self, path):
+        """The parked document of path if its file hasn't changed since, else None."""
+        key = _key(path)
+        with self._lock:
+            parked = self._parked.get(key)
+            if parked is None:
+                return None
+            self._drop(key)
+        document, signature, size = parked
+        return document if file_signature(path) == signature else None
+
+    def acknowledge(self, path):
+        """Records our own write of a parked journal, so it is still reused afterwards."""
+        key = _key(path)
+        with self._lock:
+            parked = self._parked.get(key)
+            if parked is not None:
+                parked[1] = file_signature(path)
+
+    def documents(self):
+        """The parked documents, least recently used first."""
+        with self._lock:
+            return [parked[0] for parked in self._parked.values()]
+
+    def _drop(self, key):
+        parked = self._parked.pop(key, None)
+        if parked is not None:
+            self._bytes -= parked[2]
+
+    # --- Navigation ---
+    def neighbour(self, path, step):
+        """The open journal step places after path in the list, wrapping around.
+
+        From a journal that isn't in the list, the first (or last) one; None if
+        there is nothing else to go to.
+        """
+        keys = [_key(open_path) for open_path in self.paths]
+        current = _key(path) if path else None
+        if not keys or keys == [current]:
+            return None
+        if current not in keys:
+            return self.paths[0 if step > 0 else -1]
+        return self.paths[(keys.index(current) + step) % len(self.paths)]